@@ -26,6 +26,7 @@ from tabulate import tabulate
 
 from awsbatch.utils import fail, get_region_by_stack_id, hide_keys
 from pcluster.config.pcluster_config import default_config_file_path
+from pcluster.retries import get_adaptive_retry_config, retry_on_throttling
 
 PCLUSTER_STACK_PREFIX = "parallelcluster-"
 
@@ -108,9 +109,10 @@ class Boto3ClientFactory(object):
         self.region = region
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
-        self.proxy_config = Config()
+        # Retry throttled calls with exponential backoff and jitter, rate limiting requests when throttled
+        self.client_config = get_adaptive_retry_config()
         if not proxy == "NONE":
-            self.proxy_config = Config(proxies={"https": proxy})
+            self.client_config = self.client_config.merge(Config(proxies={"https": proxy}))
 
     def get_client(self, service):
         """
@@ -125,7 +127,7 @@ class Boto3ClientFactory(object):
                 region_name=self.region,
                 aws_access_key_id=self.aws_access_key_id,
                 aws_secret_access_key=self.aws_secret_access_key,
-                config=self.proxy_config,
+                config=self.client_config,
             )
         except ClientError as e:
             fail("AWS %s service failed with exception: %s" % (service, e))
@@ -294,7 +296,7 @@ class AWSBatchCliConfig(object):
                 aws_secret_access_key=self.aws_secret_access_key,
             )
             cfn_client = boto3_factory.get_client("cloudformation")
-            stack = cfn_client.describe_stacks(StackName=self.stack_name).get("Stacks")[0]
+            stack = retry_on_throttling(cfn_client.describe_stacks, StackName=self.stack_name).get("Stacks")[0]
             log.debug(stack)
             if self.region is None:
                 self.region = get_region_by_stack_id(stack.get("StackId"))
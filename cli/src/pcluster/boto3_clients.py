@@ -0,0 +1,122 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import threading
+from collections import Counter
+
+import boto3
+from botocore.config import Config
+
+from pcluster.offline_catalog import get_active_catalog
+
+LOGGER = logging.getLogger(__name__)
+
+# Size of the connection pool of every client, big enough to serve the calls performed concurrently by the CLI
+MAX_POOL_CONNECTIONS = 20
+
+
+class Boto3ClientRegistry(object):
+    """
+    Process-wide registry of the boto3 clients and resources used by the CLI.
+
+    A client is created once for every service, region, credentials and configuration, then it is shared by all the
+    code paths of the running command, so that endpoint resolution and HTTPS connections are reused across calls.
+    Clients are thread-safe and are shared among threads, while resources are registered per thread since they must
+    not be used concurrently.
+    The registry can be disabled by setting the PCLUSTER_CACHE_DISABLED environment variable.
+    When an offline catalog is active, the created clients are bound to it, see OfflineCatalog.
+    """
+
+    _lock = threading.RLock()
+    _clients = {}
+    _resources = {}
+    _created = Counter()
+
+    @staticmethod
+    def is_enabled():
+        """Tell if the registry is enabled; clients are created at every request otherwise."""
+        return not os.environ.get("PCLUSTER_CACHE_DISABLED")
+
+    @staticmethod
+    def get_client(service, region_name=None, config=None):
+        """Return the client for the given service, creating it the first time it is requested."""
+        return Boto3ClientRegistry._get(Boto3ClientRegistry._clients, "client", service, region_name, config)
+
+    @staticmethod
+    def get_resource(service, region_name=None, config=None):
+        """Return the resource for the given service, creating it the first time it is requested."""
+        return Boto3ClientRegistry._get(Boto3ClientRegistry._resources, "resource", service, region_name, config)
+
+    @staticmethod
+    def get_created_count():
+        """Return a dict with the number of clients and resources created so far, by service."""
+        with Boto3ClientRegistry._lock:
+            return dict(Boto3ClientRegistry._created)
+
+    @staticmethod
+    def clear():
+        """Drop all the registered clients and resources and reset the creation counters."""
+        with Boto3ClientRegistry._lock:
+            Boto3ClientRegistry._clients.clear()
+            Boto3ClientRegistry._resources.clear()
+            Boto3ClientRegistry._created.clear()
+
+    @staticmethod
+    def _get(registry, kind, service, region_name, config):
+        region_name = region_name or os.environ.get("AWS_DEFAULT_REGION")
+        config = Boto3ClientRegistry._build_config(config)
+        key = Boto3ClientRegistry._make_key(kind, service, region_name, config)
+        with Boto3ClientRegistry._lock:
+            instance = registry.get(key) if Boto3ClientRegistry.is_enabled() else None
+            if instance is None:
+                LOGGER.debug("Creating boto3 %s for service %s in region %s", kind, service, region_name)
+                factory = boto3.client if kind == "client" else boto3.resource
+                instance = factory(service, region_name=region_name, config=config)
+                catalog = get_active_catalog()
+                if catalog:
+                    catalog.attach(instance if kind == "client" else instance.meta.client)
+                Boto3ClientRegistry._created[service] += 1
+                if Boto3ClientRegistry.is_enabled():
+                    registry[key] = instance
+        return instance
+
+    @staticmethod
+    def _build_config(config):
+        """Merge the given botocore config with the default one."""
+        default_config = Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+        return default_config.merge(config) if config else default_config
+
+    @staticmethod
+    def _make_key(kind, service, region_name, config):
+        """Build a key identifying the client, using the credentials currently exposed through the environment."""
+        # Only hashable options can be part of the key, others (e.g. retries) are represented by their repr
+        options = tuple(sorted((name, repr(value)) for name, value in config._user_provided_options.items()))
+        return (
+            kind,
+            service,
+            region_name,
+            os.environ.get("AWS_PROFILE"),
+            os.environ.get("AWS_ACCESS_KEY_ID"),
+            options,
+            threading.current_thread().ident if kind == "resource" else None,
+            id(get_active_catalog()),
+        )
+
+
+def get_boto3_client(service, region_name=None, config=None):
+    """Return the shared boto3 client for the given service. See Boto3ClientRegistry."""
+    return Boto3ClientRegistry.get_client(service, region_name=region_name, config=config)
+
+
+def get_boto3_resource(service, region_name=None, config=None):
+    """Return the shared boto3 resource for the given service. See Boto3ClientRegistry."""
+    return Boto3ClientRegistry.get_resource(service, region_name=region_name, config=config)
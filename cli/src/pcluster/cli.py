@@ -21,68 +21,112 @@ from logging.handlers import RotatingFileHandler
 import argparse
 from botocore.exceptions import NoCredentialsError
 
-import pcluster.cli_commands.delete as pcluster_delete
-import pcluster.cli_commands.start as pcluster_start
-import pcluster.cli_commands.stop as pcluster_stop
-import pcluster.cli_commands.update as pcluster_update
-import pcluster.commands as pcluster
-import pcluster.configure.easyconfig as easyconfig
-import pcluster.createami as createami
-import pcluster.utils as utils
-from pcluster.dcv.connect import dcv_connect
+from pcluster.installation import get_cli_log_file, get_installed_version
+from pcluster.metadata_cache import MetadataCache
 
 LOGGER = logging.getLogger(__name__)
 
+# The modules implementing the commands are imported only when the command is dispatched: they load boto3, jinja2 and
+# the configuration mappings and validators, that would slow down the startup of every command.
+
 
 def create(args):
+    import pcluster.commands as pcluster
+
     pcluster.create(args)
 
 
 def configure(args):
+    import pcluster.configure.easyconfig as easyconfig
+
     easyconfig.configure(args)
 
 
 def ssh(args, extra_args):
+    import pcluster.commands as pcluster
+
     pcluster.ssh(args, extra_args)
 
 
 def dcv(args):
+    from pcluster.dcv.connect import dcv_connect
+
     dcv_connect(args)
 
 
 def status(args):
-    pcluster.status(args)
+    import pcluster.commands as pcluster
+    import pcluster.utils as utils
+
+    if args.all_clusters and args.cluster_name:
+        utils.error("The --all option cannot be used with the name of a cluster.")
+    elif args.all_clusters:
+        pcluster.status_all(args)
+    elif args.cluster_name:
+        pcluster.status(args)
+    else:
+        utils.error("Either the name of the cluster or the --all option must be provided.")
 
 
 def list_stacks(args):
+    import pcluster.commands as pcluster
+
     pcluster.list_stacks(args)
 
 
 def delete(args):
-    pcluster_delete.delete(args)
+    import pcluster.cli_commands.delete as pcluster_delete
+
+    _execute_on_clusters(pcluster_delete.delete, args, "Deleting", confirm=True)
 
 
 def instances(args):
+    import pcluster.commands as pcluster
+
     pcluster.instances(args)
 
 
 def update(args):
+    import pcluster.cli_commands.update as pcluster_update
+
     pcluster_update.execute(args)
 
 
 def version(args):
-    print(pcluster.version())
+    print(get_installed_version())
 
 
 def start(args):
-    pcluster_start.start(args)
+    import pcluster.cli_commands.start as pcluster_start
+
+    _execute_on_clusters(pcluster_start.start, args, "Starting the compute fleet of")
 
 
 def stop(args):
-    pcluster_stop.stop(args)
+    import pcluster.cli_commands.stop as pcluster_stop
+
+    _execute_on_clusters(pcluster_stop.stop, args, "Stopping the compute fleet of")
+
+
+def _execute_on_clusters(command, args, action, confirm=False):
+    """Run the command on the cluster, or on all the clusters when several names, patterns or tags are given."""
+    # Imported with the command, its dependencies are already loaded by the command module
+    import pcluster.cli_commands.multi_cluster as multi_cluster
+
+    if (
+        len(args.cluster_name) == 1
+        and not args.filter_tags
+        and not multi_cluster.is_cluster_pattern(args.cluster_name[0])
+    ):
+        args.cluster_name = args.cluster_name[0]
+        command(args)
+    else:
+        multi_cluster.execute(command, args, action, confirm)
 
 
 def create_ami(args):
+    import pcluster.createami as createami
+
     createami.create_ami(args)
 
 
@@ -96,7 +140,7 @@ def config_logger():
     log_stream_handler.setFormatter(logging.Formatter("%(message)s"))
     logger.addHandler(log_stream_handler)
 
-    logfile = utils.get_cli_log_file()
+    logfile = get_cli_log_file()
     try:
         os.makedirs(os.path.dirname(logfile))
     except OSError as e:
@@ -118,12 +162,55 @@ def _addarg_region(subparser):
     subparser.add_argument("-r", "--region", help="Indicates which region to connect to.")
 
 
+def _addarg_nocache(subparser):
+    subparser.add_argument(
+        "--no-cache", action="store_true", help="Do not use the local cache of the AWS resources metadata."
+    )
+
+
+def _addarg_dryrun_all_compute_resources(subparser):
+    subparser.add_argument(
+        "--dryrun-all-compute-resources",
+        action="store_true",
+        help="Tests every compute resource with a dry-run launch, instead of one for every queue.",
+    )
+
+
 def _addarg_nowait(subparser):
     subparser.add_argument(
         "-nw", "--nowait", action="store_true", help="Do not wait for stack events after executing stack command."
     )
 
 
+def _parse_tag_filter(value):
+    key, separator, tag_value = value.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError("Tag filters must be in the form Key=Value, not {0}".format(value))
+    return key, tag_value
+
+
+def _addarg_multi_cluster(subparser, action):
+    subparser.add_argument(
+        "cluster_name",
+        nargs="*",
+        help="{0} the clusters with the names provided here, glob patterns like 'dev-*' are accepted. "
+        "Clusters are processed concurrently when more than one is selected.".format(action),
+    )
+    subparser.add_argument(
+        "--filter-tag",
+        dest="filter_tags",
+        action="append",
+        default=[],
+        type=_parse_tag_filter,
+        metavar="KEY=VALUE",
+        help="Selects only the clusters with the given tag, the value can be a glob pattern. "
+        "Can be repeated to require more tags.",
+    )
+    subparser.add_argument(
+        "--parallelism", type=int, help="Maximum number of clusters processed concurrently. Defaults to 8."
+    )
+
+
 def _get_parser():
     """
     Initialize ArgumentParser for pcluster commands.
@@ -162,6 +249,8 @@ Examples::
     _addarg_config(pcreate)
     _addarg_region(pcreate)
     _addarg_nowait(pcreate)
+    _addarg_nocache(pcreate)
+    _addarg_dryrun_all_compute_resources(pcreate)
     pcreate.add_argument(
         "-nr", "--norollback", action="store_true", default=False, help="Disables stack rollback on error."
     )
@@ -203,6 +292,8 @@ Examples::
     _addarg_config(pupdate)
     _addarg_region(pupdate)
     _addarg_nowait(pupdate)
+    _addarg_nocache(pupdate)
+    _addarg_dryrun_all_compute_resources(pupdate)
     pupdate.add_argument(
         "-nr",
         "--norollback",
@@ -233,6 +324,10 @@ Examples::
         "-f", "--force", action="store_true", help="Forces the update skipping security checks. Not recommended."
     )
     pupdate.add_argument("-y", "--yes", action="store_true", help="Assumes 'yes' as answer to confirmation prompt.")
+    pupdate.add_argument(
+        "--change-set-file",
+        help="Writes the configuration changes and the results of their checks to the given file in JSON format.",
+    )
     pupdate.set_defaults(func=update)
 
     # delete command subparser
@@ -243,7 +338,7 @@ Examples::
         'it is safe to "Ctrl-C" out. You can return to that status by '
         'calling "pcluster status mycluster".',
     )
-    pdelete.add_argument("cluster_name", help="Names the cluster to delete.")
+    _addarg_multi_cluster(pdelete, "Deletes")
     pdelete.add_argument(
         "--keep-logs",
         action="store_true",
@@ -253,6 +348,9 @@ Examples::
     _addarg_config(pdelete)
     _addarg_region(pdelete)
     _addarg_nowait(pdelete)
+    pdelete.add_argument(
+        "-y", "--yes", action="store_true", help="Assumes 'yes' as answer to the confirmation prompt for many clusters."
+    )
     pdelete.set_defaults(func=delete)
 
     # start command subparser
@@ -264,7 +362,7 @@ Examples::
         "template that was used to create the cluster or to the configuration values "
         "that were used to update the cluster after it was created.",
     )
-    pstart.add_argument("cluster_name", help="Starts the compute fleet of the cluster name provided here.")
+    _addarg_multi_cluster(pstart, "Starts the compute fleet of")
     _addarg_config(pstart)
     _addarg_region(pstart)
     pstart.set_defaults(func=start)
@@ -277,14 +375,21 @@ Examples::
         "terminates the compute fleet. The head node will remain running. To terminate "
         "all EC2 resources and avoid EC2 charges, consider deleting the cluster.",
     )
-    pstop.add_argument("cluster_name", help="Stops the compute fleet of the cluster name provided here.")
+    _addarg_multi_cluster(pstop, "Stops the compute fleet of")
     _addarg_config(pstop)
     _addarg_region(pstop)
     pstop.set_defaults(func=stop)
 
     # status command subparser
     pstatus = subparsers.add_parser("status", help="Pulls the current status of the cluster.")
-    pstatus.add_argument("cluster_name", help="Shows the status of the cluster with the name provided here.")
+    pstatus.add_argument("cluster_name", nargs="?", help="Shows the status of the cluster with the name provided here.")
+    pstatus.add_argument(
+        "--all",
+        dest="all_clusters",
+        action="store_true",
+        default=False,
+        help="Shows the status of all the clusters in a table, refreshed until no cluster is in a transient state.",
+    )
     _addarg_config(pstatus)
     _addarg_region(pstatus)
     _addarg_nowait(pstatus)
@@ -406,6 +511,7 @@ Variables substituted::
     pami_group2.add_argument("--vpc-id", help="Specifies the VPC to use to build the AWS ParallelCluster AMI.")
     pami_group2.add_argument("--subnet-id", help="Specifies the Subnet to use to build the AWS ParallelCluster AMI.")
     _addarg_region(pami)
+    _addarg_nocache(pami)
     pami.set_defaults(template_url=None)
     pami.set_defaults(func=create_ami)
 
@@ -413,6 +519,7 @@ Variables substituted::
     pconfigure = subparsers.add_parser("configure", help="Start the AWS ParallelCluster configuration.")
     _addarg_config(pconfigure)
     _addarg_region(pconfigure)
+    _addarg_nocache(pconfigure)
     pconfigure.set_defaults(func=configure)
 
     # version command subparser
@@ -442,6 +549,28 @@ Variables substituted::
     return parser
 
 
+def _log_statistics():
+    """Log the statistics of the boto3 clients, retries and caches used by the command."""
+    # Modules not imported by the command have nothing to report, they are not imported just to log their statistics
+    boto3_clients = sys.modules.get("pcluster.boto3_clients")
+    if boto3_clients:
+        LOGGER.debug("boto3 clients created by the command: %s", boto3_clients.Boto3ClientRegistry.get_created_count())
+    retries = sys.modules.get("pcluster.retries")
+    if retries:
+        LOGGER.debug("Retries performed by the command: %s", retries.get_retry_statistics())
+    utils = sys.modules.get("pcluster.utils")
+    if utils:
+        _log_cache_statistics(utils)
+
+
+def _log_cache_statistics(utils):
+    """Log the statistics of the in-memory caches, print them if PCLUSTER_CACHE_STATS is set."""
+    log = LOGGER.info if os.environ.get("PCLUSTER_CACHE_STATS") else LOGGER.debug
+    for name, statistics in sorted(utils.Cache.get_statistics().items()):
+        if statistics["hits"] or statistics["misses"]:
+            log("Cache %s: %s", name, ", ".join("{0}={1}".format(k, v) for k, v in sorted(statistics.items())))
+
+
 def main():
     config_logger()
 
@@ -456,6 +585,8 @@ def main():
         # set region in the environment to make it available to all the boto3 calls
         if "region" in args and args.region:
             os.environ["AWS_DEFAULT_REGION"] = args.region
+        if "no_cache" in args and args.no_cache:
+            MetadataCache.disable()
 
         if args.func.__name__ == "ssh":
             args.func(args, extra_args)
@@ -474,6 +605,8 @@ def main():
     except Exception as e:
         LOGGER.exception("Unexpected error of type %s: %s", type(e).__name__, e)
         sys.exit(1)
+    finally:
+        _log_statistics()
 
 
 if __name__ == "__main__":
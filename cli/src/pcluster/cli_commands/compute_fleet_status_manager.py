@@ -12,9 +12,10 @@ import logging
 import time
 from enum import Enum
 
-import boto3
 from boto3.dynamodb.conditions import Attr
 
+from pcluster.boto3_clients import get_boto3_resource
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -65,7 +66,7 @@ class ComputeFleetStatusManager:
 
     def __init__(self, cluster_name):
         self._table_name = "parallelcluster-" + cluster_name
-        self._ddb_resource = boto3.resource("dynamodb")
+        self._ddb_resource = get_boto3_resource("dynamodb")
         self._table = self._ddb_resource.Table(self._table_name)
 
     def get_status(self, fallback=None):
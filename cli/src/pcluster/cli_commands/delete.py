@@ -10,18 +10,25 @@
 # limitations under the License.
 import logging
 import sys
-import time
+import threading
+from multiprocessing.pool import ThreadPool
 
-import boto3
-from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from pcluster import utils
+from pcluster.boto3_clients import get_boto3_client
 from pcluster.config.pcluster_config import PclusterConfig
+from pcluster.retries import retry_call
+from pcluster.stack_watcher import StackWatcher
 from pcluster.utils import NodeType, paginate_boto3
 
 LOGGER = logging.getLogger(__name__)
 
+# Maximum number of instances terminated by a single terminate_instances call
+TERMINATE_INSTANCES_MAX_ITEMS = 1000
+# Number of terminate_instances calls performed concurrently
+TERMINATE_MAX_WORKERS = 8
+
 
 def delete(args):
     PclusterConfig.init_aws(config_file=args.config_file)
@@ -80,32 +87,35 @@ def _persist_stack_resources(stack, template, keys):
 
 def _delete_cluster(cluster_name, nowait):
     """Delete cluster described by cluster_name."""
-    cfn = boto3.client("cloudformation")
+    cfn = get_boto3_client("cloudformation")
     saw_update = False
     terminate_compute_fleet = not nowait
+    background_termination = None
     stack_name = utils.get_stack_name(cluster_name)
     try:
         # delete_stack does not raise an exception if stack does not exist
         # Use describe_stacks to explicitly check if the stack exists
         cfn.delete_stack(StackName=stack_name)
         saw_update = True
+        if terminate_compute_fleet:
+            # Terminate the compute nodes while the stack is being deleted, the ones launched in the meantime are
+            # terminated once the deletion completes
+            background_termination = ThreadPool(1)
+            background_termination.apply_async(_terminate_cluster_nodes, (stack_name, True))
+            background_termination.close()
         stack_status = utils.get_stack(stack_name, cfn).get("StackStatus")
         sys.stdout.write("\rStatus: %s" % stack_status)
         sys.stdout.flush()
         LOGGER.debug("Status: %s", stack_status)
         if not nowait:
-            while stack_status == "DELETE_IN_PROGRESS":
-                time.sleep(5)
-                stack_status = utils.get_stack(stack_name, cfn, raise_on_error=True).get("StackStatus")
-                events = utils.get_stack_events(stack_name, raise_on_error=True)[0]
-                resource_status = (
-                    "Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))
-                ).ljust(80)
-                sys.stdout.write("\r%s" % resource_status)
-                sys.stdout.flush()
+            stack = StackWatcher(stack_name, cfn).wait(in_progress_statuses=["DELETE_IN_PROGRESS"])
+            stack_status = stack.get("StackStatus")
             sys.stdout.write("\rStatus: %s\n" % stack_status)
             sys.stdout.flush()
             LOGGER.debug("Status: %s", stack_status)
+            if stack_status == "DELETE_COMPLETE":
+                LOGGER.info("\nCluster deleted successfully.")
+                sys.exit(0)
         else:
             sys.stdout.write("\n")
             sys.stdout.flush()
@@ -125,33 +135,76 @@ def _delete_cluster(cluster_name, nowait):
         sys.exit(0)
     finally:
         if terminate_compute_fleet:
+            if background_termination:
+                background_termination.join()
             _terminate_cluster_nodes(stack_name)
 
 
-def _terminate_cluster_nodes(stack_name):
-    try:
-        LOGGER.info("\nChecking if there are running compute nodes that require termination...")
-        ec2 = boto3.client("ec2", config=Config(retries={"max_attempts": 10}))
+def _terminate_cluster_nodes(stack_name, quiet=False):
+    """
+    Terminate the compute nodes of the cluster and return the number of terminated instances.
 
-        for instance_ids in _describe_instance_ids_iterator(stack_name):
-            LOGGER.info("Terminating following instances: %s", instance_ids)
-            if instance_ids:
-                ec2.terminate_instances(InstanceIds=instance_ids)
+    Instances are terminated in batches of TERMINATE_INSTANCES_MAX_ITEMS, on a pool of TERMINATE_MAX_WORKERS threads
+    while the following ones are described. Throttled calls are retried with backoff.
 
-        LOGGER.info("Compute fleet cleaned up.")
-    except Exception as e:
-        LOGGER.error("Failed when checking for running EC2 instances with error: %s", e)
+    :param stack_name: the name of the cluster stack
+    :param quiet: True to log the progress only at debug level, e.g. when the stack status is being printed
+    """
+    log = LOGGER.debug if quiet else LOGGER.info
+    progress = {"found": 0, "terminated": 0}
+    progress_lock = threading.Lock()
+    ec2 = get_boto3_client("ec2")
 
+    def _terminate_instances(instance_ids):
+        LOGGER.debug("Terminating following instances: %s", instance_ids)
+        retry_call(ec2.terminate_instances, kwargs={"InstanceIds": instance_ids}, service="ec2")
+        with progress_lock:
+            progress["terminated"] += len(instance_ids)
+            log("Terminated %d of %d compute nodes found so far", progress["terminated"], progress["found"])
 
-def _describe_instance_ids_iterator(stack_name, instance_state=("pending", "running", "stopping", "stopped")):
-    ec2 = boto3.client("ec2")
+    pool = None
+    try:
+        log("\nChecking if there are running compute nodes that require termination...")
+        results = []
+        for instance_ids in _describe_instance_ids_iterator(stack_name):
+            with progress_lock:
+                progress["found"] += len(instance_ids)
+            pool = pool or ThreadPool(TERMINATE_MAX_WORKERS)
+            results.append(pool.apply_async(_terminate_instances, (instance_ids,)))
+        # Wait for all the batches, so that a failure doesn't prevent the termination of the other ones
+        for result in results:
+            result.wait()
+        for result in results:
+            result.get()
+
+        log("Compute fleet cleaned up.")
+    except Exception as e:
+        LOGGER.error("Failed when checking for running EC2 instances with error: %s", e)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return progress["terminated"]
+
+
+def _describe_instance_ids_iterator(
+    stack_name,
+    instance_state=("pending", "running", "stopping", "stopped"),
+    batch_size=TERMINATE_INSTANCES_MAX_ITEMS,
+):
+    """Return a generator of lists with the ids of the compute nodes in the given states, batch_size at most each."""
+    ec2 = get_boto3_client("ec2")
     filters = [
         {"Name": "tag:Application", "Values": [stack_name]},
         {"Name": "instance-state-name", "Values": list(instance_state)},
         {"Name": "tag:aws-parallelcluster-node-type", "Values": [str(NodeType.compute)]},
     ]
-    for page in paginate_boto3(ec2.describe_instances, Filters=filters, PaginationConfig={"PageSize": 100}):
-        instances = []
-        for instance in page.get("Instances", []):
+    instances = []
+    for reservation in paginate_boto3(ec2.describe_instances, Filters=filters, PaginationConfig={"PageSize": 1000}):
+        for instance in reservation.get("Instances", []):
             instances.append(instance.get("InstanceId"))
+            if len(instances) == batch_size:
+                yield instances
+                instances = []
+    if instances:
         yield instances
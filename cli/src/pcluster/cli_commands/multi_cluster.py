@@ -0,0 +1,243 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import print_function
+
+import copy
+import fnmatch
+import logging
+import sys
+import threading
+import time
+from builtins import input
+from multiprocessing.pool import ThreadPool
+
+from tabulate import tabulate
+
+from pcluster import utils
+from pcluster.boto3_clients import get_boto3_client
+from pcluster.config.pcluster_config import PclusterConfig
+from pcluster.constants import PCLUSTER_STACK_PREFIX
+
+LOGGER = logging.getLogger(__name__)
+
+# Default number of clusters processed concurrently
+DEFAULT_PARALLELISM = 8
+
+
+def is_cluster_pattern(name):
+    """Tell if the cluster name is a glob pattern."""
+    return any(char in name for char in "*?[")
+
+
+class ClusterOperationResult(object):
+    """Outcome of the operation performed on a cluster."""
+
+    def __init__(self, cluster_name):
+        self.cluster_name = cluster_name
+        self.succeeded = False
+        self.message = ""
+        self.duration = 0.0
+
+
+class _ThreadOutputCapture(object):
+    """
+    Replacement of sys.stdout capturing what is written by the threads that requested it.
+
+    The single-cluster commands print their progress on stdout, e.g. the stack status, lines written concurrently
+    for several clusters would be interleaved. The writes of the other threads are passed through.
+    The object is also a logging filter for the console handlers, dropping the records logged by the capturing
+    threads, which are still written to the log file.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def is_capturing(self):
+        return getattr(self._local, "buffer", None) is not None
+
+    def start_capture(self):
+        self._local.buffer = []
+
+    def stop_capture(self):
+        """Stop capturing the output of the current thread and return what has been written."""
+        output = "".join(self._local.buffer)
+        self._local.buffer = None
+        return output
+
+    def write(self, data):
+        if self.is_capturing():
+            self._local.buffer.append(data)
+        else:
+            self.stream.write(data)
+
+    def flush(self):
+        if not self.is_capturing():
+            self.stream.flush()
+
+    def filter(self, record):
+        return not self.is_capturing()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def get_target_clusters(names, filter_tags=None):
+    """
+    Return the names of the clusters targeted by the given names, glob patterns and tag filters.
+
+    Without tag filters the names without wildcards are returned as they are, so that clusters are looked up only
+    when needed. Otherwise all the names are matched against the existing clusters, that must have all the tags.
+
+    :param names: cluster names or glob patterns, e.g. "dev-*"
+    :param filter_tags: list of (key, value) tuples, values can be glob patterns
+    :return: the names of the clusters, without duplicates
+    """
+    filter_tags = filter_tags or []
+    cluster_names = [] if filter_tags else [name for name in names if not is_cluster_pattern(name)]
+    patterns = names if filter_tags else [name for name in names if is_cluster_pattern(name)]
+    if patterns or filter_tags:
+        cfn = get_boto3_client("cloudformation")
+        matching_names = []
+        for stack in utils.paginate_boto3(cfn.describe_stacks):
+            stack_name = stack.get("StackName")
+            if stack.get("ParentId") is not None or not stack_name.startswith(PCLUSTER_STACK_PREFIX):
+                continue
+            cluster_name = stack_name[len(PCLUSTER_STACK_PREFIX) :]  # noqa: E203
+            tags = {tag.get("Key"): tag.get("Value") for tag in stack.get("Tags", [])}
+            if (not patterns or any(fnmatch.fnmatchcase(cluster_name, pattern) for pattern in patterns)) and all(
+                key in tags and fnmatch.fnmatchcase(tags[key], value) for key, value in filter_tags
+            ):
+                matching_names.append(cluster_name)
+        cluster_names.extend(sorted(matching_names))
+    return [name for index, name in enumerate(cluster_names) if name not in cluster_names[:index]]
+
+
+def _get_console_handlers():
+    """Return the logging handlers writing on the console, e.g. the one configured by the CLI on stdout."""
+    handlers = logging.getLogger("pcluster").handlers + logging.getLogger().handlers
+    return [
+        handler
+        for handler in handlers
+        if isinstance(handler, logging.StreamHandler) and handler.stream in (sys.stdout, sys.stderr)
+    ]
+
+
+def _get_output_lines(output):
+    """Return the lines of the captured output, keeping only the last update of the lines rewritten with \\r."""
+    lines = [line.split("\r")[-1].strip() for line in output.splitlines()]
+    return [line for line in lines if line]
+
+
+def _run_on_cluster(command, args, cluster_name, output_capture):
+    """Run the single-cluster command on the cluster, catching the failures and the exits."""
+    result = ClusterOperationResult(cluster_name)
+    cluster_args = copy.copy(args)
+    cluster_args.cluster_name = cluster_name
+    start_time = time.time()
+    output_capture.start_capture()
+    try:
+        command(cluster_args)
+        result.succeeded = True
+    except SystemExit as e:
+        # Commands exit when done, e.g. after a successful deletion, and utils.error exits with the error message
+        result.succeeded = e.code in (None, 0)
+        if not result.succeeded:
+            result.message = "Failed with exit code {0}".format(e.code) if isinstance(e.code, int) else str(e.code)
+    except Exception as e:
+        LOGGER.debug("Operation on cluster %s failed with exception", cluster_name, exc_info=True)
+        result.message = "Unexpected error of type {0}: {1}".format(type(e).__name__, e)
+    finally:
+        for line in _get_output_lines(output_capture.stop_capture()):
+            LOGGER.debug("%s: %s", cluster_name, line)
+    result.duration = time.time() - start_time
+    return result
+
+
+def run_on_clusters(command, args, cluster_names, parallelism=DEFAULT_PARALLELISM):
+    """
+    Run the single-cluster command on all the clusters concurrently, logging the progress as clusters complete.
+
+    The command is called with a copy of args having the cluster_name attribute set. Its output on stdout and its
+    log records are written only to the log file, since the outputs of the clusters would be interleaved.
+
+    :param command: the function implementing the command for a single cluster, e.g. stop
+    :param args: the arguments of the command
+    :param cluster_names: the names of the clusters
+    :param parallelism: the maximum number of clusters processed concurrently
+    :return: the list of the ClusterOperationResult, in the same order as cluster_names
+    """
+    output_capture = _ThreadOutputCapture(sys.stdout)
+    console_handlers = _get_console_handlers()
+    pool = ThreadPool(max(1, min(parallelism, len(cluster_names))))
+    results = {}
+    sys.stdout = output_capture
+    for handler in console_handlers:
+        handler.addFilter(output_capture)
+    try:
+        for result in pool.imap_unordered(
+            lambda cluster_name: _run_on_cluster(command, args, cluster_name, output_capture), cluster_names
+        ):
+            results[result.cluster_name] = result
+            LOGGER.info(
+                "[%d/%d] %s: %s",
+                len(results),
+                len(cluster_names),
+                result.cluster_name,
+                "SUCCEEDED" if result.succeeded else "FAILED - {0}".format(result.message),
+            )
+    finally:
+        sys.stdout = output_capture.stream
+        for handler in console_handlers:
+            handler.removeFilter(output_capture)
+        # The operations still running when interrupted are abandoned, worker threads are daemons
+        pool.terminate()
+    return [results[cluster_name] for cluster_name in cluster_names]
+
+
+def execute(command, args, action, confirm=False):
+    """
+    Run the single-cluster command on all the clusters targeted by the arguments and print a summary.
+
+    Exit with 1 if the command failed on any cluster.
+
+    :param command: the function implementing the command for a single cluster
+    :param args: the arguments of the command, with the cluster names, filter_tags and parallelism
+    :param action: the description of the operation, e.g. "Stopping"
+    :param confirm: True to ask for confirmation before starting, unless args.yes is set
+    """
+    if not args.cluster_name and not args.filter_tags:
+        utils.error("Either the name of the clusters or the --filter-tag option must be provided.")
+    PclusterConfig.init_aws(config_file=args.config_file)
+    cluster_names = get_target_clusters(args.cluster_name, args.filter_tags)
+    if not cluster_names:
+        utils.error("No cluster matches the given names and tags.")
+
+    LOGGER.info("%s %d clusters: %s", action, len(cluster_names), ", ".join(cluster_names))
+    if confirm and not args.yes and input("Do you want to proceed? - Y/N: ").strip().lower() != "y":
+        LOGGER.info("Exiting...")
+        sys.exit(0)
+
+    results = run_on_clusters(command, args, cluster_names, args.parallelism or DEFAULT_PARALLELISM)
+    rows = [
+        [
+            result.cluster_name,
+            "SUCCEEDED" if result.succeeded else "FAILED",
+            "{0:.0f}s".format(result.duration),
+            result.message,
+        ]
+        for result in results
+    ]
+    LOGGER.info("\n%s", tabulate(rows, headers=["Name", "Result", "Duration", "Message"], tablefmt="plain"))
+    failed = sum(1 for result in results if not result.succeeded)
+    LOGGER.info("%d succeeded, %d failed", len(results) - failed, failed)
+    if failed:
+        sys.exit(1)
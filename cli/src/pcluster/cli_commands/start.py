@@ -13,10 +13,10 @@ import logging
 import sys
 from abc import abstractmethod
 
-import boto3
 from botocore.exceptions import ClientError
 
 from pcluster import utils
+from pcluster.boto3_clients import get_boto3_client
 from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatus, ComputeFleetStatusManager
 from pcluster.config.pcluster_config import PclusterConfig
 from pcluster.utils import error
@@ -67,7 +67,7 @@ class AWSBatchStartCommand(StartCommand):
     @staticmethod
     def _start_batch_ce(ce_name, min_vcpus, desired_vcpus, max_vcpus):
         try:
-            boto3.client("batch").update_compute_environment(
+            get_boto3_client("batch").update_compute_environment(
                 computeEnvironment=ce_name,
                 state="ENABLED",
                 computeResources={
@@ -12,9 +12,8 @@ import abc
 import logging
 import sys
 
-import boto3
-
 from pcluster import utils
+from pcluster.boto3_clients import get_boto3_client
 from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatus, ComputeFleetStatusManager
 from pcluster.config.pcluster_config import PclusterConfig
 from pcluster.utils import error
@@ -60,7 +59,7 @@ class AWSBatchStopCommand(StopCommand):
 
     @staticmethod
     def _stop_batch_ce(ce_name):
-        boto3.client("batch").update_compute_environment(computeEnvironment=ce_name, state="DISABLED")
+        get_boto3_client("batch").update_compute_environment(computeEnvironment=ce_name, state="DISABLED")
 
 
 class SITStopCommand(StopCommand):
@@ -11,21 +11,22 @@
 
 from __future__ import print_function
 
+import json
 import logging
 import sys
-import time
 from builtins import input
 
-import boto3
 from botocore.exceptions import ClientError
 from tabulate import tabulate
 
 import pcluster.utils as utils
+from pcluster.boto3_clients import get_boto3_client
 from pcluster.cluster_model import ClusterModel
 from pcluster.commands import evaluate_pcluster_template_url, upload_dashboard_resource, upload_hit_resources
 from pcluster.config.config_patch import ConfigPatch
 from pcluster.config.pcluster_config import PclusterConfig
 from pcluster.config.update_policy import UpdatePolicy
+from pcluster.stack_watcher import StackWatcher
 
 LOGGER = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ def execute(args):
     target_config = PclusterConfig(
         config_file=args.config_file, cluster_label=args.cluster_template, fail_on_file_absence=True
     )
-    target_config.validate()
+    target_config.validate(dryrun_all_compute_resources=args.dryrun_all_compute_resources)
 
     if _check_cluster_models(base_config, target_config, args.cluster_template) and _check_changes(
         args, base_config, target_config
@@ -51,7 +52,7 @@ def execute(args):
         base_config.update(target_config)
 
         cfn_params = base_config.to_cfn()
-        cfn_client = boto3.client("cloudformation")
+        cfn_client = get_boto3_client("cloudformation")
         _restore_cfn_only_params(cfn_client, args, cfn_params, stack_name, target_config)
 
         s3_bucket_name = cfn_params["ResourcesS3Bucket"]
@@ -63,7 +64,12 @@ def execute(args):
         if is_hit:
             try:
                 upload_hit_resources(
-                    s3_bucket_name, artifact_directory, target_config, target_config.to_storage().json_params, tags
+                    s3_bucket_name,
+                    artifact_directory,
+                    target_config,
+                    target_config.to_storage().json_params,
+                    tags,
+                    skip_unchanged=True,
                 )
             except Exception:
                 utils.error("Failed when uploading resources to cluster S3 bucket {0}".format(s3_bucket_name))
@@ -76,6 +82,7 @@ def execute(args):
                 target_config,
                 target_config.to_storage().json_params,
                 target_config.to_storage().cfn_params,
+                skip_unchanged=True,
             )
         except Exception:
             utils.error("Failed when uploading the dashboard resource to cluster S3 bucket {0}".format(s3_bucket_name))
@@ -123,17 +130,10 @@ def _update_cluster(
         if template_url:
             update_stack_args["TemplateURL"] = template_url
         cfn.update_stack(**update_stack_args)
-        stack_status = utils.get_stack(stack_name, cfn).get("StackStatus")
         if not args.nowait:
-            while stack_status in ["UPDATE_IN_PROGRESS", "UPDATE_COMPLETE_CLEANUP_IN_PROGRESS"]:
-                stack_status = utils.get_stack(stack_name, cfn).get("StackStatus")
-                events = cfn.describe_stack_events(StackName=stack_name).get("StackEvents")[0]
-                resource_status = (
-                    "Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))
-                ).ljust(80)
-                sys.stdout.write("\r%s" % resource_status)
-                sys.stdout.flush()
-                time.sleep(5)
+            StackWatcher(stack_name, cfn).wait(
+                in_progress_statuses=["UPDATE_IN_PROGRESS", "UPDATE_COMPLETE_CLEANUP_IN_PROGRESS"]
+            )
         else:
             stack_status = utils.get_stack(stack_name, cfn).get("StackStatus")
             LOGGER.info("Status: %s", stack_status)
@@ -157,6 +157,8 @@ def _check_changes(args, base_config, target_config):
         patch = ConfigPatch(base_config, target_config)
         patch_allowed, rows = patch.check()
         _print_check_report(patch_allowed, rows, args.force)
+        if args.change_set_file:
+            _write_change_set(patch, args.change_set_file)
         can_proceed = patch_allowed or args.force
     except Exception as e:
         LOGGER.error(e)
@@ -168,6 +170,13 @@ def _check_changes(args, base_config, target_config):
     return can_proceed
 
 
+def _write_change_set(patch, change_set_file):
+    """Write the change set of the patch to the given file in JSON format."""
+    with open(change_set_file, "w") as change_set_stream:
+        json.dump(patch.get_change_set(), change_set_stream, indent=2, default=str)
+    LOGGER.info("Configuration changes written to %s", change_set_file)
+
+
 def _print_check_report(patch_allowed, check_rows, forced):
     # Format of check_rows is:
     # "section", "parameter", "old value", "new value", "check", "reason", "action_needed"
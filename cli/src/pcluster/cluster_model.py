@@ -12,9 +12,11 @@ import abc
 import sys
 from abc import abstractmethod
 
-import boto3
 from botocore.exceptions import ClientError
 
+from pcluster.boto3_clients import get_boto3_client
+from pcluster.metadata_cache import MetadataCache
+from pcluster.retries import retry_on_throttling
 from pcluster.utils import (
     Cache,
     get_availability_zone_of_subnet,
@@ -28,6 +30,9 @@ if sys.version_info >= (3, 4):
 else:
     ABC = abc.ABCMeta("ABC", (), {})
 
+# Official images can be deprecated and replaced, so they are cached for less time than other metadata
+OFFICIAL_IMAGES_CACHE_TTL = 6 * 60 * 60
+
 
 class ClusterModel(ABC):
     """
@@ -47,8 +52,8 @@ class ClusterModel(ABC):
         pass
 
     @abstractmethod
-    def test_configuration(self, pcluster_config):
-        """Do dryrun tests for the configuration."""
+    def test_configuration(self, pcluster_config, dryrun_all_compute_resources=False):
+        """Do dryrun tests for the configuration, against all the compute resources if requested."""
         pass
 
     @abstractmethod
@@ -61,13 +66,28 @@ class ClusterModel(ABC):
         """Get the stop command for the model."""
         pass
 
-    def _ec2_run_instance(self, pcluster_config, **kwargs):  # noqa: C901 FIXME!!!
+    def _ec2_run_instance(self, pcluster_config, **kwargs):
         """Wrap ec2 run_instance call. Useful since a successful run_instance call signals 'DryRunOperation'."""
+        self._report_ec2_run_instance_error(pcluster_config, self._ec2_dryrun_instance(**kwargs), **kwargs)
+
+    @staticmethod
+    def _ec2_dryrun_instance(**kwargs):
+        """
+        Call ec2 run_instances, retrying it when throttled, and return the ClientError it raises, if any.
+
+        It doesn't print anything, so it can be called by a worker thread of the ValidationEngine.
+        """
         try:
-            boto3.client("ec2").run_instances(**kwargs)
+            retry_on_throttling(get_boto3_client("ec2").run_instances, **kwargs)
         except ClientError as e:
-            code = e.response.get("Error").get("Code")
-            message = e.response.get("Error").get("Message")
+            return e
+        return None
+
+    def _report_ec2_run_instance_error(self, pcluster_config, error, **kwargs):  # noqa: C901 FIXME!!!
+        """Report the error returned by _ec2_dryrun_instance for the given run_instances arguments."""
+        if error:
+            code = error.response.get("Error").get("Code")
+            message = error.response.get("Error").get("Message")
             subnet_id = kwargs["NetworkInterfaces"][0]["SubnetId"]
             if code == "DryRunOperation":
                 pass
@@ -116,10 +136,14 @@ class ClusterModel(ABC):
                     "Please double check your cluster configuration.\n{1}".format(kwargs["InstanceType"], message)
                 )
 
-    @Cache.cached
+    @Cache.cached(ttl=OFFICIAL_IMAGES_CACHE_TTL)
     def _get_official_image_id(self, os, architecture):
         """Return the id of the current official image, for the provided os-architecture combination."""
-        ami_id = None
+        # Images of the development accounts are looked up too, so the result depends on the credentials in use
+        cache_key = [get_installed_version(), os, architecture]
+        ami_id = MetadataCache.get("official_images", cache_key, ttl=OFFICIAL_IMAGES_CACHE_TTL, account_specific=True)
+        if ami_id:
+            return ami_id
         try:
             image_prefix = self._get_official_image_name_prefix(os, architecture)
             # Look for public ParallelCluster AMI in released version
@@ -138,6 +162,7 @@ class ClusterModel(ABC):
                 "No official image id found for base_os='{0}' and architecture='{1}'".format(os, architecture)
             )
 
+        MetadataCache.put("official_images", cache_key, ami_id, account_specific=True)
         return ami_id
 
     def _get_image_id(self, image_prefix, owner, public=False):
@@ -151,7 +176,7 @@ class ClusterModel(ABC):
         if public:
             filters.append({"Name": "is-public", "Values": ["true"]})
 
-        images = boto3.client("ec2").describe_images(Filters=filters, Owners=[owner]).get("Images")
+        images = get_boto3_client("ec2").describe_images(Filters=filters, Owners=[owner]).get("Images")
         return images[0].get("ImageId") if images else None
 
     def _get_official_image_name_prefix(self, os, architecture):
@@ -16,6 +16,7 @@
 
 from __future__ import absolute_import, print_function
 
+import functools
 import json
 import logging
 import os
@@ -23,20 +24,34 @@ import re
 import sys
 import time
 from builtins import str
+from multiprocessing.pool import ThreadPool
 
-import boto3
 import pkg_resources
 from botocore.exceptions import ClientError
 from tabulate import tabulate
 
 import pcluster.utils as utils
-from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatusManager
+from pcluster.boto3_clients import get_boto3_client
+from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatus, ComputeFleetStatusManager
 from pcluster.config.hit_converter import HitConverter
 from pcluster.config.pcluster_config import PclusterConfig
 from pcluster.constants import PCLUSTER_NAME_MAX_LENGTH, PCLUSTER_NAME_REGEX, PCLUSTER_STACK_PREFIX
+from pcluster.stack_watcher import StackWatcher
 
 LOGGER = logging.getLogger(__name__)
 
+# Official templates are bound to the installed version, so they are read from the local cache without revalidation
+# for this amount of seconds. Custom templates are always revalidated.
+OFFICIAL_TEMPLATES_MAX_AGE = 24 * 60 * 60
+# Number of cluster artifacts built and uploaded concurrently
+UPLOAD_MAX_WORKERS = 4
+# Number of clusters whose head node and compute fleet status are retrieved concurrently by status --all
+STATUS_ALL_MAX_WORKERS = 10
+# Seconds between two refreshes of the status --all table
+STATUS_ALL_REFRESH_INTERVAL = 10
+STABLE_STACK_STATUSES = ["CREATE_COMPLETE", "UPDATE_COMPLETE", "UPDATE_ROLLBACK_COMPLETE"]
+TRANSIENT_HEAD_NODE_STATES = ["pending", "stopping", "shutting-down"]
+
 
 def _setup_bucket_with_resources(pcluster_config, storage_data, stack_name, tags):
     """
@@ -87,43 +102,89 @@ def _upload_cluster_artifacts(
         if scheduler == "awsbatch":
             resources_dirs.append("resources/batch")
 
-        for resources_dir in resources_dirs:
-            resources = pkg_resources.resource_filename(__name__, resources_dir)
-            utils.upload_resources_artifacts(
+        # Artifacts are independent, they are built and uploaded concurrently
+        upload_jobs = [
+            functools.partial(
+                utils.upload_resources_artifacts,
                 s3_bucket_name,
                 artifact_directory,
-                root=resources,
+                root=pkg_resources.resource_filename(__name__, resources_dir),
             )
+            for resources_dir in resources_dirs
+        ]
         if utils.is_hit_enabled_scheduler(scheduler):
-            upload_hit_resources(s3_bucket_name, artifact_directory, pcluster_config, storage_data.json_params, tags)
-
-        upload_dashboard_resource(
-            s3_bucket_name, artifact_directory, pcluster_config, storage_data.json_params, storage_data.cfn_params
+            upload_jobs.append(
+                functools.partial(
+                    upload_hit_resources,
+                    s3_bucket_name,
+                    artifact_directory,
+                    pcluster_config,
+                    storage_data.json_params,
+                    tags,
+                )
+            )
+        upload_jobs.append(
+            functools.partial(
+                upload_dashboard_resource,
+                s3_bucket_name,
+                artifact_directory,
+                pcluster_config,
+                storage_data.json_params,
+                storage_data.cfn_params,
+            )
         )
+        _run_upload_jobs(upload_jobs)
     except Exception as e:
         LOGGER.error("Unable to upload cluster resources to the S3 bucket %s due to exception: %s", s3_bucket_name, e)
         utils.cleanup_s3_resources(s3_bucket_name, artifact_directory, remove_bucket_on_deletion)
         raise
 
 
-def upload_hit_resources(bucket_name, artifact_directory, pcluster_config, json_params, tags=None):
+def _run_upload_jobs(upload_jobs):
+    """Run the upload functions concurrently, wait for all of them and raise the first failure, if any."""
+    pool = ThreadPool(min(UPLOAD_MAX_WORKERS, len(upload_jobs)))
+    try:
+        results = [pool.apply_async(upload_job) for upload_job in upload_jobs]
+        # Wait for all the uploads before raising, so that nothing is uploaded after the cleanup
+        for result in results:
+            result.wait()
+        for result in results:
+            result.get()
+    finally:
+        pool.close()
+        pool.join()
+
+
+def upload_hit_resources(
+    bucket_name, artifact_directory, pcluster_config, json_params, tags=None, skip_unchanged=False
+):
+    """
+    Upload the configuration of the cluster and the HIT template rendered with it.
+
+    :param skip_unchanged: True to skip the upload of the objects already existing with the same content, e.g. when
+    updating the cluster
+    """
     if tags is None:
         tags = []
-    hit_template_url = pcluster_config.get_section("cluster").get_param_value(
-        "hit_template_url"
-    ) or "{bucket_url}/templates/compute-fleet-hit-substack-{version}.cfn.yaml".format(
-        bucket_url=utils.get_bucket_url(pcluster_config.region), version=utils.get_installed_version()
+    custom_template_url = pcluster_config.get_section("cluster").get_param_value("hit_template_url")
+    hit_template_url = (
+        custom_template_url
+        or "{bucket_url}/templates/compute-fleet-hit-substack-{version}.cfn.yaml".format(
+            bucket_url=utils.get_bucket_url(pcluster_config.region), version=utils.get_installed_version()
+        )
     )
-    s3_client = boto3.client("s3")
 
     try:
-        result = s3_client.put_object(
-            Bucket=bucket_name,
-            Body=json.dumps(json_params),
-            Key="{artifact_directory}/configs/cluster-config.json".format(artifact_directory=artifact_directory),
+        config_version = utils.put_s3_object_if_changed(
+            bucket_name,
+            "{artifact_directory}/configs/cluster-config.json".format(artifact_directory=artifact_directory),
+            json.dumps(json_params),
+            check_existing=skip_unchanged,
+        )
+        file_contents = utils.read_remote_file(
+            hit_template_url, max_age=0 if custom_template_url else OFFICIAL_TEMPLATES_MAX_AGE
         )
-        file_contents = utils.read_remote_file(hit_template_url)
-        rendered_template = utils.render_template(file_contents, json_params, tags, result.get("VersionId"))
+        rendered_template = utils.render_template(file_contents, json_params, tags, config_version)
     except ClientError as client_error:
         LOGGER.error("Error when uploading cluster configuration file to bucket %s: %s", bucket_name, client_error)
         raise
@@ -132,29 +193,41 @@ def upload_hit_resources(bucket_name, artifact_directory, pcluster_config, json_
         raise
 
     try:
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Body=rendered_template,
-            Key="{artifact_directory}/templates/compute-fleet-hit-substack.rendered.cfn.yaml".format(
+        utils.put_s3_object_if_changed(
+            bucket_name,
+            "{artifact_directory}/templates/compute-fleet-hit-substack.rendered.cfn.yaml".format(
                 artifact_directory=artifact_directory
             ),
+            rendered_template,
+            check_existing=skip_unchanged,
         )
     except Exception as e:
         LOGGER.error("Error when uploading CloudFormation template to bucket %s: %s", bucket_name, e)
         raise
 
 
-def upload_dashboard_resource(bucket_name, artifact_directory, pcluster_config, json_params, cfn_params):
+def upload_dashboard_resource(
+    bucket_name, artifact_directory, pcluster_config, json_params, cfn_params, skip_unchanged=False
+):
+    """
+    Upload the CloudWatch Dashboard template rendered with the configuration of the cluster.
+
+    :param skip_unchanged: True to skip the upload if the template already exists with the same content
+    """
     params = {"json_params": json_params, "cfn_params": cfn_params}
-    cw_dashboard_template_url = pcluster_config.get_section("cluster").get_param_value(
-        "cw_dashboard_template_url"
-    ) or "{bucket_url}/templates/cw-dashboard-substack-{version}.cfn.yaml".format(
-        bucket_url=utils.get_bucket_url(pcluster_config.region),
-        version=utils.get_installed_version(),
+    custom_template_url = pcluster_config.get_section("cluster").get_param_value("cw_dashboard_template_url")
+    cw_dashboard_template_url = (
+        custom_template_url
+        or "{bucket_url}/templates/cw-dashboard-substack-{version}.cfn.yaml".format(
+            bucket_url=utils.get_bucket_url(pcluster_config.region),
+            version=utils.get_installed_version(),
+        )
     )
 
     try:
-        file_contents = utils.read_remote_file(cw_dashboard_template_url)
+        file_contents = utils.read_remote_file(
+            cw_dashboard_template_url, max_age=0 if custom_template_url else OFFICIAL_TEMPLATES_MAX_AGE
+        )
         rendered_template = utils.render_template(file_contents, params, {})
     except Exception as e:
         LOGGER.error(
@@ -163,12 +236,13 @@ def upload_dashboard_resource(bucket_name, artifact_directory, pcluster_config,
         raise
 
     try:
-        boto3.client("s3").put_object(
-            Bucket=bucket_name,
-            Body=rendered_template,
-            Key="{artifact_directory}/templates/cw-dashboard-substack.rendered.cfn.yaml".format(
+        utils.put_s3_object_if_changed(
+            bucket_name,
+            "{artifact_directory}/templates/cw-dashboard-substack.rendered.cfn.yaml".format(
                 artifact_directory=artifact_directory
             ),
+            rendered_template,
+            check_existing=skip_unchanged,
         )
     except Exception as e:
         LOGGER.error("Error when uploading CloudWatch Dashboard template to bucket %s: %s", bucket_name, e)
@@ -206,7 +280,7 @@ def create(args):  # noqa: C901 FIXME!!!
     pcluster_config = PclusterConfig(
         config_file=args.config_file, cluster_label=args.cluster_template, fail_on_file_absence=True
     )
-    pcluster_config.validate()
+    pcluster_config.validate(dryrun_all_compute_resources=args.dryrun_all_compute_resources)
 
     # Automatic SIT -> HIT conversion, if needed
     HitConverter(pcluster_config).convert()
@@ -221,7 +295,7 @@ def create(args):  # noqa: C901 FIXME!!!
     artifact_directory = None
     cleanup_bucket = False
     try:
-        cfn_client = boto3.client("cloudformation")
+        cfn_client = get_boto3_client("cloudformation")
         stack_name = utils.get_stack_name(args.cluster_name)
 
         # merge tags from configuration, command-line and internal ones
@@ -399,22 +473,31 @@ def _colorize(stack_status, args):
             return "\033[%s%s\033[%s" % (status_to_color[status_label], stack_status, end)
 
 
+def _get_cluster_stacks(cfn=None):
+    """Return the main stacks of all the clusters, retrieved with a single paginated describe_stacks pass."""
+    cfn = cfn or get_boto3_client("cloudformation")
+    return [
+        stack
+        for stack in utils.paginate_boto3(cfn.describe_stacks)
+        if stack.get("ParentId") is None and stack.get("StackName").startswith(PCLUSTER_STACK_PREFIX)
+    ]
+
+
 def list_stacks(args):
     # Parse configuration file to read the AWS section
     PclusterConfig.init_aws(config_file=args.config_file)
 
     try:
         result = []
-        for stack in utils.paginate_boto3(boto3.client("cloudformation").describe_stacks):
-            if stack.get("ParentId") is None and stack.get("StackName").startswith(PCLUSTER_STACK_PREFIX):
-                pcluster_version = _get_pcluster_version_from_stack(stack)
-                result.append(
-                    [
-                        stack.get("StackName")[len(PCLUSTER_STACK_PREFIX) :],  # noqa: E203
-                        _colorize(stack.get("StackStatus"), args),
-                        pcluster_version,
-                    ]
-                )
+        for stack in _get_cluster_stacks():
+            pcluster_version = _get_pcluster_version_from_stack(stack)
+            result.append(
+                [
+                    stack.get("StackName")[len(PCLUSTER_STACK_PREFIX) :],  # noqa: E203
+                    _colorize(stack.get("StackStatus"), args),
+                    pcluster_version,
+                ]
+            )
         LOGGER.info(tabulate(result, tablefmt="plain"))
     except ClientError as e:
         LOGGER.critical(e.response.get("Error").get("Message"))
@@ -425,7 +508,7 @@ def list_stacks(args):
 
 
 def _poll_head_node_state(stack_name):
-    ec2 = boto3.client("ec2")
+    ec2 = get_boto3_client("ec2")
     try:
         instances = utils.describe_cluster_instances(stack_name, node_type=utils.NodeType.head_node)
         if not instances:
@@ -497,7 +580,7 @@ def ssh(args, extra_args):  # noqa: C901 FIXME!!!
     :param extra_args: pcluster CLI extra_args
     """
     # FIXME it always search for the default config file
-    pcluster_config = PclusterConfig(fail_on_error=False, auto_refresh=False)
+    pcluster_config = PclusterConfig(fail_on_error=False, auto_refresh=False, global_sections_only=True)
     if args.command in pcluster_config.get_section("aliases").params:
         ssh_command = pcluster_config.get_section("aliases").get_param_value(args.command)
     else:
@@ -533,28 +616,13 @@ def status(args):  # noqa: C901 FIXME!!!
     # Parse configuration file to read the AWS section
     PclusterConfig.init_aws(config_file=args.config_file)
 
-    cfn = boto3.client("cloudformation")
+    cfn = get_boto3_client("cloudformation")
     try:
         stack = utils.get_stack(stack_name, cfn)
         sys.stdout.write("\rStatus: %s" % stack.get("StackStatus"))
         sys.stdout.flush()
         if not args.nowait:
-            while stack.get("StackStatus") not in [
-                "CREATE_COMPLETE",
-                "UPDATE_COMPLETE",
-                "UPDATE_ROLLBACK_COMPLETE",
-                "ROLLBACK_COMPLETE",
-                "CREATE_FAILED",
-                "DELETE_FAILED",
-            ]:
-                time.sleep(5)
-                stack = utils.get_stack(stack_name, cfn)
-                events = utils.get_stack_events(stack_name)[0]
-                resource_status = (
-                    "Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))
-                ).ljust(80)
-                sys.stdout.write("\r%s" % resource_status)
-                sys.stdout.flush()
+            stack = StackWatcher(stack_name, cfn).wait()
             sys.stdout.write("\rStatus: %s\n" % stack.get("StackStatus"))
             sys.stdout.flush()
             if stack.get("StackStatus") in ["CREATE_COMPLETE", "UPDATE_COMPLETE", "UPDATE_ROLLBACK_COMPLETE"]:
@@ -586,6 +654,130 @@ def status(args):  # noqa: C901 FIXME!!!
         sys.exit(0)
 
 
+def status_all(args):
+    """Show the status of all the clusters in a table, refreshed until no cluster is in a transient state."""
+    PclusterConfig.init_aws(config_file=args.config_file)
+
+    cfn = get_boto3_client("cloudformation")
+    pool = ThreadPool(STATUS_ALL_MAX_WORKERS)
+    clusters_details = {}
+    printed_lines = []
+    try:
+        while True:
+            stacks = _get_cluster_stacks(cfn)
+            clusters_details = _get_clusters_details(pool, stacks, clusters_details)
+            rows = [["Name", "Status", "Version", "MasterServer", "ComputeFleet"]]
+            for stack in stacks:
+                details = clusters_details[stack.get("StackName")]
+                rows.append(
+                    [
+                        stack.get("StackName")[len(PCLUSTER_STACK_PREFIX) :],  # noqa: E203
+                        stack.get("StackStatus"),
+                        _get_pcluster_version_from_stack(stack),
+                        details.get("head_node_state", "-").upper(),
+                        details.get("compute_fleet_status", "-"),
+                    ]
+                )
+            printed_lines = _refresh_table(tabulate(rows, tablefmt="plain").splitlines(), printed_lines)
+            if args.nowait or not any(details.get("transient") for details in clusters_details.values()):
+                break
+            time.sleep(STATUS_ALL_REFRESH_INTERVAL)
+    except ClientError as e:
+        LOGGER.critical(e.response.get("Error").get("Message"))
+        sys.stdout.flush()
+        sys.exit(1)
+    except KeyboardInterrupt:
+        LOGGER.info("\nExiting...")
+        sys.exit(0)
+    finally:
+        pool.terminate()
+
+
+def _get_clusters_details(pool, stacks, previous_details):
+    """
+    Return the head node and compute fleet status of the clusters, by stack name.
+
+    The details are only retrieved for the clusters that changed since the previous refresh, that are in a
+    transient state or whose previous lookup failed, the lookups are performed concurrently.
+    """
+    details = {}
+    stacks_to_refresh = []
+    for stack in stacks:
+        stack_name = stack.get("StackName")
+        previous = previous_details.get(stack_name)
+        if (
+            previous
+            and not previous.get("transient")
+            and not previous.get("lookup_failed")
+            and previous.get("version") == _get_stack_version(stack)
+        ):
+            details[stack_name] = previous
+        else:
+            stacks_to_refresh.append(stack)
+    for stack, stack_details in zip(stacks_to_refresh, pool.map(_get_cluster_details, stacks_to_refresh)):
+        details[stack.get("StackName")] = stack_details
+    return details
+
+
+def _get_stack_version(stack):
+    """Return a value identifying the last change of the stack."""
+    return stack.get("StackStatus"), str(stack.get("LastUpdatedTime") or stack.get("CreationTime"))
+
+
+def _get_cluster_details(stack):
+    """Retrieve head node and compute fleet status of the cluster, without printing anything."""
+    stack_name = stack.get("StackName")
+    details = {"version": _get_stack_version(stack), "transient": stack.get("StackStatus").endswith("_IN_PROGRESS")}
+    if stack.get("StackStatus") not in STABLE_STACK_STATUSES:
+        return details
+    try:
+        instances = utils.describe_cluster_instances(stack_name, node_type=utils.NodeType.head_node)
+        if instances:
+            details["head_node_state"] = instances[0].get("State").get("Name")
+            details["transient"] = details["head_node_state"] in TRANSIENT_HEAD_NODE_STATES
+        if utils.get_stack_output_value(stack.get("Outputs", []), "IsHITCluster") == "true":
+            cluster_name = stack_name[len(PCLUSTER_STACK_PREFIX) :]  # noqa: E203
+            compute_fleet_status = ComputeFleetStatusManager(cluster_name).get_status()
+            if compute_fleet_status:
+                details["compute_fleet_status"] = str(compute_fleet_status)
+                details["transient"] = (
+                    details["transient"]
+                    or ComputeFleetStatus.is_start_in_progress(compute_fleet_status)
+                    or ComputeFleetStatus.is_stop_in_progress(compute_fleet_status)
+                )
+    except (Exception, SystemExit) as e:
+        # utils.error exits on failure, which must not terminate the worker thread
+        LOGGER.debug("Unable to retrieve the details of cluster %s: %s", stack_name, e)
+        details["head_node_state"] = details.get("head_node_state", "unknown")
+        # Retrieved again at the next refresh, e.g. when the lookup was throttled
+        details["lookup_failed"] = True
+    return details
+
+
+def _refresh_table(lines, printed_lines):
+    """
+    Print the table, redrawing in place the rows changed since the previous refresh when stdout is a terminal.
+
+    :return: the printed lines
+    """
+    if lines == printed_lines:
+        return printed_lines
+    if printed_lines and sys.stdout.isatty():
+        # Move the cursor to the first line of the previous table and rewrite only the lines that changed
+        sys.stdout.write("\033[{0}F".format(len(printed_lines)))
+        for index, line in enumerate(lines):
+            if index < len(printed_lines) and line == printed_lines[index]:
+                sys.stdout.write("\033[1E")
+            else:
+                sys.stdout.write("\033[K{0}\n".format(line))
+        # Clear the lines left by a longer previous table
+        sys.stdout.write("\033[J")
+    else:
+        sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+    return lines
+
+
 def _get_default_template_url(region):
     return (
         "https://{REGION}-aws-parallelcluster.s3.{REGION}.amazonaws.com{SUFFIX}/templates/"
@@ -0,0 +1,110 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import threading
+
+from pcluster.boto3_clients import get_boto3_client
+
+LOGGER = logging.getLogger(__name__)
+
+# Maximum number of ids passed to a single describe call
+MAX_IDS_PER_CALL = 100
+
+# Describe call of every resource type: service, method, ids argument, response key and id attribute
+RESOURCE_DESCRIBE_CALLS = {
+    "subnets": ("ec2", "describe_subnets", "SubnetIds", "Subnets", "SubnetId"),
+    "security_groups": ("ec2", "describe_security_groups", "GroupIds", "SecurityGroups", "GroupId"),
+    "volumes": ("ec2", "describe_volumes", "VolumeIds", "Volumes", "VolumeId"),
+    "snapshots": ("ec2", "describe_snapshots", "SnapshotIds", "Snapshots", "SnapshotId"),
+    "key_pairs": ("ec2", "describe_key_pairs", "KeyNames", "KeyPairs", "KeyName"),
+    "placement_groups": ("ec2", "describe_placement_groups", "GroupNames", "PlacementGroups", "GroupName"),
+    "images": ("ec2", "describe_images", "ImageIds", "Images", "ImageId"),
+    "fsx_file_systems": ("fsx", "describe_file_systems", "FileSystemIds", "FileSystems", "FileSystemId"),
+}
+
+
+class AwsResources(object):
+    """
+    Snapshot of the AWS resources referenced by a configuration, shared by the validators of a validation run.
+
+    prefetch() describes all the resources of a type with a single call. Validators retrieve resources through get(),
+    which serves them from the snapshot and describes on their own the ones that were not prefetched, keeping the
+    errors of the original describe call (e.g. a ClientError for a resource that doesn't exist).
+    """
+
+    def __init__(self):
+        self._resources = {resource_type: {} for resource_type in RESOURCE_DESCRIBE_CALLS}
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        """Copy the snapshot, locks cannot be copied."""
+        resources_copy = AwsResources()
+        with self._lock:
+            for resource_type, resources in self._resources.items():
+                resources_copy._resources[resource_type].update(resources)
+        return resources_copy
+
+    def prefetch(self, resource_type, resource_ids):
+        """
+        Describe the given resources with batched calls and store them in the snapshot.
+
+        Prefetching is an optimization only: when a batch fails, e.g. because one of the resources doesn't exist,
+        its resources are left to be described one at a time by get().
+        """
+        resource_ids = sorted(set(resource_ids) - set(self._resources[resource_type]))
+        for index in range(0, len(resource_ids), MAX_IDS_PER_CALL):
+            batch = resource_ids[index : index + MAX_IDS_PER_CALL]  # noqa: E203
+            try:
+                self._store(resource_type, self._describe(resource_type, batch))
+            except Exception as e:
+                LOGGER.debug("Unable to prefetch %s %s: %s", resource_type, batch, e)
+
+    def get(self, resource_type, resource_id, describe_func=None):
+        """
+        Return the description of the resource, describing it if not already in the snapshot.
+
+        :param resource_type: one of the keys of RESOURCE_DESCRIBE_CALLS
+        :param resource_id: the id (or the name, for key pairs and placement groups) of the resource
+        :param describe_func: function describing a single resource, used when it is not in the snapshot
+        :raise ClientError: as the describe call, if the resource is not in the snapshot
+        :raise IndexError: if the describe call doesn't return the resource
+        """
+        with self._lock:
+            resource = self._resources[resource_type].get(resource_id)
+        if resource is None:
+            resource = describe_func(resource_id) if describe_func else self._describe(resource_type, [resource_id])[0]
+            self._store(resource_type, [resource], [resource_id])
+        return resource
+
+    def get_many(self, resource_type, resource_ids):
+        """Return the description of the given resources, describing together the ones not in the snapshot."""
+        with self._lock:
+            missing_ids = [
+                resource_id for resource_id in resource_ids if resource_id not in self._resources[resource_type]
+            ]
+        if missing_ids:
+            self._store(resource_type, self._describe(resource_type, missing_ids))
+        with self._lock:
+            resources = self._resources[resource_type]
+            return [resources[resource_id] for resource_id in resource_ids if resource_id in resources]
+
+    def _store(self, resource_type, resources, resource_ids=None):
+        id_attribute = RESOURCE_DESCRIBE_CALLS[resource_type][4]
+        with self._lock:
+            for index, resource in enumerate(resources):
+                resource_id = resource_ids[index] if resource_ids else resource.get(id_attribute)
+                self._resources[resource_type][resource_id] = resource
+
+    @staticmethod
+    def _describe(resource_type, resource_ids):
+        service, method, ids_argument, response_key, _ = RESOURCE_DESCRIBE_CALLS[resource_type]
+        describe = getattr(get_boto3_client(service), method)
+        return describe(**{ids_argument: list(resource_ids)}).get(response_key, [])
@@ -51,7 +51,7 @@ class CfnParam(Param):
 
         :param cfn_params: list of all the CFN parameters, used if "cfn_param_mapping" is specified in the definition
         """
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_params:
             cfn_value = get_cfn_param(cfn_params, cfn_converter) if cfn_converter else "NONE"
             self.value = self.get_value_from_string(cfn_value)
@@ -71,7 +71,7 @@ class CfnParam(Param):
     def to_cfn(self):
         """Convert param to CFN representation, if "cfn_param_mapping" attribute is present in the Param definition."""
         cfn_params = {}
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
 
         if cfn_converter:
             cfn_value = self.get_cfn_value()
@@ -85,7 +85,7 @@ class CfnParam(Param):
 
         Used when the parameter must go into a comma separated CFN parameter.
         """
-        return str(self.value if self.value is not None else self.definition.get("default", "NONE"))
+        return str(self.value if self.value is not None else self.schema.get_default("NONE"))
 
 
 class CommaSeparatedCfnParam(CfnParam):
@@ -124,11 +124,11 @@ class CommaSeparatedCfnParam(CfnParam):
 
         Used when the parameter must go into a comma separated CFN parameter.
         """
-        return str(",".join(self.value) if self.value else self.definition.get("default", "NONE"))
+        return str(",".join(self.value) if self.value else self.schema.get_default("NONE"))
 
     def get_default_value(self):
         """Get default value from the Param definition if there, empty list otherwise."""
-        return self.definition.get("default", [])
+        return self.schema.get_default([])
 
 
 class FloatCfnParam(CfnParam):
@@ -281,7 +281,7 @@ class JsonCfnParam(CfnParam):
 
     def get_default_value(self):
         """Get default value from the Param definition, if there, {} otherwise."""
-        return self.definition.get("default", {})
+        return self.schema.get_default({})
 
     def get_string_value(self):
         """
@@ -299,6 +299,8 @@ class JsonCfnParam(CfnParam):
 class ExtraJsonCfnParam(JsonCfnParam):
     """Class to manage extra_json configuration parameters."""
 
+    refresh_dependencies = ()
+
     def get_cfn_value(self):
         """
         Convert parameter value into CFN value.
@@ -341,7 +343,7 @@ class SharedDirCfnParam(CfnParam):
             len(ebs_labels.split(",")) == 1
             and not self.pcluster_config.get_section("ebs", ebs_labels).get_param_value("shared_dir")
         ):
-            cfn_params[self.definition.get("cfn_param_mapping")] = self.get_cfn_value()
+            cfn_params[self.schema.cfn_param_mapping] = self.get_cfn_value()
         # else: there are shared_dir specified in EBS sections
         # let the EBSSettings populate the SharedDir CFN parameter.
         return cfn_params
@@ -382,7 +384,7 @@ class SpotPriceCfnParam(FloatCfnParam):
 
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing CFN input only if the scheduler is a traditional one."""
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter and cfn_params:
             if get_cfn_param(cfn_params, "Scheduler") != "awsbatch":
                 self.value = float(get_cfn_param(cfn_params, cfn_converter))
@@ -395,7 +397,7 @@ class SpotPriceCfnParam(FloatCfnParam):
 
         Insignificant trailing zeros removed to correctly match CloudFormation conditions using "0" as test value
         """
-        return str("{0:g}".format(self.value) if self.value is not None else self.definition.get("default", "NONE"))
+        return str("{0:g}".format(self.value) if self.value is not None else self.schema.get_default("NONE"))
 
     def to_cfn(self):
         """Convert parameter to CFN representation."""
@@ -403,7 +405,7 @@ class SpotPriceCfnParam(FloatCfnParam):
 
         cluster_config = self.pcluster_config.get_section(self.section_key)
         if cluster_config.get_param_value("scheduler") != "awsbatch":
-            cfn_params[self.definition.get("cfn_param_mapping")] = self.get_cfn_value()
+            cfn_params[self.schema.cfn_param_mapping] = self.get_cfn_value()
 
         return cfn_params
 
@@ -419,7 +421,7 @@ class SpotBidPercentageCfnParam(IntCfnParam):
 
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing CFN input only if the scheduler is awsbatch."""
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter and cfn_params:
             if get_cfn_param(cfn_params, "Scheduler") == "awsbatch":
                 # we have the same CFN input parameters for both spot_price and spot_bid_percentage
@@ -434,7 +436,7 @@ class SpotBidPercentageCfnParam(IntCfnParam):
 
         cluster_config = self.pcluster_config.get_section(self.section_key)
         if cluster_config.get_param_value("scheduler") == "awsbatch":
-            cfn_params[self.definition.get("cfn_param_mapping")] = self.get_cfn_value()
+            cfn_params[self.schema.cfn_param_mapping] = self.get_cfn_value()
 
         return cfn_params
 
@@ -450,7 +452,7 @@ class QueueSizeCfnParam(IntCfnParam):
 
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input according to the scheduler."""
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter and cfn_params:
             cfn_value = get_cfn_param(cfn_params, cfn_converter) if cfn_converter else "NONE"
 
@@ -482,7 +484,7 @@ class QueueSizeCfnParam(IntCfnParam):
             and (self.key == "desired_vcpus" or self.key == "max_vcpus" or self.key == "min_vcpus")
         ):
             cfn_value = cluster_config.get_param_value(self.key)
-            cfn_params[self.definition.get("cfn_param_mapping")] = str(cfn_value)
+            cfn_params[self.schema.cfn_param_mapping] = str(cfn_value)
 
         return cfn_params
 
@@ -498,7 +500,7 @@ class MaintainInitialSizeCfnParam(BoolCfnParam):
 
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input."""
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter and cfn_params:
             # initialize the value from cfn only if the scheduler is a traditional one
             if get_cfn_param(cfn_params, "Scheduler") != "awsbatch":
@@ -517,7 +519,7 @@ class MaintainInitialSizeCfnParam(BoolCfnParam):
         if cluster_config.get_param_value("scheduler") != "awsbatch":
             cfn_value = cluster_config.get_param_value("maintain_initial_size")
             min_size_value = cluster_config.get_param_value("initial_queue_size") if cfn_value else "0"
-            cfn_params.update({self.definition.get("cfn_param_mapping"): str(min_size_value)})
+            cfn_params.update({self.schema.cfn_param_mapping: str(min_size_value)})
 
         return cfn_params
 
@@ -533,6 +535,8 @@ class AdditionalIamPoliciesCfnParam(CommaSeparatedCfnParam):
       during CFN conversion.
     """
 
+    refresh_dependencies = (("cluster", "scheduler"), ("cluster", "cw_log_settings"), ("cw_log", "enable"))
+
     policy_inclusion_rules = [CloudWatchAgentServerPolicyInclusionRule, AWSBatchFullAccessInclusionRule]
 
     def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
@@ -634,7 +638,7 @@ class DisableHyperThreadingCfnParam(BoolCfnParam):
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input."""
         try:
-            cfn_converter = self.definition.get("cfn_param_mapping", None)
+            cfn_converter = self.schema.cfn_param_mapping
             if cfn_converter and cfn_params:
                 cores = get_cfn_param(cfn_params, cfn_converter)
                 if cores and not cores.startswith("NONE,NONE"):
@@ -670,7 +674,7 @@ class DisableHyperThreadingCfnParam(BoolCfnParam):
 
         :return: string (head_node_cores,compute_cores,head_node_supports_cpu_options,compute_supports_cpu_options)
         """
-        cfn_params = {self.definition.get("cfn_param_mapping"): "NONE,NONE,NONE,NONE"}
+        cfn_params = {self.schema.cfn_param_mapping: "NONE,NONE,NONE,NONE"}
         cluster_config = self.pcluster_config.get_section(self.section_key)
         if self.value:
             head_node_instance_type = cluster_config.get_param_value("master_instance_type")
@@ -703,7 +707,7 @@ class DisableHyperThreadingCfnParam(BoolCfnParam):
                     )
             cfn_params.update(
                 {
-                    self.definition.get("cfn_param_mapping"): "{0},{1},{2},{3}".format(
+                    self.schema.cfn_param_mapping: "{0},{1},{2},{3}".format(
                         head_node_cores,
                         compute_cores,
                         str(disable_head_node_ht_via_cpu_options).lower(),
@@ -723,6 +727,8 @@ class ClusterConfigMetadataCfnParam(JsonCfnParam):
     labels and their corresponding CloudFormation resources.
     """
 
+    refresh_dependencies = None  # Section labels are collected from all the sections
+
     def _from_definition(self):
         self.value = self.get_default_value()
         self.__section_resources = ResourceMap(self.value.get("sections"))
@@ -751,7 +757,7 @@ class ClusterConfigMetadataCfnParam(JsonCfnParam):
 
     def get_default_value(self):
         """Get default value from the Param definition."""
-        return self.definition.get("default", {"sections": {}})
+        return self.schema.get_default({"sections": {}})
 
     def refresh(self):
         """
@@ -797,6 +803,8 @@ class BaseOSCfnParam(CfnParam):
     We need this class in order to initialize the private architecture param.
     """
 
+    refresh_dependencies = (("cluster", "master_instance_type"),)
+
     @staticmethod
     def get_instance_type_architecture(instance_type):
         """Compute cluster's 'Architecture' CFN parameter based on its head node instance type."""
@@ -834,7 +842,7 @@ class ArgsCfnParam(CfnParam):
 
         :param cfn_params: list of all the CFN parameters, used if "cfn_param_mapping" is specified in the definition
         """
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_params:
             cfn_value = get_cfn_param(cfn_params, cfn_converter) if cfn_converter else "NONE"
             self.value = self.get_value_from_string(json.loads('"' + cfn_value + '"'))
@@ -844,7 +852,7 @@ class ArgsCfnParam(CfnParam):
     def to_cfn(self):
         """Convert param to CFN representation, if "cfn_param_mapping" attribute is present in the Param definition."""
         cfn_params = {}
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
 
         if cfn_converter:
             cfn_value = self.get_cfn_value()
@@ -862,6 +870,8 @@ class ComputeInstanceTypeCfnParam(CfnParam):
     We need this class in order to set the default instance type from a boto3 call.
     """
 
+    refresh_dependencies = (("cluster", "scheduler"),)
+
     def refresh(self):
         """Get default value from a boto3 call for free tier instance type."""
         if not self.value:
@@ -877,6 +887,8 @@ class HeadNodeInstanceTypeCfnParam(CfnParam):
     We need this class in order to set the default instance type from a boto3 call.
     """
 
+    refresh_dependencies = ()
+
     def refresh(self):
         """Get default value from a boto3 call for free tier instance type."""
         if not self.value:
@@ -931,7 +943,7 @@ class SettingsCfnParam(SettingsParam):
         """Convert the referred section to CFN representation."""
         section_labels = self.get_metadata_labels()
 
-        if self.referred_section_definition.get("max_resources", 1) > 1:
+        if self.referred_section_schema.max_resources > 1:
             # Multiple section
             for section_label in [section_label for section_label in section_labels if section_label is not None]:
                 section = self.pcluster_config.get_section(self.referred_section_key, section_label.strip())
@@ -970,7 +982,7 @@ class SettingsCfnParam(SettingsParam):
         #      contain all default parameter values)
         #   2) in unit tests that build the configuration on the fly
         if not section_labels:
-            max_resources = int(self.referred_section_definition.get("max_resources", "1"))
+            max_resources = self.referred_section_schema.max_resources
             section_labels = metadata.create_section_resources(
                 self.referred_section_key, expected_num_labels, max_resources
             )
@@ -1003,22 +1015,22 @@ class EBSSettingsCfnParam(SettingsCfnParam):
                 labels = self.get_metadata_labels(expected_num_labels=num_of_ebs, include_none_values=False)
                 for index in range(len(labels)):
                     # create empty section
-                    referred_section_type = self.referred_section_definition.get("type", CfnSection)
+                    referred_section_type = self.referred_section_schema.type or CfnSection
                     referred_section = referred_section_type(
                         self.referred_section_definition, self.pcluster_config, labels[index]
                     )
 
-                    for param_key, param_definition in self.referred_section_definition.get("params").items():
-                        cfn_converter = param_definition.get("cfn_param_mapping", None)
+                    for param_key, param_schema in self.referred_section_schema.params.items():
+                        cfn_converter = param_schema.cfn_param_mapping
                         if cfn_converter:
 
-                            param_type = param_definition.get("type", CfnParam)
+                            param_type = param_schema.type or CfnParam
                             cfn_value = get_cfn_param(cfn_params, cfn_converter).split(",")[index]
                             param = param_type(
                                 referred_section.key,
                                 referred_section.label,
                                 param_key,
-                                param_definition,
+                                param_schema.definition,
                                 self.pcluster_config,
                             ).from_cfn_value(
                                 None
@@ -1067,7 +1079,7 @@ class EBSSettingsCfnParam(SettingsCfnParam):
 
         cfn_params = storage_params.cfn_params
         number_of_ebs_sections = len(sections)
-        for param_key, param_definition in self.referred_section_definition.get("params").items():
+        for param_key, param_schema in self.referred_section_schema.params.items():
             if param_key == "shared_dir":
                 # The same CFN parameter is used for both single and multiple EBS cases
                 # if there are no EBS volumes, or if user does not specify shared_dir when using 1 EBS volume
@@ -1077,7 +1089,7 @@ class EBSSettingsCfnParam(SettingsCfnParam):
                 ):
                     continue
 
-            cfn_converter = param_definition.get("cfn_param_mapping", None)
+            cfn_converter = param_schema.cfn_param_mapping
             if cfn_converter:
 
                 cfn_value_list = []
@@ -1087,9 +1099,13 @@ class EBSSettingsCfnParam(SettingsCfnParam):
                         param = section.get_param(param_key)
                     else:
                         # Create a default param
-                        param_type = param_definition.get("type", CfnParam)
+                        param_type = param_schema.type or CfnParam
                         param = param_type(
-                            self.referred_section_key, "default", param_key, param_definition, self.pcluster_config
+                            self.referred_section_key,
+                            "default",
+                            param_key,
+                            param_schema.definition,
+                            self.pcluster_config,
                         )
                     cfn_value_list.append(param.to_cfn().get(cfn_converter))
 
@@ -1109,6 +1125,12 @@ class NetworkInterfacesCountCfnParam(CommaSeparatedCfnParam):
     on head node and compute nodes.
     """
 
+    refresh_dependencies = (
+        ("cluster", "scheduler"),
+        ("cluster", "master_instance_type"),
+        ("cluster", "compute_instance_type"),
+    )
+
     def refresh(self):
         """Compute the number of network interfaces for head node and compute nodes."""
         cluster_section = self.pcluster_config.get_section("cluster")
@@ -1136,13 +1158,14 @@ class CfnSection(Section):
 
     def from_storage(self, storage_params):
         """Initialize section configuration parameters by parsing CFN parameters."""
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        self._skip_default_params()
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter:
             # It is a section converted to a single CFN parameter
             cfn_values = get_cfn_param(storage_params.cfn_params, cfn_converter).split(",")
 
             cfn_param_index = 0
-            for param_key, param_definition in self.definition.get("params").items():
+            for param_key, param_schema in self.schema.params.items():
                 try:
                     cfn_value = cfn_values[cfn_param_index]
                 except IndexError:
@@ -1150,18 +1173,18 @@ class CfnSection(Section):
                     # so it is set to a single NONE value
                     cfn_value = "NONE"
 
-                param_type = param_definition.get("type", CfnParam)
+                param_type = param_schema.type or CfnParam
                 param = param_type(
-                    self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+                    self.key, self.label, param_key, param_schema.definition, self.pcluster_config, owner_section=self
                 ).from_cfn_value(cfn_value)
 
                 self.add_param(param)
                 cfn_param_index += 1
         else:
-            for param_key, param_definition in self.definition.get("params").items():
-                param_type = param_definition.get("type", CfnParam)
+            for param_key, param_schema in self.schema.params.items():
+                param_type = param_schema.type or CfnParam
                 param = param_type(
-                    self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+                    self.key, self.label, param_key, param_schema.definition, self.pcluster_config, owner_section=self
                 ).from_storage(storage_params)
                 self.add_param(param)
 
@@ -1177,34 +1200,34 @@ class CfnSection(Section):
         if not storage_params:
             storage_params = StorageData({}, {})
 
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
         if cfn_converter:
             # it is a section converted to a single CFN parameter
             cfn_items = []
-            for param_key, param_definition in self.definition.get("params").items():
+            for param_key, param_schema in self.schema.params.items():
                 param = self.get_param(param_key)
                 if param:
                     cfn_items.append(param.get_cfn_value())
                 else:
-                    param_type = param_definition.get("type", CfnParam)
-                    param = param_type(self.key, self.label, param_key, param_definition, self.pcluster_config)
+                    param_type = param_schema.type or CfnParam
+                    param = param_type(self.key, self.label, param_key, param_schema.definition, self.pcluster_config)
                     cfn_items.append(param.get_cfn_value())
 
             if cfn_items[0] == "NONE":
                 # empty dict or first item is NONE --> set all values to NONE
-                cfn_items = ["NONE"] * len(self.definition.get("params"))
+                cfn_items = ["NONE"] * len(self.schema.params)
 
             storage_params.cfn_params[cfn_converter] = ",".join(cfn_items)
         else:
             # get value from config object
-            for param_key, param_definition in self.definition.get("params").items():
+            for param_key, param_schema in self.schema.params.items():
                 param = self.get_param(param_key)
                 if param:
                     param.to_storage(storage_params)
                 else:
                     # set CFN value from a default param
-                    param_type = param_definition.get("type", Param)
-                    param = param_type(self.key, self.label, param_key, param_definition, self.pcluster_config)
+                    param_type = param_schema.type or Param
+                    param = param_type(self.key, self.label, param_key, param_schema.definition, self.pcluster_config)
                     param.to_storage(storage_params)
 
         return storage_params
@@ -1232,16 +1255,16 @@ class EFSCfnSection(CfnSection):
         if not storage_params:
             storage_params = StorageData({}, {})
         cfn_params = storage_params.cfn_params
-        cfn_converter = self.definition.get("cfn_param_mapping", None)
+        cfn_converter = self.schema.cfn_param_mapping
 
         cfn_items = []
-        for param_key, param_definition in self.definition.get("params").items():
+        for param_key, param_schema in self.schema.params.items():
             param = self.get_param(param_key)
             if param:
                 cfn_items.append(param.get_cfn_value())
             else:
-                param_type = param_definition.get("type", CfnParam)
-                param = param_type(self.key, self.label, param_key, param_definition, self.pcluster_config)
+                param_type = param_schema.type or CfnParam
+                param = param_type(self.key, self.label, param_key, param_schema.definition, self.pcluster_config)
                 cfn_items.append(param.get_cfn_value())
 
         if cfn_items[0] == "NONE":
@@ -1250,7 +1273,7 @@ class EFSCfnSection(CfnSection):
             head_node_avail_zone = "fake_az1"
             compute_avail_zone = "fake_az2"
             # empty dict or first item is NONE --> set all values to NONE
-            cfn_items = ["NONE"] * len(self.definition.get("params"))
+            cfn_items = ["NONE"] * len(self.schema.params)
         else:
             # add another CFN param that will identify if create or not a Mount Target for the given EFS FS Id
             head_node_avail_zone = self.pcluster_config.get_head_node_availability_zone()
@@ -1303,6 +1326,8 @@ class ClusterCfnSection(CfnSection):
 class VolumeSizeParam(IntCfnParam):
     """Class to manage ebs volume_size parameter."""
 
+    refresh_dependencies = ()
+
     def refresh(self):
         """
         We need this method to check whether the user have an input on ebs volume_size.
@@ -1324,6 +1349,8 @@ class VolumeSizeParam(IntCfnParam):
 class VolumeIopsParam(IntCfnParam):
     """Class to manage ebs volume_iops parameter in the EBS section."""
 
+    refresh_dependencies = ()
+
     EBS_VOLUME_TYPE_IOPS_DEFAULT = {
         "io1": 100,
         "io2": 100,
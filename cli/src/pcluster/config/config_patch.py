@@ -61,6 +61,11 @@ class ConfigPatch(object):
         # Cached condition results
         self.condition_results = {}
 
+        # Fingerprints are memoized in the sections, computing them on the original configurations allows the copies
+        # and the next patches created from the same configurations to reuse them
+        self._compute_fingerprints(base_config)
+        self._compute_fingerprints(target_config)
+
         # Make a deep copy of the basic and target configurations to avoid changing the original ones
         self.base_config = copy.deepcopy(base_config)
         self.target_config = copy.deepcopy(target_config)
@@ -70,6 +75,7 @@ class ConfigPatch(object):
         self.target_config.auto_refresh = False
 
         self.changes = []
+        self._check_results = None
         self._compare()
 
     @property
@@ -128,6 +134,10 @@ class ConfigPatch(object):
         mock_target_section = hasattr(target_section, "mock")
         mock_change = mock_base_section or mock_target_section
 
+        # Sections with the same fingerprint have the same params and values, so they have no changes
+        if base_section.get_fingerprint() == target_section.get_fingerprint():
+            return
+
         for _, param in target_section.params.items():
             base_value = base_section.get_param_value(param.key)
 
@@ -151,6 +161,12 @@ class ConfigPatch(object):
                     )
                 )
 
+    def _compute_fingerprints(self, config):
+        # global file sections are ignored for patch creation
+        for section_key in config.get_section_keys():
+            for section in config.get_sections(section_key).values():
+                section.get_fingerprint()
+
     def _remove_ignored_sections(self, config):
         # global file sections are ignored for patch creation
         for section_key in config.get_global_section_keys():
@@ -222,26 +238,69 @@ class ConfigPatch(object):
         """
         rows = [["section", "parameter", "old value", "new value", "check", "reason", "action_needed"]]
 
-        patch_allowed = True
-
-        for change in self.changes:
-            check_result, reason, action_needed, print_change = change.update_policy.check(change, self)
-
-            if check_result != UpdatePolicy.CheckResult.SUCCEEDED:
-                patch_allowed = False
-
-            if print_change:
-                section_name = get_file_section_name(change.section_key, change.section_label)
-                rows.append(
-                    [
-                        section_name,
-                        change.param_key,
-                        change.old_value,
-                        change.new_value,
-                        check_result.value,
-                        reason,
-                        action_needed,
-                    ]
-                )
+        patch_allowed, check_results = self._check_changes()
+        for change, check_result, reason, action_needed in check_results:
+            section_name = get_file_section_name(change.section_key, change.section_label)
+            rows.append(
+                [
+                    section_name,
+                    change.param_key,
+                    change.old_value,
+                    change.new_value,
+                    check_result.value,
+                    reason,
+                    action_needed,
+                ]
+            )
 
         return patch_allowed, rows
+
+    def get_change_set(self):
+        """
+        Check the patch against the existing cluster stack and return the changes in a JSON serializable format.
+
+        The change set contains the same changes of the report returned by check(), with the update policy of each one.
+
+        :return A dict containing the patch applicability and the list of the checked changes.
+        """
+        patch_allowed, check_results = self._check_changes()
+        return {
+            "cluster_name": self.cluster_name,
+            "config_file": self.config_file,
+            "patch_allowed": patch_allowed,
+            "changes": [
+                {
+                    "section": get_file_section_name(change.section_key, change.section_label),
+                    "parameter": change.param_key,
+                    "old_value": change.old_value,
+                    "new_value": change.new_value,
+                    "update_policy": change.update_policy.name,
+                    "check": check_result.value,
+                    "reason": reason,
+                    "action_needed": action_needed,
+                }
+                for change, check_result, reason, action_needed in check_results
+            ],
+        }
+
+    def _check_changes(self):
+        """
+        Check all the changes of the patch, only the first time the method is called.
+
+        :return A tuple containing the patch applicability and the check results of the changes to report, as
+                (change, check_result, reason, action_needed) tuples.
+        """
+        if self._check_results is None:
+            patch_allowed = True
+            check_results = []
+            for change in self.changes:
+                check_result, reason, action_needed, print_change = change.update_policy.check(change, self)
+
+                if check_result != UpdatePolicy.CheckResult.SUCCEEDED:
+                    patch_allowed = False
+
+                if print_change:
+                    check_results.append((change, check_result, reason, action_needed))
+            self._check_results = (patch_allowed, check_results)
+
+        return self._check_results
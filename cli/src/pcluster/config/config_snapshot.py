@@ -0,0 +1,109 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from pcluster.metadata_cache import CacheSizeLimit, MetadataCache, _replace, get_cache_dir
+from pcluster.utils import get_installed_version
+
+LOGGER = logging.getLogger(__name__)
+
+# Options never stored in a snapshot: configuration files containing them are always parsed
+SECRET_OPTIONS = [("aws", "aws_access_key_id"), ("aws", "aws_secret_access_key")]
+# Maximum size of the stored snapshots, least recently written snapshots are evicted when exceeded
+SNAPSHOTS_CACHE_LIMIT = CacheSizeLimit(["config_snapshots"], 10 * 1024 * 1024)
+
+
+def _get_snapshot_path(config_file):
+    """Return the path of the snapshot of the given file, one for every configuration file."""
+    file_name = hashlib.sha256(os.path.abspath(config_file).encode("utf-8")).hexdigest() + ".json"
+    return os.path.join(get_cache_dir(), "config_snapshots", file_name)
+
+
+def get_snapshot_key(config_file):
+    """Return the key identifying the content of the configuration file for the installed CLI version."""
+    try:
+        with open(config_file, "rb") as config_file_stream:
+            file_hash = hashlib.sha256(config_file_stream.read()).hexdigest()
+    except (IOError, OSError) as e:
+        LOGGER.debug("Unable to read configuration file %s: %s", config_file, e)
+        return None
+    return "{0}:{1}".format(get_installed_version(), file_hash)
+
+
+def load_snapshot(config_file):
+    """
+    Return the sections stored in the snapshot of the given configuration file, None if missing or not up to date.
+
+    :param config_file: the path of the configuration file
+    :return: a dict with the options of the stored sections, by file section name
+    """
+    snapshot_key = get_snapshot_key(config_file) if MetadataCache.is_enabled() else None
+    if not snapshot_key:
+        return None
+    snapshot_path = _get_snapshot_path(config_file)
+    try:
+        with open(snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        if snapshot.get("key") == snapshot_key:
+            LOGGER.debug("Loading configuration file %s from snapshot %s", config_file, snapshot_path)
+            return snapshot.get("sections")
+        LOGGER.debug("Snapshot %s is not up to date", snapshot_path)
+    except (IOError, OSError) as e:
+        if e.errno != errno.ENOENT:
+            LOGGER.debug("Unable to read snapshot %s: %s", snapshot_path, e)
+    except ValueError as e:
+        LOGGER.debug("Corrupted snapshot %s: %s", snapshot_path, e)
+    return None
+
+
+def store_snapshot(config_file, config_parser, section_names):
+    """
+    Store the options of the given sections of the parsed configuration file in its snapshot.
+
+    Nothing is stored if any of the sections contains AWS credentials.
+
+    :param config_file: the path of the configuration file
+    :param config_parser: the configparser object with the parsed file
+    :param section_names: the names of the sections to store, as in the configuration file
+    """
+    snapshot_key = get_snapshot_key(config_file) if MetadataCache.is_enabled() else None
+    if not snapshot_key:
+        return
+    if any(config_parser.has_option(section_name, option) for section_name, option in SECRET_OPTIONS):
+        LOGGER.debug("Configuration file %s contains AWS credentials, skipping snapshot", config_file)
+        return
+    sections = {
+        section_name: dict(config_parser.items(section_name, raw=True))
+        for section_name in section_names
+        if config_parser.has_section(section_name)
+    }
+    snapshot_path = _get_snapshot_path(config_file)
+    try:
+        snapshot_dir = os.path.dirname(snapshot_path)
+        if not os.path.isdir(snapshot_dir):
+            os.makedirs(snapshot_dir)
+        # Write to a temporary file in the same directory and then rename it, to never expose partial snapshots
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump({"key": snapshot_key, "sections": sections}, tmp_file)
+            _replace(tmp_path, snapshot_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        SNAPSHOTS_CACHE_LIMIT.add(os.path.getsize(snapshot_path))
+    except (IOError, OSError, TypeError, ValueError) as e:
+        LOGGER.debug("Unable to write snapshot %s: %s", snapshot_path, e)
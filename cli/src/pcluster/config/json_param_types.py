@@ -8,10 +8,11 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
 from collections import OrderedDict
 
 from pcluster import utils
-from pcluster.config.param_types import Param, Section, SettingsParam
+from pcluster.config.param_types import Param, Section, SettingsParam, refresh_required
 
 # ---------------------- Params ---------------------- #
 
@@ -103,6 +104,8 @@ class FloatJsonParam(JsonParam):
 class ScaleDownIdleTimeJsonParam(JsonParam):
     """JsonParam to manage scaledown_idletime for Json configuration."""
 
+    refresh_dependencies = ()
+
     def refresh(self):
         """Take the value from the scaledown_idletime cfn parameter."""
         self.value = self.owner_section.get_param("scaledown_idletime").value
@@ -115,6 +118,8 @@ class ScaleDownIdleTimeJsonParam(JsonParam):
 class DefaultComputeQueueJsonParam(JsonParam):
     """JsonParam to manage default_queue parameter in cluster section."""
 
+    refresh_dependencies = (("cluster", "queue_settings"),)
+
     def refresh(self):
         """Take the label of the first queue as value."""
         queue_settings_param = self.pcluster_config.get_section("cluster").get_param("queue_settings")
@@ -183,7 +188,7 @@ class SettingsJsonParam(SettingsParam):
         json_subdict = _get_storage_subdict(self, json_params)
         labels = None
         if json_subdict:
-            if self.referred_section_definition.get("max_resources", 1) > 1:
+            if self.referred_section_schema.max_resources > 1:
                 # Multiple sections: the dict is under <section_key>_settings
                 json_subdict = json_subdict.get(self.key)
                 if json_subdict:
@@ -212,19 +217,23 @@ class SettingsJsonParam(SettingsParam):
 class JsonSection(Section):
     """Class representing configuration sections which are persisted in Json."""
 
+    # The (section_key, param_key) pairs read by refresh_section()
+    refresh_dependencies = ()
+
     def from_storage(self, storage_params):
         """Load the section from storage params."""
-        for param_key, param_definition in self.definition.get("params").items():
-            param_type = param_definition.get("type", Param)
+        self._skip_default_params()
+        for param_key, param_schema in self.schema.params.items():
+            param_type = param_schema.type or Param
             param = param_type(
-                self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+                self.key, self.label, param_key, param_schema.definition, self.pcluster_config, owner_section=self
             ).from_storage(storage_params)
             self.add_param(param)
         return self
 
     def to_storage(self, storage_params):
         """Write the section into storage params."""
-        for param_key, _ in self.definition.get("params").items():
+        for param_key in self.schema.params:
             param = self.get_param(param_key)
             if param:
                 param.to_storage(storage_params)
@@ -237,10 +246,21 @@ class JsonSection(Section):
         """Get the default Param type managed by the Section type."""
         return JsonParam
 
-    def refresh(self):
+    def refresh(self, changes=None):
         """Refresh the Json section."""
-        self.refresh_section()
-        super(JsonSection, self).refresh()
+        modified_params = set()
+        if changes is None:
+            self.refresh_section()
+        elif refresh_required(self.refresh_dependencies, changes):
+            old_values = {param_key: copy.deepcopy(param.value) for param_key, param in self.params.items()}
+            self.refresh_section()
+            modified_params.update(
+                (self.key, param_key)
+                for param_key, param in self.params.items()
+                if param.value != old_values[param_key]
+            )
+        modified_params.update(super(JsonSection, self).refresh(changes))
+        return modified_params
 
     def refresh_section(self):
         """Perform custom refresh operations."""
@@ -250,6 +270,14 @@ class JsonSection(Section):
 class QueueJsonSection(JsonSection):
     """JSon Section for queues."""
 
+    refresh_dependencies = (
+        ("cluster", "disable_hyperthreading"),
+        ("cluster", "enable_efa"),
+        ("cluster", "enable_efa_gdr"),
+        ("queue", "compute_resource_settings"),
+        ("compute_resource", "instance_type"),
+    )
+
     def refresh_section(self):
         """Take values of disable_hyperthreading and enable_efa from cluster section if not specified."""
         if self.get_param_value("disable_hyperthreading") is None:
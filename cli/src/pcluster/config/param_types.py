@@ -9,16 +9,20 @@
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
 import abc
+import copy
+import functools
+import hashlib
 import logging
 import re
 import sys
 from abc import abstractmethod
 from collections import OrderedDict
-from enum import Enum
 
 from configparser import NoSectionError
 
+from pcluster.config.schema import Visibility, get_param_schema, get_section_schema  # noqa: F401
 from pcluster.config.update_policy import UpdatePolicy
+from pcluster.config.validation_engine import ValidationEngine, ValidationTask
 from pcluster.config.validators import settings_validator
 from pcluster.utils import get_file_section_name
 
@@ -30,6 +34,26 @@ else:
     ABC = abc.ABCMeta("ABC", (), {})
 
 
+def refresh_required(dependencies, changes):
+    """
+    Tell if a refresh function must be executed after the given configuration changes.
+
+    Both dependencies and changes are (section_key, param_key) pairs. A change with param_key None means that sections
+    with the given key have been added, removed or relabelled, and it affects all the dependencies on that section key.
+    A dependency with param_key None only refers to the structure of the sections with the given key.
+
+    :param dependencies: the params read by the refresh function, None if the function can be affected by any change
+    :param changes: the changed params and sections
+    """
+    if dependencies is None:
+        return bool(changes)
+    return any(
+        dependency_section_key == section_key and (param_key is None or dependency_param_key == param_key)
+        for dependency_section_key, dependency_param_key in dependencies
+        for section_key, param_key in changes
+    )
+
+
 # ---------------------- StorageData ---------------------- #
 class StorageData:
     """Class containing storage data for configuration persistence mechanisms, namely Cfn Params and Json."""
@@ -40,14 +64,6 @@ class StorageData:
         self.cfn_tags = cfn_tags if cfn_tags else {}
 
 
-# ---------------------- Visibility ---------------------- #
-class Visibility(Enum):
-    """Describes the visibility of a specific Param or Section."""
-
-    PRIVATE = "PRIVATE"  # Internally used, not allowed in config file
-    PUBLIC = "PUBLIC"  # Can be specified in config file
-
-
 # ---------------------- Param ---------------------- #
 class Param(ABC):
     """
@@ -55,20 +71,45 @@ class Param(ABC):
 
     Exposes the main interface to allow parameters to be loaded/written from configuration file and/or their specific
     data storage.
+
+    Subclasses overriding refresh() must declare the params it reads from other sections in refresh_dependencies, as
+    (section_key, param_key) pairs, so that the parameter is refreshed when any of them changes.
     """
 
+    refresh_dependencies = ()
+
     def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
         self.section_key = section_key
         self.section_label = section_label
         self.key = param_key
         self.definition = param_definition
+        self.schema = get_param_schema(param_definition)
         self.pcluster_config = pcluster_config
         self.owner_section = owner_section
+        self._section = None  # The section holding the param, set when the param is added to it
 
         # initialize parameter value by using default specified in the mappings file
         self.value = None
         self._from_definition()
 
+    @property
+    def value(self):
+        """Get the parameter value."""
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        """
+        Set the parameter value, invalidating the storage data and the section fingerprint memoized by the parents.
+
+        Values modified in place (e.g. dicts) must be assigned again to invalidate the memoized data.
+        """
+        self._value = value
+        if self._section is not None:
+            self._section._fingerprint = None
+        if self.pcluster_config is not None:
+            self.pcluster_config._mark_modified()
+
     def get_value_from_string(self, string_value):
         """Return internal representation starting from CFN/user-input value."""
         param_value = self.get_default_value()
@@ -131,7 +172,7 @@ class Param(ABC):
 
     def _check_allowed_values(self):
         """Verify if the parameter value is one of the allowed values specified in the mapping file."""
-        allowed_values = self.definition.get("allowed_values", None)
+        allowed_values = self.schema.allowed_values
         if allowed_values:
             if isinstance(allowed_values, list):
                 if self.value not in allowed_values:
@@ -140,8 +181,8 @@ class Param(ABC):
                         "Allowed values are: {2}".format(self.key, self.value, allowed_values)
                     )
             else:
-                # convert to regex
-                if not re.compile(allowed_values).match(str(self.value)):
+                # use the regex compiled in the schema
+                if not self.schema.allowed_values_regex.match(str(self.value)):
                     self.pcluster_config.error(
                         "The configuration parameter '{0}' has an invalid value '{1}'\n"
                         "Allowed values are: {2}".format(self.key, self.value, allowed_values)
@@ -149,28 +190,50 @@ class Param(ABC):
 
     def validate(self):
         """Call validation functions for the parameter, if there."""
-        if self.definition.get("required") and self.value is None:
-            sys.exit("Configuration parameter '{0}' must have a value".format(self.key))
+        ValidationEngine(serial=True).run(self.get_validation_tasks())
+
+    def get_validators(self):
+        """Return the validation functions of the parameter."""
+        return self.schema.validators
+
+    def get_validation_tasks(self):
+        """Return the validation tasks of the parameter, to be executed by the ValidationEngine."""
+        tasks = []
+        if self.schema.required and self.value is None:
+            tasks.append(
+                ValidationTask(
+                    report=lambda _: sys.exit("Configuration parameter '{0}' must have a value".format(self.key))
+                )
+            )
 
-        for validation_func in self.definition.get("validators", []):
+        for validation_func in self.get_validators():
             if self.value is None:
                 LOGGER.debug("Configuration parameter '%s' has no value", self.key)
             else:
-                errors, warnings = validation_func(self.key, self.value, self.pcluster_config)
-                if errors:
-                    self.pcluster_config.error(
-                        "The configuration parameter '{0}' generated the following errors:\n{1}".format(
-                            self.key, "\n".join(errors)
-                        )
-                    )
-                elif warnings:
-                    self.pcluster_config.warn(
-                        "The configuration parameter '{0}' generated the following warnings:\n{1}".format(
-                            self.key, "\n".join(warnings)
-                        )
+                tasks.append(
+                    ValidationTask(
+                        check=functools.partial(validation_func, self.key, self.value, self.pcluster_config),
+                        report=self._report_validation_result,
                     )
-                else:
-                    LOGGER.debug("Configuration parameter '%s' is valid", self.key)
+                )
+        return tasks
+
+    def _report_validation_result(self, result):
+        errors, warnings = result
+        if errors:
+            self.pcluster_config.error(
+                "The configuration parameter '{0}' generated the following errors:\n{1}".format(
+                    self.key, "\n".join(errors)
+                )
+            )
+        elif warnings:
+            self.pcluster_config.warn(
+                "The configuration parameter '{0}' generated the following warnings:\n{1}".format(
+                    self.key, "\n".join(warnings)
+                )
+            )
+        else:
+            LOGGER.debug("Configuration parameter '%s' is valid", self.key)
 
     def to_file(self, config_parser, write_defaults=False):
         """Set parameter in the config_parser in the right section."""
@@ -201,8 +264,8 @@ class Param(ABC):
         is contained within. Otherwise, pass the literal value, defaulting to
         None if not specified.
         """
-        default = self.definition.get("default", None)
-        if callable(default):
+        default = self.schema.default
+        if self.schema.default_is_function:
             # Assume that functions are used to set default values conditionally
             # based on the value of other parameters within the same section.
             # They are passed the Section object that they are a member of.
@@ -224,9 +287,13 @@ class Param(ABC):
         """
         pass
 
+    def get_refresh_dependencies(self):
+        """Return the (section_key, param_key) pairs the refresh() method depends on, None for any change."""
+        return self.refresh_dependencies
+
     def get_update_policy(self):
         """Get the update policy of the parameter."""
-        return self.definition.get("update_policy", UpdatePolicy.UNKNOWN)
+        return self.schema.update_policy or UpdatePolicy.UNKNOWN
 
     def __eq__(self, other):
         return other and (self.key == other.key) and self._value_eq(other)
@@ -235,7 +302,11 @@ class Param(ABC):
         return not self.__eq__(other)
 
     def _value_eq(self, other):
-        return self.value == other.value
+        return self.get_comparable_value() == other.get_comparable_value()
+
+    def get_comparable_value(self):
+        """Return the representation of the value used to compare the param with the ones of other configurations."""
+        return self.value
 
     def get_storage_key(self):
         """
@@ -259,9 +330,9 @@ class SettingsParam(Param):
     def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
         """Extend Param by adding info regarding the section referred by the settings."""
         self.referred_section_definition = param_definition.get("referred_section")
-        self.referred_section_key = self.referred_section_definition.get("key")
-        self.referred_section_type = self.referred_section_definition.get("type")
-        param_definition.get("validators", []).append(settings_validator)
+        self.referred_section_schema = get_section_schema(self.referred_section_definition)
+        self.referred_section_key = self.referred_section_schema.key
+        self.referred_section_type = self.referred_section_schema.type
         super(SettingsParam, self).__init__(
             section_key, section_label, param_key, param_definition, pcluster_config, owner_section
         )
@@ -273,7 +344,7 @@ class SettingsParam(Param):
         If the referred section has the "autocreate" attribute, it means that it is required to initialize
         the settings param and the related section with default values (i.e. vpc, scaling).
         """
-        return "default" if self.referred_section_definition.get("autocreate", False) else None
+        return "default" if self.referred_section_schema.autocreate else None
 
     def _from_definition(self):
         self.value = self.get_default_value()
@@ -323,9 +394,14 @@ class SettingsParam(Param):
 
         return self
 
-    def validate(self):
+    def get_validators(self):
+        """Add the validation of the section labels to the validators declared in the definition, if any."""
+        validators = self.schema.validators
+        return validators + (settings_validator,) if "validators" in self.definition else validators
+
+    def get_validation_tasks(self):
         """
-        Validate the Settings Parameter.
+        Return the validation tasks of the Settings Parameter.
 
         Overrides the default params validation mechanism by adding a default validation based on the number of expected
         sections. The implementation takes into account nested settings params so that the number of resources is
@@ -334,26 +410,27 @@ class SettingsParam(Param):
         section).
         """
         labels = None if not self.value else self.value.split(",")  # Section labels in the settings param
-        max_resources = self.referred_section_definition.get("max_resources", 1)  # Max resources per parent section
+        max_resources = self.referred_section_schema.max_resources  # Max resources per parent section
 
+        tasks = []
         if labels and len(labels) > max_resources:
-            self.pcluster_config.error(
-                "Invalid number of '{0}' sections specified. Max {1} expected.".format(
-                    self.referred_section_key, max_resources
+            tasks.append(
+                ValidationTask(
+                    report=lambda _: self.pcluster_config.error(
+                        "Invalid number of '{0}' sections specified. Max {1} expected.".format(
+                            self.referred_section_key, max_resources
+                        )
+                    )
                 )
             )
 
-        super(SettingsParam, self).validate()
+        return tasks + super(SettingsParam, self).get_validation_tasks()
 
-    def _value_eq(self, other):
-        """Compare settings labels ignoring positions and extra spaces."""
-        value1 = self.value
-        value2 = other.value if other else None
-        if value1:
-            value1 = ",".join(sorted([x.strip() for x in value1.split(",")]))
-        if value2:
-            value2 = ",".join(sorted([x.strip() for x in value2.split(",")]))
-        return value1 == value2
+    def get_comparable_value(self):
+        """Return the settings labels ignoring positions and extra spaces."""
+        if self.value:
+            return ",".join(sorted([x.strip() for x in self.value.split(",")]))
+        return self.value
 
     def _replace_default_section(self, section):
         """
@@ -365,12 +442,12 @@ class SettingsParam(Param):
         one.
         """
         self.pcluster_config.remove_section(
-            self.referred_section_key, self.referred_section_definition.get("default_label")
+            self.referred_section_key, self.referred_section_schema.default_label or None
         )
         self.pcluster_config.add_section(section)
 
     def _add_sections(self, sections):
-        if self.referred_section_definition.get("max_resources", 1) == 1:
+        if self.referred_section_schema.max_resources == 1:
             # Single section management
             if len(sections) > 1:
                 self.pcluster_config.error(
@@ -399,6 +476,10 @@ class SettingsParam(Param):
 
         self.value = ",".join(sorted(sections_labels)) if sections_labels else None
 
+    def get_refresh_dependencies(self):
+        """Refresh the settings when the referred sections are added, removed or relabelled."""
+        return [(self.referred_section_key, None)]
+
     def to_file(self, config_parser, write_defaults=False):
         """Convert the param value into a section in the config_parser and initialize it."""
         section = self.pcluster_config.get_section(self.referred_section_key, self.value)
@@ -406,12 +487,12 @@ class SettingsParam(Param):
             # evaluate all the parameters of the section and
             # add "*_settings = *" to the parent section
             # only if at least one parameter value is different from the default
-            for param_key, param_definition in self.referred_section_definition.get("params").items():
+            for param_key, param_schema in self.referred_section_schema.params.items():
                 param_value = section.get_param_value(param_key)
 
                 section_name = get_file_section_name(self.section_key, self.section_label)
                 if not config_parser.has_option(section_name, self.key) and (
-                    write_defaults or (param_value != param_definition.get("default", None))
+                    write_defaults or (param_value != param_schema.default)
                 ):
                     _ensure_section_existence(config_parser, section_name)
                     config_parser.set(section_name, self.key, self.get_string_value())
@@ -431,19 +512,40 @@ class Section(ABC):
 
     def __init__(self, section_definition, pcluster_config, section_label=None, parent_section=None):
         self.definition = section_definition
-        self.key = section_definition.get("key")
-        self.autocreate = section_definition.get("autocreate", False)
-        self._label = section_label or self.definition.get("default_label", "")
+        self.schema = get_section_schema(section_definition)
+        self.key = self.schema.key
+        self.autocreate = self.schema.autocreate
+        self._label = section_label or self.schema.default_label
         # All sections have only 1 resource by default, which means they refer to a single Cfn resource or set
         # of resources
-        self.max_resources = int(section_definition.get("max_resources", "1"))
+        self.max_resources = self.schema.max_resources
         self.pcluster_config = pcluster_config
 
         self.parent_section = parent_section
+        self._fingerprint = None  # Computed at the first get_fingerprint() call after a change of the params
+
+        # Section parameters are initialized with default values at the first access, unless all of them are loaded from
+        # file or storage before. Settings params are initialized immediately since they create the referred sections.
+        self._params = None
+        default_param_type = self.get_default_param_type()
+        if any(
+            issubclass(param_schema.type or default_param_type, SettingsParam)
+            for param_schema in self.schema.params.values()
+        ):
+            self._from_definition()
 
-        # initialize section parameters with default values
-        self.params = OrderedDict({})
-        self._from_definition()
+    @property
+    def params(self):
+        """Return the parameters of the section, initializing them with default values at the first access."""
+        if self._params is None:
+            self._params = OrderedDict({})
+            self._from_definition()
+        return self._params
+
+    def _skip_default_params(self):
+        """Skip the initialization of the params with default values, since all of them are going to be loaded."""
+        if self._params is None:
+            self._params = OrderedDict({})
 
     @property
     def label(self):
@@ -454,31 +556,25 @@ class Section(ABC):
     def label(self, label):
         """Set the section label. Marks the PclusterConfig parent for refreshing if called."""
         self._label = label
-        self.pcluster_config._config_updated()
+        self.pcluster_config._config_updated([self.key])
 
     def from_file(self, config_parser, fail_on_absence=False):
         """Initialize section configuration parameters by parsing config file."""
-        params_definitions = self.definition.get("params")
         section_name = get_file_section_name(self.key, self.label)
 
         # Only params with PUBLIC visibility can be specified in config file
-        public_param_keys = set(
-            [
-                key
-                for key, definition in params_definitions.items()
-                if definition.get("visibility", Visibility.PUBLIC) == Visibility.PUBLIC
-            ]
-        )
+        public_param_keys = self.schema.public_param_keys
 
         if config_parser.has_section(section_name):
-            for param_key, param_definition in params_definitions.items():
-                param_type = param_definition.get("type", self.get_default_param_type())
+            self._skip_default_params()
+            for param_key, param_schema in self.schema.params.items():
+                param_type = param_schema.type or self.get_default_param_type()
 
                 param = param_type(
                     self.key,
                     self.label,
                     param_key,
-                    param_definition,
+                    param_schema.definition,
                     pcluster_config=self.pcluster_config,
                     owner_section=self,
                 ).from_file(config_parser)
@@ -501,59 +597,70 @@ class Section(ABC):
 
     def _from_definition(self):
         """Initialize parameters with default values."""
-        for param_key, param_definition in self.definition.get("params").items():
-            param_type = param_definition.get("type", self.get_default_param_type())
+        default_param_type = self.get_default_param_type()
+        for param_key, param_schema in self.schema.params.items():
+            param_type = param_schema.type or default_param_type
             param = param_type(
-                self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+                self.key, self.label, param_key, param_schema.definition, self.pcluster_config, owner_section=self
             )
             self.add_param(param)
 
     def validate(self):
         """Call the validator function of the section and of all the parameters."""
+        ValidationEngine(serial=True).run(self.get_validation_tasks())
+
+    def get_validation_tasks(self):
+        """Return the validation tasks of the section and of all its parameters, in validation order."""
+        tasks = []
         if self.params:
             section_name = get_file_section_name(self.key, self.label)
-            LOGGER.debug("Validating section '[%s]'...", section_name)
+            LOGGER.debug("Collecting validators of section '[%s]'...", section_name)
 
             # validate section
-            for validation_func in self.definition.get("validators", []):
-                errors, warnings = validation_func(self.key, self.label, self.pcluster_config)
-                if errors:
-                    self.pcluster_config.error(
-                        "The section [{0}] is wrongly configured\n" "{1}".format(section_name, "\n".join(errors))
-                    )
-                elif warnings:
-                    self.pcluster_config.warn(
-                        "The section [{0}] is wrongly configured\n{1}".format(section_name, "\n".join(warnings))
+            for validation_func in self.schema.validators:
+                tasks.append(
+                    ValidationTask(
+                        check=functools.partial(validation_func, self.key, self.label, self.pcluster_config),
+                        report=functools.partial(self._report_validation_result, section_name),
                     )
-                else:
-                    LOGGER.debug("Section '[%s]' is valid", section_name)
+                )
 
             # validate items
-            LOGGER.debug("Validating parameters of section '[%s]'...", section_name)
-            for param_key, param_definition in self.definition.get("params").items():
-                param_type = param_definition.get("type", self.get_default_param_type())
-
+            for param_key, param_schema in self.schema.params.items():
                 param = self.get_param(param_key)
-                if param:
-                    param.validate()
-                else:
+                if not param:
                     # define a default param and validate it
-                    param_type(self.key, self.label, param_key, param_definition, self.pcluster_config).validate()
-            LOGGER.debug("Parameters validation of section '[%s]' completed correctly.", section_name)
+                    param_type = param_schema.type or self.get_default_param_type()
+                    param = param_type(self.key, self.label, param_key, param_schema.definition, self.pcluster_config)
+                tasks.extend(param.get_validation_tasks())
+        return tasks
+
+    def _report_validation_result(self, section_name, result):
+        errors, warnings = result
+        if errors:
+            self.pcluster_config.error(
+                "The section [{0}] is wrongly configured\n" "{1}".format(section_name, "\n".join(errors))
+            )
+        elif warnings:
+            self.pcluster_config.warn(
+                "The section [{0}] is wrongly configured\n{1}".format(section_name, "\n".join(warnings))
+            )
+        else:
+            LOGGER.debug("Section '[%s]' is valid", section_name)
 
     def to_file(self, config_parser, write_defaults=False):
         """Create the section and add all the parameters in the config_parser."""
         section_name = get_file_section_name(self.key, self.label)
 
-        for param_key, param_definition in self.definition.get("params").items():
-            if param_definition.get("visibility", Visibility.PUBLIC) == Visibility.PUBLIC:
+        for param_key, param_schema in self.schema.params.items():
+            if param_schema.is_public:
                 param = self.get_param(param_key)
                 if not param:
                     # generate a default param
-                    param_type = param_definition.get("type", self.get_default_param_type())
-                    param = param_type(self.key, self.label, param_key, param_definition, self.pcluster_config)
+                    param_type = param_schema.type or self.get_default_param_type()
+                    param = param_type(self.key, self.label, param_key, param_schema.definition, self.pcluster_config)
 
-                if write_defaults or param.value != param_definition.get("default", None):
+                if write_defaults or param.value != param_schema.default:
                     # add section in the config file only if at least one parameter value is different by the default
                     _ensure_section_existence(config_parser, section_name)
 
@@ -573,6 +680,9 @@ class Section(ABC):
         :param param: the Param object to add to the Section
         """
         self.params[param.key] = param
+        param._section = self
+        self._fingerprint = None
+        self.pcluster_config._mark_modified()
 
     def get_param(self, param_key):
         """
@@ -591,6 +701,9 @@ class Section(ABC):
         :param param_obj: a Param object
         """
         self.params[param_key] = param_obj
+        param_obj._section = self
+        self._fingerprint = None
+        self.pcluster_config._mark_modified()
 
     def get_param_value(self, param_key):
         """
@@ -601,10 +714,42 @@ class Section(ABC):
         """
         return self.get_param(param_key).value if self.get_param(param_key) else None
 
-    def refresh(self):
-        """Refresh all parameters."""
+    def get_fingerprint(self):
+        """
+        Return a digest of the keys and of the comparable values of the params of the section.
+
+        Sections with the same fingerprint have equal params. The opposite is not always true, e.g. for dict values with
+        different key orders, so the params of sections with different fingerprints must still be compared one by one.
+        The digest is memoized until a param of the section is modified, added or refreshed, it is kept when the
+        configuration is copied or other sections are modified, as done by ConfigPatch.
+        """
+        if self._fingerprint is None:
+            content = repr(
+                [(param_key, param.get_comparable_value()) for param_key, param in sorted(self.params.items())]
+            )
+            self._fingerprint = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return self._fingerprint
+
+    def refresh(self, changes=None):
+        """
+        Refresh the parameters of the section.
+
+        :param changes: the (section_key, param_key) pairs changed in the configuration, as accepted by
+                        refresh_required(); if specified only the parameters depending on them are refreshed
+        :return: the (section_key, param_key) pairs of the parameters modified by a partial refresh
+        """
+        # Refresh functions can modify values in place
+        self._fingerprint = None
+        modified_params = set()
         for _, param in self.params.items():
-            param.refresh()
+            if changes is None:
+                param.refresh()
+            elif refresh_required(param.get_refresh_dependencies(), changes):
+                old_value = copy.deepcopy(param.value)
+                param.refresh()
+                if param.value != old_value:
+                    modified_params.add((self.key, param.key))
+        return modified_params
 
     @abstractmethod
     def from_storage(self, storage_params):
@@ -10,6 +10,7 @@
 # limitations under the License.
 from future.moves.collections import OrderedDict
 
+import copy
 import errno
 import json
 import logging
@@ -17,15 +18,20 @@ import os
 import stat
 import sys
 
-import boto3
 import configparser
 from botocore.exceptions import ClientError
 
+from pcluster.boto3_clients import get_boto3_resource
 from pcluster.cluster_model import ClusterModel, get_cluster_model, infer_cluster_model
+from pcluster.config.aws_resources import AwsResources
 from pcluster.config.cfn_param_types import ClusterCfnSection
+from pcluster.config.config_snapshot import load_snapshot, store_snapshot
 from pcluster.config.mappings import ALIASES, AWS, GLOBAL
 from pcluster.config.param_types import StorageData
+from pcluster.config.validation_engine import ValidationEngine
+from pcluster.metadata_cache import MetadataCache
 from pcluster.utils import (
+    InstanceTypeInfo,
     get_cfn_param,
     get_file_section_name,
     get_installed_version,
@@ -37,6 +43,31 @@ from pcluster.utils import (
 
 LOGGER = logging.getLogger(__name__)
 
+# Versions of the cluster-config.json object are immutable, so they are kept in the local cache until evicted
+CLUSTER_CONFIG_CACHE_TTL = 30 * 24 * 60 * 60
+
+# Parameters containing the instance types used by the cluster, as (section key, param key) pairs
+INSTANCE_TYPE_PARAMS = [
+    ("cluster", "master_instance_type"),
+    ("cluster", "compute_instance_type"),
+    ("compute_resource", "instance_type"),
+]
+
+# Parameters referring to existing AWS resources, described with batched calls before validating the configuration
+RESOURCE_ID_PARAMS = [
+    ("vpc", "master_subnet_id", "subnets"),
+    ("vpc", "compute_subnet_id", "subnets"),
+    ("vpc", "vpc_security_group_id", "security_groups"),
+    ("vpc", "additional_sg", "security_groups"),
+    ("ebs", "ebs_volume_id", "volumes"),
+    ("ebs", "ebs_snapshot_id", "snapshots"),
+    ("cluster", "key_name", "key_pairs"),
+    ("cluster", "placement_group", "placement_groups"),
+    ("queue", "placement_group", "placement_groups"),
+    ("cluster", "custom_ami", "images"),
+    ("fsx", "fsx_fs_id", "fsx_file_systems"),
+]
+
 
 def default_config_file_path():
     """Return the default path for the ParallelCluster configuration file."""
@@ -60,6 +91,7 @@ class PclusterConfig(object):
         auto_refresh=True,
         enforce_version=True,
         skip_load_json_config=False,
+        global_sections_only=False,
     ):
         """
         Initialize object, from file, from a CFN Stack or from the internal mapping.
@@ -79,30 +111,43 @@ class PclusterConfig(object):
         the configuration, like a section being added, removed or renamed.
         :param enforce_version: when True enforces the CLI version to be of the same version as the cluster the user
         is interacting with.
+        :param global_sections_only: if set, only the aws, aliases and global sections are initialized from file. They
+        are loaded from a snapshot of the file when it has not changed since the previous initialization.
         """
         self.__autorefresh = False  # Initialization in progress
+        self.__revision = 0
+        self.__storage_data = None  # (revision, StorageData) computed by the last to_storage() call
         self.fail_on_error = fail_on_error
+        self.aws_resources = AwsResources()
         self.cfn_stack = None
         self.__sections = OrderedDict({})
         self.__enforce_version = enforce_version
         self.__skip_load_json_config = skip_load_json_config
+        self._config_parser = None
 
-        # always parse the configuration file if there, to get AWS section
-        self._init_config_parser(config_file, fail_on_file_absence)
-        # init AWS section
-        self.__init_section_from_file(AWS, self.config_parser)
+        if global_sections_only:
+            self.__init_global_sections(config_file, fail_on_file_absence)
+        else:
+            # always parse the configuration file if there, to get AWS section
+            self._init_config_parser(config_file, fail_on_file_absence)
+            # init AWS section
+            self.__init_section_from_file(AWS, self.config_parser)
         self.__init_region()
-        self.__init_aws_credentials()
+        self._init_aws_credentials()
 
         # init pcluster_config object, from cfn or from config_file
         if cluster_name:
             self.cluster_name = cluster_name
             self.__init_sections_from_cfn(cluster_name)
-        else:
+        elif not global_sections_only:
             self.__init_sections_from_file(cluster_label, self.config_parser, fail_on_file_absence)
 
         self.__autorefresh = auto_refresh  # Initialization completed
 
+        if auto_refresh:
+            # Retrieve all the instance types at once, before they are used by sections and parameters
+            self.__prefetch_instance_types()
+
         # Refresh sections and parameters
         self._config_updated()
 
@@ -113,6 +158,16 @@ class PclusterConfig(object):
         :param config_file: The config file to parse
         :param fail_on_config_file_absence: set to true to raise SystemExit if config file doesn't exist
         """
+        self._init_config_file(config_file, fail_on_config_file_absence)
+        self.__parse_config_file()
+
+    def _init_config_file(self, config_file, fail_on_config_file_absence=True):
+        """
+        Initialize the config_file attribute, with the default config file if not specified.
+
+        :param config_file: The config file
+        :param fail_on_config_file_absence: set to true to raise SystemExit if config file doesn't exist
+        """
         if config_file:
             self.config_file = config_file
             default_config = False
@@ -136,14 +191,44 @@ class PclusterConfig(object):
                 self.error(error_message)
             else:
                 LOGGER.debug("Specified configuration file %s doesn't exist.", self.config_file)
-        else:
-            LOGGER.debug("Parsing configuration file %s", self.config_file)
-        self.config_parser = configparser.ConfigParser(inline_comment_prefixes=("#", ";"))
+
+    def __parse_config_file(self):
+        LOGGER.debug("Parsing configuration file %s", self.config_file)
+        self._config_parser = configparser.ConfigParser(inline_comment_prefixes=("#", ";"))
         try:
-            self.config_parser.read(self.config_file)
+            self._config_parser.read(self.config_file)
         except (configparser.ParsingError, configparser.DuplicateOptionError) as e:
             self.error("Error parsing configuration file {0}.\n{1}".format(self.config_file, str(e)))
 
+    @property
+    def config_parser(self):
+        """Return the parsed configuration file, parsed at the first access if the sections come from a snapshot."""
+        if self._config_parser is None:
+            self.__parse_config_file()
+        return self._config_parser
+
+    def __init_global_sections(self, config_file, fail_on_file_absence):
+        """
+        Initialize the global sections, from the snapshot of the config file if up to date.
+
+        Commands only reading the global sections (e.g. ssh and status) don't need to parse the whole file, so the
+        options of these sections are stored in a snapshot, keyed by the hash of the file and by the CLI version, and
+        used instead of the file until it changes.
+        """
+        self._init_config_file(config_file, fail_on_file_absence)
+        snapshot = load_snapshot(self.config_file)
+        if snapshot is None:
+            config_parser = self.config_parser
+        else:
+            config_parser = configparser.ConfigParser(inline_comment_prefixes=("#", ";"))
+            config_parser.read_dict(snapshot)
+
+        for section_definition in [AWS, ALIASES, GLOBAL]:
+            self.__init_section_from_file(section_definition, config_parser)
+
+        if snapshot is None:
+            store_snapshot(self.config_file, config_parser, self.get_global_section_keys())
+
     @staticmethod
     def get_global_section_keys():
         """Return the keys associated to the global sections, not related to the cluster one."""
@@ -217,9 +302,9 @@ class PclusterConfig(object):
         if section.key not in self.__sections:
             self.__sections[section.key] = OrderedDict({})
 
-        section_label = section.label if section.label else section.definition.get("default_label", "default")
+        section_label = section.label if section.label else section.schema.default_label or "default"
         self.__sections[section.key][section_label] = section
-        self._config_updated()
+        self._config_updated([section.key])
 
     def remove_section(self, section_key, section_label=None):
         """
@@ -240,9 +325,9 @@ class PclusterConfig(object):
                     raise Exception("More than one section with key {0}".format(section_key))
                 else:
                     self.__sections.pop(section_key)
-        self._config_updated()
+        self._config_updated([section_key])
 
-    def __init_aws_credentials(self):
+    def _init_aws_credentials(self):
         """Set credentials in the environment to be available for all the boto3 calls."""
         # Init credentials by checking if they have been provided in config
         try:
@@ -361,10 +446,22 @@ class PclusterConfig(object):
 
         The internal representation of the cluster is converted into a data structure containing the information to be
         stored into all the storage mechanisms used by the CLI (currently CloudFormation parameters and Json).
+        The result is memoized until a param value or the sections structure change, every call returns a copy that
+        can be modified by the caller.
 
         :return: a dict containing the cfn parameters and the json dict associated with the cluster configuration
         """
-        return self.get_section("cluster").to_storage()
+        if self.__storage_data is None or self.__storage_data[0] != self.__revision:
+            storage_data = self.get_section("cluster").to_storage()
+            # The revision is read after the conversion, that can normalize some values (e.g. the config metadata)
+            self.__storage_data = (self.__revision, storage_data)
+        else:
+            LOGGER.debug("Using memoized storage data of the configuration")
+        return copy.deepcopy(self.__storage_data[1])
+
+    def _mark_modified(self):
+        """Notify the PclusterConfig instance that a param value or the sections structure have changed."""
+        self.__revision += 1
 
     def __init_sections_from_file(self, cluster_label=None, config_parser=None, fail_on_absence=False):
         """
@@ -420,24 +517,33 @@ class PclusterConfig(object):
         """Enable or disable the configuration autorefresh."""
         self.__autorefresh = refresh_enabled
 
-    def _config_updated(self):
+    def _config_updated(self, section_keys=None):
         """
         Notify the PclusterConfig instance that the configuration structure has changed.
 
         The purpose of this method is to allow internal configuration objects such as Param, Section etc to notify the
         parent PclusterConfig when something structural has changed. The configuration will be reloaded based on whether
         or not the autofresh function is enabled.
+
+        :param section_keys: the keys of the changed sections, to only refresh the sections and params depending on them
         """
+        self._mark_modified()
         if self.__autorefresh:
-            self.refresh()
+            self.refresh(section_keys)
 
-    def refresh(self):
+    def refresh(self, section_keys=None):
         """
         Reload the sections structure and refresh all configuration sections and parameters.
 
         This method must be called if structural configuration changes have been applied, like updating a section
         label, adding or removing a section etc.
+
+        :param section_keys: the keys of the sections added, removed or relabelled. If specified, only the sections with
+                             these keys are fully refreshed, together with the params depending on them, as declared by
+                             their refresh dependencies, and transitively the params depending on the modified ones.
         """
+        # Refresh functions can modify values in place
+        self._mark_modified()
         # Rebuild the new sections structure
         new_sections = OrderedDict({})
         for key, sections in self.__sections.items():
@@ -447,10 +553,30 @@ class PclusterConfig(object):
             new_sections[key] = new_sections_map
         self.__sections = new_sections
 
-        # Refresh all sections
-        for _, sections in self.__sections.items():
-            for _, section in sections.items():
-                section.refresh()
+        if section_keys is None:
+            # Refresh all sections
+            for _, sections in self.__sections.items():
+                for _, section in sections.items():
+                    section.refresh()
+            return
+
+        changes = set((section_key, None) for section_key in section_keys)
+        all_changes = set(changes)
+        iterations = 0
+        while changes:
+            # Params are refreshed in the order of the sections, the ones depending on params modified during an
+            # iteration are refreshed in the next one, until nothing changes anymore
+            modified_params = set()
+            for _, sections in self.__sections.items():
+                for _, section in sections.items():
+                    if iterations == 0 and section.key in section_keys:
+                        section.refresh()
+                    else:
+                        modified_params.update(section.refresh(changes))
+            changes = modified_params - all_changes
+            all_changes.update(changes)
+            iterations += 1
+        LOGGER.debug("Refreshed configuration after changes to %s in %d iterations", section_keys, iterations)
 
     def __init_sections_from_cfn(self, cluster_name):
         try:
@@ -485,14 +611,62 @@ class PclusterConfig(object):
                 )
             )
 
-    def validate(self):
-        """Validate the configuration."""
+    def validate(self, serial=False, dryrun_all_compute_resources=False):
+        """
+        Validate the configuration.
+
+        Validators are executed concurrently and their results are reported in order, see ValidationEngine.
+        :param serial: True to execute validators one at a time
+        :param dryrun_all_compute_resources: True to dry-run all the compute resources instead of one per queue
+        """
+        self.__prefetch_instance_types()
+        self.__prefetch_aws_resources()
+        tasks = []
         for _, sections in self.__sections.items():
             for _, section in sections.items():
-                section.validate()
+                tasks.extend(section.get_validation_tasks())
+        ValidationEngine(serial=serial).run(tasks)
 
         # test provided configuration
-        self.__test_configuration()
+        self.__test_configuration(dryrun_all_compute_resources)
+
+    def get_instance_types(self):
+        """Return the list of the instance types used by head node and compute resources, without duplicates."""
+        instance_types = []
+        for section_key, param_key in INSTANCE_TYPE_PARAMS:
+            for _, section in self.get_sections(section_key).items():
+                param = section.params.get(param_key)
+                for instance_type in str(param.value).split(",") if param and param.value else []:
+                    instance_type = instance_type.strip()
+                    # Skip AWS Batch values like "optimal" or instance families
+                    if "." in instance_type and instance_type not in instance_types:
+                        instance_types.append(instance_type)
+        return instance_types
+
+    def __prefetch_instance_types(self):
+        """Retrieve the data of all the instance types in the configuration with batched describe calls."""
+        if self.region:
+            InstanceTypeInfo.prefetch(self.get_instance_types())
+
+    def get_resource_ids(self):
+        """Return the ids of the existing AWS resources referred by the configuration, by resource type."""
+        resource_ids = OrderedDict()
+        for section_key, param_key, resource_type in RESOURCE_ID_PARAMS:
+            for _, section in self.get_sections(section_key).items():
+                param = section.params.get(param_key)
+                value = param.value if param else None
+                if value and value not in ["NONE", "DYNAMIC"]:
+                    resource_ids.setdefault(resource_type, [])
+                    if value not in resource_ids[resource_type]:
+                        resource_ids[resource_type].append(value)
+        return resource_ids
+
+    def __prefetch_aws_resources(self):
+        """Describe the AWS resources referred by the configuration with one call per resource type."""
+        if self.region:
+            self.aws_resources = AwsResources()
+            for resource_type, resource_ids in self.get_resource_ids().items():
+                self.aws_resources.prefetch(resource_type, resource_ids)
 
     def get_head_node_availability_zone(self):
         """Get the Availability zone of the Head Node Subnet."""
@@ -518,7 +692,7 @@ class PclusterConfig(object):
         return json_config
 
     def __retrieve_cluster_config(self, bucket, artifact_directory):
-        table = boto3.resource("dynamodb").Table(get_stack_name(self.cluster_name))
+        table = get_boto3_resource("dynamodb").Table(get_stack_name(self.cluster_name))
         config_version = None  # Use latest if not found
         try:
             config_version_item = table.get_item(ConsistentRead=True, Key={"Id": "CLUSTER_CONFIG"})
@@ -528,11 +702,22 @@ class PclusterConfig(object):
             self.error("Failed when retrieving cluster config version from DynamoDB with error {0}".format(e))
 
         try:
-            config_version_args = {"VersionId": config_version} if config_version else {}
-            s3_object = boto3.resource("s3").Object(
-                bucket, "{prefix}/configs/cluster-config.json".format(prefix=artifact_directory)
+            config_key = "{prefix}/configs/cluster-config.json".format(prefix=artifact_directory)
+            # Only specific versions can be cached, the latest one can change at any time
+            cache_key = [bucket, config_key, config_version] if config_version else None
+            json_str = (
+                MetadataCache.get("cluster_configs", cache_key, ttl=CLUSTER_CONFIG_CACHE_TTL, account_specific=True)
+                if cache_key
+                else None
             )
-            json_str = s3_object.get(**config_version_args)["Body"].read().decode("utf-8")
+            if json_str is None:
+                config_version_args = {"VersionId": config_version} if config_version else {}
+                s3_object = get_boto3_resource("s3").Object(bucket, config_key)
+                json_str = s3_object.get(**config_version_args)["Body"].read().decode("utf-8")
+                if cache_key:
+                    MetadataCache.put("cluster_configs", cache_key, json_str, account_specific=True)
+            else:
+                LOGGER.debug("Using cached version %s of %s", config_version, config_key)
             return json.loads(json_str, object_pairs_hook=OrderedDict)
         except Exception as e:
             self.error(
@@ -541,14 +726,14 @@ class PclusterConfig(object):
                 )
             )
 
-    def __test_configuration(self):  # noqa: C901
+    def __test_configuration(self, dryrun_all_compute_resources):  # noqa: C901
         """
         Perform global tests to verify that the wanted cluster configuration can be deployed in the user's account.
 
         Check operations may involve dryrun tests and/or other AWS calls and depend on the current cluster model.
         """
         LOGGER.debug("Testing configuration parameters...")
-        self.cluster_model.test_configuration(self)
+        self.cluster_model.test_configuration(self, dryrun_all_compute_resources)
         LOGGER.debug("Configuration parameters tested correctly.")
 
     def error(self, message):
@@ -571,7 +756,13 @@ class PclusterConfig(object):
         configuration settings.
         :param config_file: pcluster config file - None to use default
         """
-        PclusterConfig(config_file=config_file, fail_on_error=False, fail_on_file_absence=False, auto_refresh=False)
+        PclusterConfig(
+            config_file=config_file,
+            fail_on_error=False,
+            fail_on_file_absence=False,
+            auto_refresh=False,
+            global_sections_only=True,
+        )
 
     def update(self, pcluster_config):
         """
@@ -587,3 +778,4 @@ class PclusterConfig(object):
         config_metadata_param = self.get_section("cluster").get_param("cluster_config_metadata")
         self.__sections = pcluster_config.__sections
         self.get_section("cluster").set_param("cluster_config_metadata", config_metadata_param)
+        self._mark_modified()
@@ -0,0 +1,153 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import re
+import threading
+from collections import OrderedDict
+from enum import Enum
+
+
+# ---------------------- Visibility ---------------------- #
+class Visibility(Enum):
+    """Describes the visibility of a specific Param or Section."""
+
+    PRIVATE = "PRIVATE"  # Internally used, not allowed in config file
+    PUBLIC = "PUBLIC"  # Can be specified in config file
+
+
+class _Schema(object):
+    """
+    Base class for the immutable schema objects compiled from the definitions in the mappings module.
+
+    Schema objects are shared by all the configurations, so they cannot be modified nor copied.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{0} objects are immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{0} objects are immutable".format(type(self).__name__))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _init(self, **attributes):
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+
+class ParamSchema(_Schema):
+    """Compiled definition of a configuration parameter."""
+
+    __slots__ = (
+        "definition",
+        "type",
+        "default",
+        "has_default",
+        "default_is_function",
+        "allowed_values",
+        "allowed_values_regex",
+        "validators",
+        "required",
+        "visibility",
+        "is_public",
+        "cfn_param_mapping",
+        "update_policy",
+    )
+
+    def __init__(self, param_definition):
+        allowed_values = param_definition.get("allowed_values", None)
+        # Regular expressions are compiled once, lists of allowed values are checked as they are
+        is_regex = allowed_values and not isinstance(allowed_values, list)
+        default = param_definition.get("default", None)
+        visibility = param_definition.get("visibility", Visibility.PUBLIC)
+        self._init(
+            definition=param_definition,
+            type=param_definition.get("type", None),
+            default=default,
+            has_default="default" in param_definition,
+            default_is_function=callable(default),
+            allowed_values=allowed_values,
+            allowed_values_regex=re.compile(allowed_values) if is_regex else None,
+            validators=tuple(param_definition.get("validators", [])),
+            required=bool(param_definition.get("required", False)),
+            visibility=visibility,
+            is_public=visibility == Visibility.PUBLIC,
+            cfn_param_mapping=param_definition.get("cfn_param_mapping", None),
+            update_policy=param_definition.get("update_policy", None),
+        )
+
+    def get_default(self, fallback=None):
+        """Return the default value of the definition, the given fallback if the definition has no default."""
+        return self.default if self.has_default else fallback
+
+
+class SectionSchema(_Schema):
+    """Compiled definition of a configuration section, with the schemas of its parameters."""
+
+    __slots__ = (
+        "definition",
+        "key",
+        "type",
+        "default_label",
+        "autocreate",
+        "max_resources",
+        "validators",
+        "params",
+        "public_param_keys",
+        "cfn_param_mapping",
+    )
+
+    def __init__(self, section_definition):
+        params = OrderedDict(
+            (param_key, get_param_schema(param_definition))
+            for param_key, param_definition in section_definition.get("params", {}).items()
+        )
+        self._init(
+            definition=section_definition,
+            key=section_definition.get("key"),
+            type=section_definition.get("type", None),
+            default_label=section_definition.get("default_label", ""),
+            autocreate=section_definition.get("autocreate", False),
+            max_resources=int(section_definition.get("max_resources", "1")),
+            validators=tuple(section_definition.get("validators", [])),
+            params=params,
+            public_param_keys=frozenset(param_key for param_key, schema in params.items() if schema.is_public),
+            cfn_param_mapping=section_definition.get("cfn_param_mapping", None),
+        )
+
+
+# Compiled schemas by id of the definition. Definitions are stored together with the schemas to keep the ids valid.
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def _get_schema(definition, schema_type):
+    entry = _schemas.get(id(definition))
+    if entry is None:
+        schema = schema_type(definition)
+        with _schemas_lock:
+            entry = _schemas.setdefault(id(definition), (definition, schema))
+    return entry[1]
+
+
+def get_param_schema(param_definition):
+    """Return the schema of the given param definition, compiled at the first request."""
+    return _get_schema(param_definition, ParamSchema)
+
+
+def get_section_schema(section_definition):
+    """Return the schema of the given section definition, compiled at the first request."""
+    return _get_schema(section_definition, SectionSchema)
@@ -53,6 +53,15 @@ class UpdatePolicy(object):
         if condition_checker:
             self.condition_checker = condition_checker
 
+    def __deepcopy__(self, memo):
+        """Policies are shared constants, so they are not copied together with the configuration."""
+        return self
+
+    @property
+    def name(self):
+        """Return the name of the policy, as defined in the UpdatePolicy class (e.g. SUPPORTED)."""
+        return next((name for name, policy in vars(UpdatePolicy).items() if policy is self), None)
+
     def check(self, change, patch):
         """
         Check if the update can be safely performed.
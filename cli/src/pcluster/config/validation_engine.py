@@ -0,0 +1,81 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import os
+import sys
+from multiprocessing.pool import ThreadPool
+
+LOGGER = logging.getLogger(__name__)
+
+# Maximum number of validators executed concurrently
+MAX_WORKERS = 8
+
+
+class ValidationTask(object):
+    """
+    A validation step of a parameter or of a section.
+
+    The check function performs the validation and can be executed in a worker thread, so it must not print anything
+    nor exit. The report function receives the result of the check and it's always called from the main thread, in
+    the same order in which the tasks were collected, so it's the one printing messages and failing on errors.
+    """
+
+    def __init__(self, report, check=None):
+        self.check = check
+        self.report = report
+
+    def execute(self):
+        """Run the check function, if any."""
+        return self.check() if self.check else None
+
+
+class ValidationEngine(object):
+    """
+    Execute validation tasks on a bounded thread pool, most validators are bound to AWS calls.
+
+    All the checks are executed, then the results are reported in the order of the tasks, so that errors and warnings
+    are printed deterministically and the first failing task stops the validation when fail_on_error is set, as it
+    happens with serial execution. Serial execution can be forced by setting the PCLUSTER_SERIAL_VALIDATION
+    environment variable, e.g. for debugging purposes.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, serial=False):
+        self.max_workers = max_workers
+        self.serial = serial or bool(os.environ.get("PCLUSTER_SERIAL_VALIDATION"))
+
+    def run(self, tasks):
+        """Execute the given validation tasks and report their results in order."""
+        if self.serial or self.max_workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                task.report(task.execute())
+            return
+
+        LOGGER.debug("Running %d validation tasks with %d workers", len(tasks), self.max_workers)
+        pool = ThreadPool(min(self.max_workers, len(tasks)))
+        try:
+            outcomes = pool.map(_execute_task, tasks)
+        finally:
+            pool.close()
+            pool.join()
+        for task, (result, exception) in zip(tasks, outcomes):
+            if exception:
+                raise exception
+            task.report(result)
+
+
+def _execute_task(task):
+    """Execute the task returning its result and the raised exception, if any."""
+    try:
+        return task.execute(), None
+    except (Exception, SystemExit) as e:
+        # Exceptions, including the SystemExit raised by utils.error, are re-raised by the main thread in order
+        LOGGER.debug("Validation task failed with exception: %s", e, exc_info=sys.exc_info())
+        return None, e
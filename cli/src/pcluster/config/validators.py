@@ -14,9 +14,9 @@ import urllib.error
 import urllib.request
 from urllib.parse import urlparse
 
-import boto3
 from botocore.exceptions import ClientError, ParamValidationError
 
+from pcluster.boto3_clients import get_boto3_client
 from pcluster.constants import CIDR_ALL_IPS, FSX_HDD_THROUGHPUT, FSX_SSD_THROUGHPUT
 from pcluster.dcv.utils import get_supported_dcv_os
 from pcluster.utils import (
@@ -137,11 +137,11 @@ def efs_id_validator(param_key, param_value, pcluster_config):
         if head_node_target_id:
             # Get list of security group IDs of the mount target
             sg_ids = (
-                boto3.client("efs")
+                get_boto3_client("efs")
                 .describe_mount_target_security_groups(MountTargetId=head_node_target_id)
                 .get("SecurityGroups")
             )
-            if not _check_in_out_access(sg_ids, port=2049):
+            if not _check_in_out_access(sg_ids, port=2049, pcluster_config=pcluster_config):
                 warnings.append(
                     "There is an existing Mount Target {0} in the Availability Zone {1} for EFS {2}, "
                     "but it does not have a security group that allows inbound and outbound rules to support NFS. "
@@ -155,12 +155,13 @@ def efs_id_validator(param_key, param_value, pcluster_config):
     return errors, warnings
 
 
-def _check_in_out_access(security_groups_ids, port):
+def _check_in_out_access(security_groups_ids, port, pcluster_config):
     """
     Verify given list of security groups to check if they allow in and out access on the given port.
 
     :param security_groups_ids: list of security groups to verify
     :param port: port to verify
+    :param pcluster_config: the configuration, holding the snapshot of the described security groups
     :return true if
     :raise: ClientError if a given security group doesn't exist
     """
@@ -168,7 +169,7 @@ def _check_in_out_access(security_groups_ids, port):
     in_access = False
     out_access = False
 
-    for sec_group in boto3.client("ec2").describe_security_groups(GroupIds=security_groups_ids).get("SecurityGroups"):
+    for sec_group in pcluster_config.aws_resources.get_many("security_groups", security_groups_ids):
 
         # Check all inbound rules
         for rule in sec_group.get("IpPermissions"):
@@ -256,13 +257,13 @@ def fsx_id_validator(param_key, param_value, pcluster_config):
     warnings = []
 
     try:
-        ec2 = boto3.client("ec2")
+        ec2 = get_boto3_client("ec2")
 
         # Check to see if there is any existing mt on the fs
-        file_system = boto3.client("fsx").describe_file_systems(FileSystemIds=[param_value]).get("FileSystems")[0]
+        file_system = pcluster_config.aws_resources.get("fsx_file_systems", param_value)
 
         subnet_id = pcluster_config.get_section("vpc").get_param_value("master_subnet_id")
-        vpc_id = ec2.describe_subnets(SubnetIds=[subnet_id]).get("Subnets")[0].get("VpcId")
+        vpc_id = pcluster_config.aws_resources.get("subnets", subnet_id).get("VpcId")
 
         # Check to see if fs is in the same VPC as the stack
         if file_system.get("VpcId") != vpc_id:
@@ -288,7 +289,7 @@ def fsx_id_validator(param_key, param_value, pcluster_config):
             for network_interface in network_interfaces:
                 # Get list of security group IDs
                 sg_ids = [sg.get("GroupId") for sg in network_interface.get("Groups")]
-                if _check_in_out_access(sg_ids, port=988):
+                if _check_in_out_access(sg_ids, port=988, pcluster_config=pcluster_config):
                     fs_access = True
                     break
             if not fs_access:
@@ -428,7 +429,7 @@ def kms_key_validator(param_key, param_value, pcluster_config):
     warnings = []
 
     try:
-        boto3.client("kms").describe_key(KeyId=param_value)
+        get_boto3_client("kms").describe_key(KeyId=param_value)
     except ClientError as e:
         errors.append(e.response.get("Error").get("Message"))
 
@@ -479,7 +480,7 @@ def _validate_efa_sg(pcluster_config, errors):
     vpc_security_group_id = pcluster_config.get_section("vpc").get_param_value("vpc_security_group_id")
     if vpc_security_group_id:
         try:
-            sg = boto3.client("ec2").describe_security_groups(GroupIds=[vpc_security_group_id]).get("SecurityGroups")[0]
+            sg = pcluster_config.aws_resources.get("security_groups", vpc_security_group_id)
             allowed_in = False
             allowed_out = False
 
@@ -520,7 +521,7 @@ def ec2_key_pair_validator(param_key, param_value, pcluster_config):
     errors = []
     warnings = []
     try:
-        _describe_ec2_key_pair(param_value)
+        pcluster_config.aws_resources.get("key_pairs", param_value)
     except ClientError as e:
         errors.append(e.response.get("Error").get("Message"))
 
@@ -534,7 +535,7 @@ def ec2_iam_policies_validator(param_key, param_value, pcluster_config):
         if param_value:
             for iam_policy in param_value:
                 if iam_policy not in get_base_additional_iam_policies():
-                    iam = boto3.client("iam")
+                    iam = get_boto3_client("iam")
                     iam.get_policy(PolicyArn=iam_policy.strip())
     except ClientError as e:
         errors.append(e.response.get("Error").get("Message"))
@@ -568,7 +569,7 @@ def ec2_vpc_id_validator(param_key, param_value, pcluster_config):
     errors = []
     warnings = []
     try:
-        ec2 = boto3.client("ec2")
+        ec2 = get_boto3_client("ec2")
         ec2.describe_vpcs(VpcIds=[param_value])
 
         # Check for DNS support in the VPC
@@ -595,7 +596,7 @@ def ec2_subnet_id_validator(param_key, param_value, pcluster_config):
     errors = []
     warnings = []
     try:
-        boto3.client("ec2").describe_subnets(SubnetIds=[param_value])
+        pcluster_config.aws_resources.get("subnets", param_value)
     except ClientError as e:
         errors.append(e.response.get("Error").get("Message"))
 
@@ -606,7 +607,7 @@ def ec2_security_group_validator(param_key, param_value, pcluster_config):
     errors = []
     warnings = []
     try:
-        boto3.client("ec2").describe_security_groups(GroupIds=[param_value])
+        pcluster_config.aws_resources.get("security_groups", param_value)
     except ClientError as e:
         errors.append(e.response.get("Error").get("Message"))
 
@@ -619,7 +620,7 @@ def ec2_ami_validator(param_key, param_value, pcluster_config):
 
     # Make sure AMI exists
     try:
-        image_info = boto3.client("ec2").describe_images(ImageIds=[param_value]).get("Images")[0]
+        image_info = pcluster_config.aws_resources.get("images", param_value)
         validate_pcluster_version_based_on_ami_name(image_info.get("Name"))
     except ClientError as e:
         errors.append(
@@ -653,7 +654,7 @@ def ec2_placement_group_validator(param_key, param_value, pcluster_config):
         pass
     else:
         try:
-            boto3.client("ec2").describe_placement_groups(GroupNames=[param_value])
+            pcluster_config.aws_resources.get("placement_groups", param_value)
         except ClientError as e:
             errors.append(e.response.get("Error").get("Message"))
 
@@ -693,7 +694,7 @@ def s3_uri_validator(param_key, param_value, pcluster_config):
         if not match or len(match.groups()) < 2:
             raise ValueError("S3 url is invalid.")
         bucket, key = match.group(1), match.group(2)
-        boto3.client("s3").head_object(Bucket=bucket, Key=key)
+        get_boto3_client("s3").head_object(Bucket=bucket, Key=key)
 
     except ClientError:
 
@@ -732,7 +733,7 @@ def s3_bucket_uri_validator(param_key, param_value, pcluster_config):
     if urlparse(param_value).scheme == "s3":
         try:
             bucket = get_bucket_name_from_s3_url(param_value)
-            boto3.client("s3").head_bucket(Bucket=bucket)
+            get_boto3_client("s3").head_bucket(Bucket=bucket)
         except ClientError as client_error:
             _process_generic_s3_bucket_error(client_error, param_value, warnings, errors)
     else:
@@ -747,7 +748,7 @@ def s3_bucket_validator(param_key, param_value, pcluster_config):
     """Validate S3 bucket can be used to store cluster artifacts."""
     errors = []
     warnings = []
-    s3_client = boto3.client("s3")
+    s3_client = get_boto3_client("s3")
     try:
         s3_client.head_bucket(Bucket=param_value)
         # Check versioning is enabled on the bucket
@@ -800,7 +801,7 @@ def fsx_lustre_auto_import_validator(param_key, param_value, pcluster_config):
 
     if param_value is not None and param_value != "NONE":
         try:
-            s3_bucket_region = boto3.client("s3").get_bucket_location(Bucket=bucket).get("LocationConstraint")
+            s3_bucket_region = get_boto3_client("s3").get_bucket_location(Bucket=bucket).get("LocationConstraint")
             # Buckets in Region us-east-1 have a LocationConstraint of null
             if s3_bucket_region is None:
                 s3_bucket_region = "us-east-1"
@@ -875,7 +876,7 @@ def ec2_volume_validator(param_key, param_value, pcluster_config):
     errors = []
     warnings = []
     try:
-        test = boto3.client("ec2").describe_volumes(VolumeIds=[param_value]).get("Volumes")[0]
+        test = pcluster_config.aws_resources.get("volumes", param_value)
         if test.get("State") != "available":
             warnings.append("Volume {0} is in state '{1}' not 'available'".format(param_value, test.get("State")))
     except ClientError as e:
@@ -1268,7 +1269,7 @@ def _get_efa_enabled_instance_types(errors):
 
     try:
         for response in paginate_boto3(
-            boto3.client("ec2").describe_instance_types,
+            get_boto3_client("ec2").describe_instance_types,
             Filters=[{"Name": "network-info.efa-supported", "Values": ["true"]}],
         ):
             instance_types.append(response.get("InstanceType"))
@@ -1285,7 +1286,7 @@ def fsx_lustre_backup_validator(param_key, param_value, pcluster_config):
     warnings = []
 
     try:
-        boto3.client("fsx").describe_backups(BackupIds=[param_value]).get("Backups")[0]
+        get_boto3_client("fsx").describe_backups(BackupIds=[param_value]).get("Backups")[0]
     except ClientError as e:
         errors.append(
             "Failed to retrieve backup with Id '{0}': {1}".format(param_value, e.response.get("Error").get("Message"))
@@ -1327,11 +1328,6 @@ def fsx_ignored_parameters_validator(section_key, section_label, pcluster_config
     return errors, warnings
 
 
-def _describe_ec2_key_pair(key_pair_name):
-    """Return information about the provided ec2 key pair."""
-    return boto3.client("ec2").describe_key_pairs(KeyNames=[key_pair_name])
-
-
 def ebs_volume_type_size_validator(section_key, section_label, pcluster_config):
     """
     Validate that the EBS volume size matches the chosen volume type.
@@ -1455,7 +1451,11 @@ def ebs_volume_size_snapshot_validator(section_key, section_label, pcluster_conf
     if section.get_param_value("ebs_snapshot_id"):
         try:
             ebs_snapshot_id = section.get_param_value("ebs_snapshot_id")
-            snapshot_response_dict = get_ebs_snapshot_info(ebs_snapshot_id, raise_exceptions=True)
+            snapshot_response_dict = pcluster_config.aws_resources.get(
+                "snapshots",
+                ebs_snapshot_id,
+                describe_func=lambda snapshot_id: get_ebs_snapshot_info(snapshot_id, raise_exceptions=True),
+            )
             # validate that the input volume size is larger than the volume size of the EBS snapshot
             snapshot_volume_size = snapshot_response_dict.get("VolumeSize")
             volume_size = section.get_param_value("volume_size")
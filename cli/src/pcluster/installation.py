@@ -0,0 +1,29 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+
+# This module is imported by the CLI entry point before dispatching any command, it must not import boto3 or other
+# modules that are slow to load.
+import os
+
+
+def get_installed_version():
+    """Get the version of the installed aws-parallelcluster package."""
+    try:
+        from importlib.metadata import version  # Python >= 3.8, much faster to import than pkg_resources
+    except ImportError:
+        import pkg_resources
+
+        return pkg_resources.get_distribution("aws-parallelcluster").version
+    return version("aws-parallelcluster")
+
+
+def get_cli_log_file():
+    return os.path.expanduser(os.path.join("~", ".parallelcluster", "pcluster-cli.log"))
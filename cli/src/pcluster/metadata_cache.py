@@ -0,0 +1,238 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import errno
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+# Default time to live of the cached entries, in seconds
+DEFAULT_TTL = 24 * 60 * 60
+# Maximum size of the metadata entries, in bytes. Least recently written entries are evicted when exceeded.
+MAX_CACHE_SIZE = 50 * 1024 * 1024
+# Subdirectories of the cache directory storing the metadata entries, one for every partition
+PARTITIONS = ["aws", "aws-cn", "aws-us-gov"]
+# Fraction of the size limit kept when evicting files, so that the following writes do not trigger a new eviction
+EVICTION_TARGET_RATIO = 0.8
+
+
+def get_cache_dir():
+    """Return the root directory of the persistent cache, it can be overridden with PCLUSTER_CACHE_DIR."""
+    return os.environ.get("PCLUSTER_CACHE_DIR") or os.path.expanduser(os.path.join("~", ".parallelcluster", "cache"))
+
+
+class CacheSizeLimit(object):
+    """
+    Size limit shared by some subdirectories of the cache directory.
+
+    The subdirectories are scanned the first time a file is written into them by the running process, then their size is
+    tracked from the size of the written files and they are scanned again only when the tracked size exceeds the limit.
+    When exceeded, the least recently written files are evicted down to EVICTION_TARGET_RATIO of the limit.
+    """
+
+    def __init__(self, subdirs, max_size):
+        """
+        Initialize the limit.
+
+        :param subdirs: the names of the subdirectories of the cache directory sharing the limit
+        :param max_size: the maximum size of the subdirectories, in bytes
+        """
+        self.subdirs = subdirs
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._tracked_sizes = {}
+
+    def add(self, size):
+        """Account for a file of the given size written into the subdirectories, evicting files if needed."""
+        cache_dir = get_cache_dir()
+        with self._lock:
+            tracked_size = self._tracked_sizes.get(cache_dir)
+            if tracked_size is not None and tracked_size + size <= self.max_size:
+                self._tracked_sizes[cache_dir] = tracked_size + size
+            else:
+                self._tracked_sizes[cache_dir] = self._evict(cache_dir)
+
+    def _evict(self, cache_dir):
+        """Remove the least recently written files until the size is below the eviction target, return the new size."""
+        entries = self._scan(cache_dir)
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size:
+            return total_size
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size * EVICTION_TARGET_RATIO:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError as e:
+                LOGGER.debug("Unable to evict cache entry %s: %s", path, e)
+        return total_size
+
+    def _scan(self, cache_dir):
+        """Return the modification time, the size and the path of the files in the subdirectories."""
+        entries = []
+        for subdir in self.subdirs:
+            for root, _, files in os.walk(os.path.join(cache_dir, subdir)):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+
+class MetadataCache(object):
+    """
+    Persistent cache of the AWS metadata retrieved by the CLI (e.g. instance types, offerings and official AMIs).
+
+    Entries are stored as JSON files under ~/.parallelcluster/cache/<partition>/<region>/<namespace>, one file for
+    every key. Every entry expires after the TTL requested by the reader, writes are atomic and the size of the entries
+    is kept below MAX_CACHE_SIZE. Data depending on the AWS account (e.g. availability zone names) must be stored with
+    account_specific=True so that entries are scoped by the account of the credentials in use, retrieved once per
+    process with STS; these entries are not cached when the account cannot be determined.
+    The cache is bypassed when PCLUSTER_CACHE_DISABLED is set or when the --no-cache option is used.
+    Any failure when accessing the cache is logged and handled as a cache miss.
+    """
+
+    _disabled = False
+    _size_limit = CacheSizeLimit(PARTITIONS, MAX_CACHE_SIZE)
+    _accounts = {}
+    _accounts_lock = threading.Lock()
+
+    @staticmethod
+    def disable():
+        """Disable the cache for the running process."""
+        MetadataCache._disabled = True
+
+    @staticmethod
+    def enable():
+        """Enable the cache for the running process, unless disabled through the environment."""
+        MetadataCache._disabled = False
+
+    @staticmethod
+    def is_enabled():
+        """Tell if the cache is enabled."""
+        return not MetadataCache._disabled and not os.environ.get("PCLUSTER_CACHE_DISABLED")
+
+    @staticmethod
+    def get(namespace, key, ttl=DEFAULT_TTL, account_specific=False):
+        """
+        Return the value stored for the given key, None if not found or expired.
+
+        :param namespace: the kind of cached data (e.g. "instance_types")
+        :param key: a JSON serializable key
+        :param ttl: maximum age of the entry, in seconds
+        :param account_specific: True if the data depends on the credentials in use
+        """
+        entry_path, serialized_key = MetadataCache._get_entry_path(namespace, key, account_specific)
+        if not entry_path:
+            return None
+        try:
+            with open(entry_path) as entry_file:
+                entry = json.load(entry_file)
+            if entry.get("key") != serialized_key:
+                LOGGER.debug("Key mismatch for cache entry %s", entry_path)
+                return None
+            if time.time() - entry.get("timestamp", 0) > ttl:
+                LOGGER.debug("Expired cache entry %s", entry_path)
+                return None
+            return entry.get("value")
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                LOGGER.debug("Unable to read cache entry %s: %s", entry_path, e)
+        except ValueError as e:
+            LOGGER.debug("Corrupted cache entry %s: %s", entry_path, e)
+        return None
+
+    @staticmethod
+    def put(namespace, key, value, account_specific=False):
+        """
+        Store the JSON serializable value for the given key.
+
+        :param namespace: the kind of cached data (e.g. "instance_types")
+        :param key: a JSON serializable key
+        :param value: a JSON serializable value
+        :param account_specific: True if the data depends on the credentials in use
+        """
+        entry_path, serialized_key = MetadataCache._get_entry_path(namespace, key, account_specific)
+        if not entry_path:
+            return
+        entry = {"key": serialized_key, "timestamp": time.time(), "value": value}
+        try:
+            entry_dir = os.path.dirname(entry_path)
+            if not os.path.isdir(entry_dir):
+                os.makedirs(entry_dir)
+            # Write to a temporary file in the same directory and then rename it, to never expose partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=entry_dir, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "w") as tmp_file:
+                    json.dump(entry, tmp_file)
+                _replace(tmp_path, entry_path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            MetadataCache._size_limit.add(os.path.getsize(entry_path))
+        except (IOError, OSError, TypeError, ValueError) as e:
+            LOGGER.debug("Unable to write cache entry %s: %s", entry_path, e)
+
+    @staticmethod
+    def _get_entry_path(namespace, key, account_specific):
+        """Return the path of the file storing the entry and its serialized key, None if the cache cannot be used."""
+        region = os.environ.get("AWS_DEFAULT_REGION")
+        if not MetadataCache.is_enabled() or not region:
+            return None, None
+        scope = None
+        if account_specific:
+            scope = MetadataCache._get_account_id()
+            if not scope:
+                return None, None
+        serialized_key = json.dumps([scope, key], sort_keys=True)
+        file_name = hashlib.sha256(serialized_key.encode("utf-8")).hexdigest() + ".json"
+        return os.path.join(get_cache_dir(), _get_partition(region), region, namespace, file_name), serialized_key
+
+    @staticmethod
+    def _get_account_id():
+        """Return the id of the account of the credentials in use, retrieved once per process and credentials."""
+        credentials = (os.environ.get("AWS_PROFILE"), os.environ.get("AWS_ACCESS_KEY_ID"))
+        with MetadataCache._accounts_lock:
+            if credentials not in MetadataCache._accounts:
+                MetadataCache._accounts[credentials] = _lookup_account_id()
+            return MetadataCache._accounts[credentials]
+
+
+def _lookup_account_id():
+    # Imported here to not load boto3 at startup
+    from pcluster.boto3_clients import get_boto3_client
+
+    try:
+        return get_boto3_client("sts").get_caller_identity().get("Account")
+    except Exception as e:
+        LOGGER.debug("Unable to retrieve the AWS account, account specific entries will not be cached: %s", e)
+        return None
+
+
+def _get_partition(region):
+    return next(("aws-" + partition for partition in ["us-gov", "cn"] if region.startswith(partition)), "aws")
+
+
+def _replace(src, dst):
+    """Atomically replace dst with src, os.replace is not available in Python 2."""
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+    else:
+        os.rename(src, dst)
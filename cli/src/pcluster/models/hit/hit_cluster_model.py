@@ -8,10 +8,14 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+from functools import partial
+
 from botocore.exceptions import ClientError
 
 from pcluster.cluster_model import ClusterModel
 from pcluster.config import mappings
+from pcluster.config.validation_engine import ValidationEngine, ValidationTask
 from pcluster.utils import InstanceTypeInfo, disable_ht_via_cpu_options
 
 
@@ -37,8 +41,12 @@ class HITClusterModel(ClusterModel):
 
         return HITStopCommand()
 
-    def test_configuration(self, pcluster_config):
-        """Try to launch the requested instances (in dry-run mode) to verify configuration parameters."""
+    def test_configuration(self, pcluster_config, dryrun_all_compute_resources=False):
+        """
+        Try to launch the requested instances (in dry-run mode) to verify configuration parameters.
+
+        :param dryrun_all_compute_resources: True to test all the compute resources, see get_dryrun_compute_resources
+        """
         cluster_section = pcluster_config.get_section("cluster")
         vpc_section = pcluster_config.get_section("vpc")
 
@@ -84,16 +92,17 @@ class HITClusterModel(ClusterModel):
             )
 
             # Test Head Node Instance Configuration
-            self._ec2_run_instance(
-                pcluster_config,
-                InstanceType=head_node_instance_type,
-                MinCount=1,
-                MaxCount=1,
-                ImageId=cluster_ami_id,
-                CpuOptions=head_node_cpu_options,
-                NetworkInterfaces=head_node_network_interfaces,
-                DryRun=True,
-            )
+            dryrun_args = [
+                dict(
+                    InstanceType=head_node_instance_type,
+                    MinCount=1,
+                    MaxCount=1,
+                    ImageId=cluster_ami_id,
+                    CpuOptions=head_node_cpu_options,
+                    NetworkInterfaces=head_node_network_interfaces,
+                    DryRun=True,
+                )
+            ]
 
             for _, queue_section in pcluster_config.get_sections("queue").items():
                 queue_placement_group = queue_section.get_param_value("placement_group")
@@ -103,20 +112,34 @@ class HITClusterModel(ClusterModel):
                     else {}
                 )
 
-                compute_resource_section = self.select_dryrun_compute_resource(queue_section, pcluster_config)
-
-                disable_hyperthreading = compute_resource_section.get_param_value(
-                    "disable_hyperthreading"
-                ) and compute_resource_section.get_param_value("disable_hyperthreading_via_cpu_options")
-                self.__test_compute_resource(
-                    pcluster_config,
-                    compute_resource_section,
-                    disable_hyperthreading=disable_hyperthreading,
-                    ami_id=cluster_ami_id,
-                    subnet=compute_subnet,
-                    security_groups_ids=security_groups_ids,
-                    placement_group=queue_placement_group,
-                )
+                for compute_resource_section in self.get_dryrun_compute_resources(
+                    queue_section, pcluster_config, dryrun_all_compute_resources
+                ):
+                    disable_hyperthreading = compute_resource_section.get_param_value(
+                        "disable_hyperthreading"
+                    ) and compute_resource_section.get_param_value("disable_hyperthreading_via_cpu_options")
+                    dryrun_args.append(
+                        self.__get_compute_resource_dryrun_args(
+                            pcluster_config,
+                            compute_resource_section,
+                            disable_hyperthreading=disable_hyperthreading,
+                            ami_id=cluster_ami_id,
+                            subnet=compute_subnet,
+                            security_groups_ids=security_groups_ids,
+                            placement_group=queue_placement_group,
+                        )
+                    )
+
+            # Dry-run calls are independent, they are executed concurrently and their errors are reported in order
+            ValidationEngine().run(
+                [
+                    ValidationTask(
+                        report=partial(self._report_ec2_run_instance_error, pcluster_config, **kwargs),
+                        check=partial(self._ec2_dryrun_instance, **kwargs),
+                    )
+                    for kwargs in dryrun_args
+                ]
+            )
 
         except ClientError:
             pcluster_config.error("Unable to validate configuration parameters.")
@@ -127,7 +150,7 @@ class HITClusterModel(ClusterModel):
 
         Resources with multiple NICs are preferred among others.
         """
-        # Temporarily limiting dryrun tests to 1 per queue to save boto3 calls.
+        # By default dryrun tests are limited to 1 per queue to save boto3 calls, see get_dryrun_compute_resources.
         compute_resource_labels = queue_section.get_param("compute_resource_settings").referred_section_labels
         dryrun_section = pcluster_config.get_section("compute_resource", compute_resource_labels[0])
         for section_label in compute_resource_labels:
@@ -138,7 +161,25 @@ class HITClusterModel(ClusterModel):
 
         return dryrun_section
 
-    def __test_compute_resource(
+    def get_dryrun_compute_resources(self, queue_section, pcluster_config, dryrun_all_compute_resources=False):
+        """
+        Return the compute resources of the queue to run dryrun tests against.
+
+        All the compute resources are tested when requested with the --dryrun-all-compute-resources option or when the
+        PCLUSTER_DRYRUN_ALL_COMPUTE_RESOURCES environment variable is set to true, otherwise only the one returned by
+        select_dryrun_compute_resource.
+        """
+        if not dryrun_all_compute_resources:
+            env_value = os.environ.get("PCLUSTER_DRYRUN_ALL_COMPUTE_RESOURCES", "")
+            dryrun_all_compute_resources = env_value.strip().lower() in ["true", "yes", "1"]
+        if dryrun_all_compute_resources:
+            return [
+                pcluster_config.get_section("compute_resource", section_label)
+                for section_label in queue_section.get_param("compute_resource_settings").referred_section_labels
+            ]
+        return [self.select_dryrun_compute_resource(queue_section, pcluster_config)]
+
+    def __get_compute_resource_dryrun_args(
         self,
         pcluster_config,
         compute_resource_section,
@@ -148,7 +189,7 @@ class HITClusterModel(ClusterModel):
         security_groups_ids=None,
         placement_group=None,
     ):
-        """Test Compute Resource Instance Configuration."""
+        """Return the run_instances arguments to test the Compute Resource Instance Configuration."""
         vcpus = compute_resource_section.get_param_value("vcpus")
         compute_cpu_options = {"CoreCount": vcpus, "ThreadsPerCore": 1} if disable_hyperthreading else {}
         network_interfaces_count = compute_resource_section.get_param_value("network_interfaces")
@@ -162,8 +203,7 @@ class HITClusterModel(ClusterModel):
             use_public_ips,
         )
 
-        self._ec2_run_instance(
-            pcluster_config,
+        return dict(
             InstanceType=compute_resource_section.get_param_value("instance_type"),
             MinCount=1,
             MaxCount=1,
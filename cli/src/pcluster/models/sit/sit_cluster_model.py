@@ -49,7 +49,7 @@ class SITClusterModel(ClusterModel):
 
             return SITStopCommand()
 
-    def test_configuration(self, pcluster_config):
+    def test_configuration(self, pcluster_config, dryrun_all_compute_resources=False):
         """
         Try to launch the requested instances (in dry-run mode) to verify configuration parameters.
 
@@ -0,0 +1,185 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import datetime
+import json
+import logging
+import os
+import threading
+
+from botocore.awsrequest import AWSResponse
+
+from pcluster.installation import get_installed_version
+from pcluster.metadata_cache import MetadataCache
+
+LOGGER = logging.getLogger(__name__)
+
+CATALOG_FORMAT_VERSION = 1
+# Error code returned for the calls that are not part of the catalog when serving it
+MISSING_CALL_ERROR_CODE = "OfflineCatalogMissingCall"
+
+
+def _json_default(value):
+    """Serialize the values that are not natively supported by json, e.g. the datetimes in the responses."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return str(value)
+
+
+def _make_call_key(service, region, operation, params):
+    return json.dumps([service, region, operation, params], sort_keys=True, default=_json_default)
+
+
+class OfflineCatalog(object):
+    """
+    Catalog of the responses of the AWS calls performed by the CLI, used as data source to work without credentials.
+
+    A catalog is recorded once from a real account by running a command (e.g. the validation of a configuration file)
+    in recording mode, every call performed by the clients of the Boto3ClientRegistry is stored with its parameters
+    and its response, errors included. When serving a catalog the calls never reach AWS: the recorded response is
+    returned for a call with the same service, region, operation and parameters, a MISSING_CALL_ERROR_CODE error
+    otherwise. Catalogs are JSON files, entries are sorted so that recording twice the same calls gives the same file.
+    """
+
+    def __init__(self, region=None, calls=None, recording=False):
+        self.region = region
+        self.recording = recording
+        self._lock = threading.Lock()
+        self._calls = {}
+        for call in calls or []:
+            key = _make_call_key(call["service"], call["region"], call["operation"], call["params"])
+            self._calls[key] = call
+
+    @staticmethod
+    def load(path):
+        """Load the catalog stored in the given file."""
+        with open(path) as catalog_file:
+            catalog = json.load(catalog_file)
+        if catalog.get("version") != CATALOG_FORMAT_VERSION:
+            raise ValueError("Unsupported offline catalog version {0} in file {1}".format(catalog.get("version"), path))
+        return OfflineCatalog(region=catalog.get("region"), calls=catalog.get("calls"))
+
+    def save(self, path):
+        """Store the catalog in the given file."""
+        with self._lock:
+            calls = [self._calls[key] for key in sorted(self._calls)]
+        catalog = {
+            "version": CATALOG_FORMAT_VERSION,
+            "recorded_with": get_installed_version(),
+            "region": self.region or os.environ.get("AWS_DEFAULT_REGION"),
+            "calls": calls,
+        }
+        with open(path, "w") as catalog_file:
+            json.dump(catalog, catalog_file, indent=2, sort_keys=True, default=_json_default)
+
+    def get_calls_count(self):
+        """Return the number of calls in the catalog."""
+        with self._lock:
+            return len(self._calls)
+
+    def attach(self, client):
+        """Register the event handlers recording or serving the calls of the given boto3 client."""
+        events = client.meta.events
+        # Parameters are captured before botocore injects generated ones, e.g. the idempotency tokens
+        events.register_first("before-parameter-build", self._capture_call_key)
+        if self.recording:
+            events.register("after-call", self._record_call)
+        else:
+            events.register_first("before-call", self._serve_call)
+
+    def _capture_call_key(self, params, model, context, **kwargs):
+        context["offline_catalog_key"] = _make_call_key(
+            model.service_model.service_name, context.get("client_region"), model.name, params
+        )
+        context["offline_catalog_params"] = json.loads(json.dumps(params, default=_json_default))
+
+    def _record_call(self, http_response, parsed, model, context, **kwargs):
+        key = context.get("offline_catalog_key")
+        if not key:
+            return
+        response = {name: value for name, value in parsed.items() if name != "ResponseMetadata"}
+        try:
+            # Responses are stored as they will be read, e.g. datetimes are represented by strings
+            response = json.loads(json.dumps(response, default=_json_default))
+        except (TypeError, ValueError) as e:
+            LOGGER.debug("Unable to record response of %s: %s", model.name, e)
+            return
+        call = {
+            "service": model.service_model.service_name,
+            "region": context.get("client_region"),
+            "operation": model.name,
+            "params": context.get("offline_catalog_params"),
+            "status_code": http_response.status_code,
+            "response": response,
+        }
+        with self._lock:
+            self._calls[key] = call
+
+    def _serve_call(self, model, context, **kwargs):
+        with self._lock:
+            call = self._calls.get(context.get("offline_catalog_key"))
+        if call:
+            status_code, response = call["status_code"], dict(call["response"])
+        else:
+            LOGGER.debug("Call %s not found in offline catalog", context.get("offline_catalog_key"))
+            status_code = 400
+            response = {
+                "Error": {
+                    "Code": MISSING_CALL_ERROR_CODE,
+                    "Message": "The {0} call to {1} with parameters {2} is not in the offline catalog".format(
+                        model.name,
+                        model.service_model.service_name,
+                        json.dumps(context.get("offline_catalog_params"), sort_keys=True),
+                    ),
+                }
+            }
+        response["ResponseMetadata"] = {"HTTPStatusCode": status_code, "HTTPHeaders": {}, "RetryAttempts": 0}
+        return AWSResponse(None, status_code, {}, None), response
+
+
+_active_catalog = None
+
+
+def get_active_catalog():
+    """Return the catalog the boto3 clients are bound to, None when working online."""
+    return _active_catalog
+
+
+def use_catalog(path):
+    """
+    Serve all the following AWS calls from the catalog stored in the given file.
+
+    The region of the catalog is used when no region is configured. The metadata cache is disabled, so that the
+    result of the commands only depends on the content of the catalog.
+    """
+    global _active_catalog
+    MetadataCache.disable()
+    _active_catalog = OfflineCatalog.load(path)
+    if _active_catalog.region and not os.environ.get("AWS_DEFAULT_REGION"):
+        os.environ["AWS_DEFAULT_REGION"] = _active_catalog.region
+    LOGGER.debug("Using offline catalog %s with %d calls", path, _active_catalog.get_calls_count())
+    return _active_catalog
+
+
+def record_catalog():
+    """Record all the following AWS calls in a new catalog, to be stored with save()."""
+    global _active_catalog
+    # Metadata served by the cache would be missing from the catalog
+    MetadataCache.disable()
+    _active_catalog = OfflineCatalog(region=os.environ.get("AWS_DEFAULT_REGION"), recording=True)
+    return _active_catalog
+
+
+def stop_catalog():
+    """Make the clients created from now on call AWS again."""
+    global _active_catalog
+    _active_catalog = None
@@ -0,0 +1,199 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 10
+# Delays are in seconds
+DEFAULT_BASE_DELAY = 1
+DEFAULT_MAX_DELAY = 20
+DEFAULT_MAX_ELAPSED_TIME = 300
+
+# Error codes returned by all the services when throttling requests
+THROTTLING_ERROR_CODES = frozenset(["Throttling", "ThrottlingException", "ThrottledException", "RequestThrottled"])
+# Additional throttling error codes returned by specific services
+SERVICE_THROTTLING_ERROR_CODES = {
+    "batch": frozenset(["TooManyRequestsException"]),
+    "cloudformation": frozenset(["TooManyRequestsException"]),
+    "dynamodb": frozenset(["ProvisionedThroughputExceededException", "RequestLimitExceeded"]),
+    "ec2": frozenset(["RequestLimitExceeded", "EC2ThrottledException"]),
+    "ecs": frozenset(["TooManyRequestsException"]),
+    "logs": frozenset(["TooManyRequestsException"]),
+    "s3": frozenset(["SlowDown"]),
+}
+
+# Retry quota of every service, consumed by throttled retries and refilled by successful calls
+RETRY_QUOTA_CAPACITY = 500
+THROTTLING_RETRY_COST = 5
+SUCCESS_REFILL = 1
+
+
+class RetryQuota(object):
+    """
+    Token bucket limiting the throttled retries performed for a service by all the threads of the process.
+
+    When many concurrent calls are throttled the bucket empties quickly and the following failures are not retried,
+    instead of adding even more load to the throttled service.
+    """
+
+    def __init__(self, capacity=RETRY_QUOTA_CAPACITY):
+        self.capacity = capacity
+        self.available = capacity
+        self._lock = threading.Lock()
+
+    def acquire(self, cost=THROTTLING_RETRY_COST):
+        """Take cost tokens from the bucket, return False if not enough tokens are available."""
+        with self._lock:
+            if self.available < cost:
+                return False
+            self.available -= cost
+            return True
+
+    def release(self, amount=SUCCESS_REFILL):
+        """Put tokens back into the bucket, up to its capacity."""
+        with self._lock:
+            self.available = min(self.capacity, self.available + amount)
+
+
+_lock = threading.Lock()
+_quotas = {}
+_statistics = {}
+
+
+def get_retry_quota(service):
+    """Return the retry quota shared by all the calls to the given service."""
+    with _lock:
+        if service not in _quotas:
+            _quotas[service] = RetryQuota()
+        return _quotas[service]
+
+
+def get_retry_statistics():
+    """Return a dict with the retry counters of every service."""
+    with _lock:
+        return {service: dict(counters) for service, counters in _statistics.items()}
+
+
+def reset():
+    """Reset retry quotas and statistics."""
+    with _lock:
+        _quotas.clear()
+        _statistics.clear()
+
+
+def _count(service, counter, value=1):
+    with _lock:
+        _statistics.setdefault(service, Counter())[counter] += value
+
+
+def is_throttling_error(error, service=None):
+    """Tell if the given exception is a throttling error returned by the given service."""
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get("Error", {}).get("Code")
+    return code in THROTTLING_ERROR_CODES or code in SERVICE_THROTTLING_ERROR_CODES.get(service, ())
+
+
+def get_service_name(func):
+    """Return the name of the service of a boto3 client method, None if func is not a client method."""
+    try:
+        return func.__self__.meta.service_model.service_name
+    except AttributeError:
+        return None
+
+
+def get_backoff_delay(attempt, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """Return the delay before the given retry attempt, using exponential backoff with full jitter."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def retry_call(
+    func,
+    args=(),
+    kwargs=None,
+    service=None,
+    should_retry=None,
+    max_attempts=DEFAULT_MAX_ATTEMPTS,
+    base_delay=DEFAULT_BASE_DELAY,
+    max_delay=DEFAULT_MAX_DELAY,
+    max_elapsed_time=DEFAULT_MAX_ELAPSED_TIME,
+):
+    """
+    Call the function and retry it with exponential backoff and full jitter when it fails.
+
+    :param func: the function to call
+    :param args: the positional arguments of the function
+    :param kwargs: the keyword arguments of the function
+    :param service: the AWS service called by the function, inferred for boto3 client methods
+    :param should_retry: function telling if an exception must be retried, by default only throttling errors are
+    :param max_attempts: maximum number of calls
+    :param base_delay: delay before the first retry, doubled at every following retry
+    :param max_delay: maximum delay between two attempts
+    :param max_elapsed_time: no retries are performed once this amount of seconds has elapsed since the first call
+    :return: the result of the function
+    """
+    kwargs = kwargs or {}
+    service = service or get_service_name(func) or "default"
+    if should_retry is None:
+
+        def should_retry(e):
+            return is_throttling_error(e, service)
+
+    func_name = getattr(func, "__name__", repr(func))
+    start_time = time.time()
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = func(*args, **kwargs)
+            get_retry_quota(service).release()
+            return result
+        except Exception as e:
+            if not should_retry(e):
+                raise
+            throttled = is_throttling_error(e, service)
+            delay = get_backoff_delay(attempt, base_delay, max_delay)
+            if (
+                attempt >= max_attempts
+                or time.time() - start_time + delay > max_elapsed_time
+                or (throttled and not get_retry_quota(service).acquire())
+            ):
+                LOGGER.debug("Giving up calling %s after %d attempts: %s", func_name, attempt, e)
+                _count(service, "exhausted")
+                raise
+            _count(service, "retries")
+            if throttled:
+                _count(service, "throttled")
+            LOGGER.debug("%s when calling %s, retrying in %.2f seconds", e, func_name, delay)
+            time.sleep(delay)
+
+
+def retry_on_throttling(func, *args, **kwargs):
+    """Call the given boto3 client method retrying it with the default policy if throttled."""
+    return retry_call(func, args, kwargs)
+
+
+def get_adaptive_retry_config(max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Return a botocore configuration enabling the adaptive retry mode.
+
+    With this mode botocore retries all the calls of the client with exponential backoff and jitter and it limits the
+    rate of requests through a client side token bucket when the service starts throttling.
+    """
+    return Config(retries={"mode": "adaptive", "max_attempts": max_attempts})
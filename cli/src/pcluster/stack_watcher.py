@@ -0,0 +1,191 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+import sys
+import time
+
+from pcluster.boto3_clients import get_boto3_client
+from pcluster.retries import retry_on_throttling
+
+LOGGER = logging.getLogger(__name__)
+
+# Poll intervals, in seconds. The interval grows when the stack is idle and it is reset at every new event.
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 30
+POLL_INTERVAL_GROWTH = 1.5
+
+NESTED_STACK_RESOURCE_TYPE = "AWS::CloudFormation::Stack"
+
+
+def is_in_progress(status):
+    """Tell if the given stack status is a transient one."""
+    return status.endswith("_IN_PROGRESS")
+
+
+class StackWatcher(object):
+    """
+    Follow the progress of a CloudFormation stack operation.
+
+    Only the events generated since the previous poll are retrieved, paginating describe_stack_events until the last
+    seen event, and the events of the nested stacks are followed as well. The status of the stack is tracked through
+    the events of the stack itself, so that describe_stacks is only called when starting and when the operation ends.
+    """
+
+    def __init__(self, stack_name, cfn_client=None, follow_nested_stacks=True, baseline=True):
+        """
+        Initialize the watcher.
+
+        :param stack_name: the name or the id of the stack to follow
+        :param cfn_client: boto3 cloudformation client
+        :param follow_nested_stacks: True to retrieve the events of the nested stacks
+        :param baseline: True to skip the events generated before the first poll
+        """
+        self.stack_name = stack_name
+        self.stack_id = None
+        self.stack_status = None
+        self.last_event = None
+        self.cfn_client = cfn_client or get_boto3_client("cloudformation")
+        self.follow_nested_stacks = follow_nested_stacks
+        self._baseline = baseline
+        self._last_event_id = None
+        self._nested_watchers = {}
+
+    def get_stack(self):
+        """Describe the stack and update the tracked status."""
+        stack = retry_on_throttling(self.cfn_client.describe_stacks, StackName=self.stack_id or self.stack_name).get(
+            "Stacks"
+        )[0]
+        self.stack_id = stack.get("StackId")
+        self.stack_status = stack.get("StackStatus")
+        return stack
+
+    def poll_events(self):
+        """Return the events of the stack and of its nested stacks generated since the previous poll, oldest first."""
+        events = self._get_new_events()
+        if self._baseline and self._last_event_id is None:
+            # First poll: skip the history of the stack but keep following the nested stacks in progress
+            self._baseline = False
+            self._update_last_event_id(events)
+            for event in reversed(events):
+                self._process_event(event, baseline=True)
+            for watcher in self._nested_watchers.values():
+                watcher.poll_events()
+            return []
+
+        self._update_last_event_id(events)
+        new_events = []
+        updated_nested_stacks = set()
+        for event in reversed(events):
+            new_events.append(event)
+            updated_nested_stacks.update(self._process_event(event, baseline=False))
+        for physical_id, watcher in self._nested_watchers.items():
+            # Nested stacks are polled while in progress or when their parent reports a change of their status
+            if watcher.stack_status is None or is_in_progress(watcher.stack_status):
+                new_events.extend(watcher.poll_events())
+            elif physical_id in updated_nested_stacks:
+                new_events.extend(watcher.poll_events())
+        new_events.sort(key=lambda event: event.get("Timestamp"))
+        if new_events:
+            self.last_event = new_events[-1]
+        return new_events
+
+    def wait(self, in_progress_statuses=None, show_progress=True):
+        """
+        Wait for the stack operation to complete.
+
+        :param in_progress_statuses: the statuses of the stack to wait for, by default all the *_IN_PROGRESS ones
+        :param show_progress: True to print the latest event of the stack on stdout
+        :return: the stack data, as returned by describe_stacks, at the end of the operation
+        """
+        if in_progress_statuses is None:
+            still_in_progress = is_in_progress
+        else:
+            still_in_progress = in_progress_statuses.__contains__
+        stack = self.get_stack()
+        if not still_in_progress(self.stack_status):
+            return stack
+
+        self.poll_events()
+        poll_interval = MIN_POLL_INTERVAL
+        resource_status = ""
+        while still_in_progress(self.stack_status):
+            time.sleep(poll_interval)
+            events = self.poll_events()
+            for event in events:
+                LOGGER.debug(_format_event(event))
+            if events:
+                poll_interval = MIN_POLL_INTERVAL
+            else:
+                poll_interval = min(poll_interval * POLL_INTERVAL_GROWTH, MAX_POLL_INTERVAL)
+            if show_progress and self.last_event:
+                resource_status = (
+                    "Status: %s - %s"
+                    % (self.last_event.get("LogicalResourceId"), self.last_event.get("ResourceStatus"))
+                ).ljust(80)
+                sys.stdout.write("\r%s" % resource_status)
+                sys.stdout.flush()
+        # print the last status update in the logs
+        if resource_status:
+            LOGGER.debug(resource_status)
+        return self.get_stack()
+
+    def _get_new_events(self):
+        """Return the events generated after the last seen one, newest first."""
+        kwargs = {"StackName": self.stack_id or self.stack_name}
+        events = []
+        while True:
+            response = retry_on_throttling(self.cfn_client.describe_stack_events, **kwargs)
+            for event in response.get("StackEvents", []):
+                if event.get("EventId") == self._last_event_id:
+                    return events
+                events.append(event)
+            # On the first poll only the latest page is needed to find the current state of the stack
+            if not response.get("NextToken") or (self._baseline and self._last_event_id is None):
+                return events
+            kwargs["NextToken"] = response.get("NextToken")
+
+    def _update_last_event_id(self, events):
+        if events:
+            self._last_event_id = events[0].get("EventId")
+            if self.last_event is None:
+                self.last_event = events[0]
+
+    def _process_event(self, event, baseline):
+        """
+        Update the status of the stack and register the nested stacks from the given event.
+
+        :return: the ids of the nested stacks the event refers to
+        """
+        if event.get("ResourceType") != NESTED_STACK_RESOURCE_TYPE:
+            return []
+        physical_id = event.get("PhysicalResourceId")
+        if event.get("LogicalResourceId") == event.get("StackName"):
+            # Event of the stack itself
+            self.stack_status = event.get("ResourceStatus")
+            self.stack_id = self.stack_id or event.get("StackId")
+            return []
+        if not self.follow_nested_stacks or not physical_id or not physical_id.startswith("arn:"):
+            return []
+        if physical_id not in self._nested_watchers:
+            LOGGER.debug("Following nested stack %s", physical_id)
+            # Nested stacks created during the operation are followed since their first event
+            self._nested_watchers[physical_id] = StackWatcher(physical_id, self.cfn_client, baseline=baseline)
+        return [physical_id]
+
+
+def _format_event(event):
+    return "{0} {1} {2} {3} {4}".format(
+        event.get("Timestamp"),
+        event.get("ResourceStatus"),
+        event.get("ResourceType"),
+        event.get("LogicalResourceId"),
+        event.get("ResourceStatusReason", ""),
+    )
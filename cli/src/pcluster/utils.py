@@ -23,28 +23,59 @@ import logging
 import os
 import random
 import re
+import shutil
 import string
 import sys
+import tempfile
+import threading
 import time
+import urllib.error
 import urllib.request
 import zipfile
+from collections import OrderedDict
 from enum import Enum
 from io import BytesIO
 from urllib.parse import urlparse
 
-import boto3
-import pkg_resources
 from botocore.exceptions import ClientError, EndpointConnectionError
-from jinja2 import BaseLoader, Environment
+from jinja2 import BaseLoader, BytecodeCache, Environment, TemplateNotFound
 from pkg_resources import packaging
 
+from pcluster.boto3_clients import get_boto3_client, get_boto3_resource
 from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatus, ComputeFleetStatusManager
 from pcluster.constants import PCLUSTER_STACK_PREFIX, SUPPORTED_ARCHITECTURES
+from pcluster.installation import get_cli_log_file, get_installed_version  # noqa: F401
+from pcluster.metadata_cache import CacheSizeLimit, MetadataCache, get_cache_dir
+from pcluster.retries import retry_call, retry_on_throttling
+from pcluster.stack_watcher import StackWatcher
 
 LOGGER = logging.getLogger(__name__)
 
+# Maximum number of instance types accepted by a single describe_instance_types call
+DESCRIBE_INSTANCE_TYPES_MAX_ITEMS = 100
+
 STACK_TYPE = "AWS::CloudFormation::Stack"
 
+# Maximum age of the remote files in the local cache, they are revalidated with conditional requests when read
+REMOTE_FILES_CACHE_TTL = 30 * 24 * 60 * 60
+
+# Metadata of the S3 objects storing the SHA-256 of their content, see put_s3_object_if_changed
+CONTENT_HASH_METADATA_KEY = "content-sha256"
+
+# Timestamp of the entries of the archives built by zip_dir, fixed so that archives only depend on the files content
+ZIP_ENTRIES_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# Version of the layout of the archives built by zip_dir, part of the hash naming the cached archives
+ZIP_ARCHIVE_FORMAT_VERSION = 1
+# Size of the chunks read from the archived files
+FILE_CHUNK_SIZE = 1024 * 1024
+# Maximum size of the archives stored in the persistent cache, least recently used archives are evicted when exceeded
+ARTIFACTS_CACHE_LIMIT = CacheSizeLimit(["artifacts"], 200 * 1024 * 1024)
+
+# Number of compiled templates kept in memory by the environment used by render_template
+COMPILED_TEMPLATES_CACHE_SIZE = 16
+# Maximum size of the compiled templates stored in the persistent cache
+TEMPLATES_CACHE_LIMIT = CacheSizeLimit(["templates"], 20 * 1024 * 1024)
+
 
 class NodeType(Enum):
     """Enum that identifies the cluster node type."""
@@ -71,7 +102,7 @@ def get_cluster_name(stack_name):
 def get_stack_template(stack_name):
     """Get the template used for the given stack."""
     try:
-        template = boto3.client("cloudformation").get_template(StackName=stack_name).get("TemplateBody")
+        template = get_boto3_client("cloudformation").get_template(StackName=stack_name).get("TemplateBody")
     except ClientError as client_err:
         error(
             "Unable to get template for stack {stack_name}.\n{err_msg}".format(
@@ -96,7 +127,7 @@ def _wait_for_update(stack_name):
 def update_stack_template(stack_name, updated_template, cfn_parameters):
     """Update stack_name's template to that represented by updated_template."""
     try:
-        boto3.client("cloudformation").update_stack(
+        get_boto3_client("cloudformation").update_stack(
             StackName=stack_name,
             TemplateBody=json.dumps(updated_template, indent=2),  # Indent so it looks nice in the console
             Parameters=cfn_parameters,
@@ -154,7 +185,7 @@ def create_s3_bucket(bucket_name, region):
     :param region: aws region
     :raise ClientError if bucket creation fails
     """
-    s3_client = boto3.client("s3")
+    s3_client = get_boto3_client("s3")
     """ :type : pyboto3.s3 """
     if region != "us-east-1":
         s3_client.create_bucket(Bucket=bucket_name, CreateBucketConfiguration={"LocationConstraint": region})
@@ -175,7 +206,7 @@ def check_s3_bucket_exists(bucket_name):
 
     :param bucket_name: name of the S3 bucket to check
     """
-    s3_client = boto3.client("s3")
+    s3_client = get_boto3_client("s3")
     """ :type : pyboto3.s3 """
     try:
         s3_client.head_bucket(Bucket=bucket_name)
@@ -185,7 +216,7 @@ def check_s3_bucket_exists(bucket_name):
 
 
 def _configure_s3_bucket(bucket_name):
-    s3_client = boto3.client("s3")
+    s3_client = get_boto3_client("s3")
     s3_client.put_bucket_versioning(Bucket=bucket_name, VersioningConfiguration={"Status": "Enabled"})
     s3_client.put_bucket_encryption(
         Bucket=bucket_name,
@@ -209,11 +240,11 @@ def delete_s3_bucket(bucket_name):
     """
     try:
         LOGGER.info("Deleting bucket %s", bucket_name)
-        bucket = boto3.resource("s3").Bucket(bucket_name)
+        bucket = get_boto3_resource("s3").Bucket(bucket_name)
         bucket.objects.all().delete()
         bucket.object_versions.delete()
         bucket.delete()
-    except boto3.client("s3").exceptions.NoSuchBucket:
+    except get_boto3_client("s3").exceptions.NoSuchBucket:
         pass
     except ClientError as client_err:
         LOGGER.warning(
@@ -232,10 +263,10 @@ def delete_s3_artifacts(bucket_name, artifact_directory):
     """
     try:
         LOGGER.info("Deleting artifacts under %s/%s", bucket_name, artifact_directory)
-        bucket = boto3.resource("s3").Bucket(bucket_name)
+        bucket = get_boto3_resource("s3").Bucket(bucket_name)
         bucket.objects.filter(Prefix="%s/" % artifact_directory).delete()
         bucket.object_versions.filter(Prefix="%s/" % artifact_directory).delete()
-    except boto3.client("s3").exceptions.NoSuchBucket:
+    except get_boto3_client("s3").exceptions.NoSuchBucket:
         pass
     except ClientError as client_err:
         LOGGER.warning(
@@ -265,62 +296,225 @@ def _add_file_to_zip(zip_file, path, arcname):
     """
     Add the file at path under the name arcname to the archive represented by zip_file.
 
+    The file is compressed while being read, with fixed timestamp and permissions.
     :param zip_file: zipfile.ZipFile object
     :param path: string; path to file being added
     :param arcname: string; filename to put bytes from path under in created archive
     """
+    zinfo = zipfile.ZipInfo(filename=arcname, date_time=ZIP_ENTRIES_DATE_TIME)
+    zinfo.external_attr = 0o644 << 16
+    # The default depends on the platform building the archive
+    zinfo.create_system = 3
+    zinfo.compress_type = zip_file.compression
+    zinfo.file_size = os.path.getsize(path)
     with open(path, "rb") as input_file:
-        zinfo = zipfile.ZipInfo(filename=arcname)
-        zinfo.external_attr = 0o644 << 16
-        zip_file.writestr(zinfo, input_file.read())
+        if sys.version_info >= (3, 6):
+            with zip_file.open(zinfo, "w") as output_file:
+                shutil.copyfileobj(input_file, output_file, FILE_CHUNK_SIZE)
+        else:
+            # Entries cannot be written as streams before Python 3.6
+            zip_file.writestr(zinfo, input_file.read())
+
+
+def _list_dir_files(path):
+    """Return the paths relative to path of the files to archive, sorted and excluding the Python bytecode."""
+    files = []
+    for root, dirs, file_names in os.walk(path):
+        dirs[:] = [dir_name for dir_name in dirs if dir_name != "__pycache__"]
+        files.extend(
+            os.path.relpath(os.path.join(root, file_name), start=path)
+            for file_name in file_names
+            if not file_name.endswith((".pyc", ".pyo"))
+        )
+    return sorted(files, key=lambda relative_path: relative_path.replace(os.sep, "/"))
 
 
-def zip_dir(path):
+def zip_dir(path, file_out=None):
     """
     Create a zip archive containing all files and dirs rooted in path.
 
-    The archive is created in memory and a file handler is returned by the function.
+    Entries are sorted and have fixed timestamps, so that the same files always give the same archive.
     :param path: directory containing the resources to archive.
+    :param file_out: binary file object where the archive is written, by default a new in-memory buffer.
+                     Unseekable streams, e.g. pipes, are written sequentially.
     :return file handler pointing to the compressed archive.
     """
-    file_out = BytesIO()
+    if file_out is None:
+        file_out = BytesIO()
     with zipfile.ZipFile(file_out, "w", zipfile.ZIP_DEFLATED) as ziph:
-        for root, _, files in os.walk(path):
-            for file in files:
-                _add_file_to_zip(
-                    ziph,
-                    os.path.join(root, file),
-                    os.path.relpath(os.path.join(root, file), start=path),
-                )
-    file_out.seek(0)
+        for relative_path in _list_dir_files(path):
+            _add_file_to_zip(ziph, os.path.join(path, relative_path), relative_path)
+    if file_out.seekable():
+        file_out.seek(0)
     return file_out
 
 
+def _get_dir_hash(path):
+    """Return the SHA-256 of the names and the content of the files archived by zip_dir."""
+    dir_hash = hashlib.sha256("{0}\0".format(ZIP_ARCHIVE_FORMAT_VERSION).encode("utf-8"))
+    for relative_path in _list_dir_files(path):
+        file_path = os.path.join(path, relative_path)
+        header = "{0}\0{1}\0".format(relative_path.replace(os.sep, "/"), os.path.getsize(file_path))
+        dir_hash.update(header.encode("utf-8"))
+        with open(file_path, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(FILE_CHUNK_SIZE), b""):
+                dir_hash.update(chunk)
+    return dir_hash.hexdigest()
+
+
+def _get_cached_dir_archive(path):
+    """
+    Return the path of the zip archive of the directory stored in the persistent cache, building it if missing.
+
+    Archives are named by the hash of the archived files, so they are rebuilt only when the content changes.
+    Return None when the cache cannot be used.
+    """
+    if not MetadataCache.is_enabled():
+        return None
+    try:
+        archive_path = os.path.join(get_cache_dir(), "artifacts", _get_dir_hash(path) + ".zip")
+        if os.path.isfile(archive_path):
+            LOGGER.debug("Using cached archive %s for %s", archive_path, path)
+            # The least recently written entries are the first evicted from the cache
+            os.utime(archive_path, None)
+            return archive_path
+        if not os.path.isdir(os.path.dirname(archive_path)):
+            os.makedirs(os.path.dirname(archive_path))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(archive_path))
+        with os.fdopen(fd, "wb") as archive_file:
+            zip_dir(path, archive_file)
+        try:
+            os.rename(tmp_path, archive_path)
+        except OSError:
+            # Already built by a concurrent upload, with the same content
+            os.remove(tmp_path)
+        ARTIFACTS_CACHE_LIMIT.add(os.path.getsize(archive_path))
+        return archive_path
+    except (IOError, OSError) as e:
+        LOGGER.debug("Unable to store the archive of %s in the cache: %s", path, e)
+        return None
+
+
+class _ArchiveStreamReader(object):
+    """Read end of the pipe where a dir archive is written, failing at the end of the stream if the writer failed."""
+
+    def __init__(self, stream, writer_errors):
+        self.stream = stream
+        self.writer_errors = writer_errors
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        if not data and self.writer_errors:
+            # Fail the upload instead of storing a truncated archive
+            raise self.writer_errors[0]
+        return data
+
+
+def _upload_dir_archive_stream(bucket, path, key):
+    """
+    Upload the zip archive of the directory while it is built, without storing it.
+
+    The archive is written by a thread into a pipe and uploaded in chunks from the other end of the pipe,
+    with a multipart upload, so only the chunk being uploaded is kept in memory.
+    """
+    read_fd, write_fd = os.pipe()
+    writer_errors = []
+
+    def _write_archive():
+        archive_stream = os.fdopen(write_fd, "wb")
+        try:
+            zip_dir(path, archive_stream)
+        except Exception as e:
+            # Also raised when the upload fails and the read end of the pipe is closed
+            writer_errors.append(e)
+        finally:
+            try:
+                archive_stream.close()
+            except (IOError, OSError):
+                pass
+
+    writer = threading.Thread(target=_write_archive)
+    writer.daemon = True
+    writer.start()
+    try:
+        with os.fdopen(read_fd, "rb") as archive_stream:
+            bucket.upload_fileobj(_ArchiveStreamReader(archive_stream, writer_errors), key)
+    finally:
+        writer.join()
+
+
 def upload_resources_artifacts(bucket_name, artifact_directory, root):
     """
     Upload to the specified S3 bucket the content of the directory rooted in root path.
 
     All dirs contained in root dir will be uploaded as zip files to $bucket_name/$dir_name/artifacts.zip.
     All files contained in root dir will be uploaded to $bucket_name.
+    Archives are built on disk, taken from the persistent cache when the content of the dir didn't change, and
+    they are uploaded in chunks, with multipart uploads for the large ones. When the cache is disabled archives are
+    uploaded while being built.
 
     :param bucket_name: name of the S3 bucket where files are uploaded
     :param root: root directory containing the resources to upload.
     """
-    bucket = boto3.resource("s3").Bucket(bucket_name)
-    for res in os.listdir(root):
+    bucket = get_boto3_resource("s3").Bucket(bucket_name)
+    for res in sorted(os.listdir(root)):
         if os.path.isdir(os.path.join(root, res)):
-            bucket.upload_fileobj(zip_dir(os.path.join(root, res)), "%s/%s/artifacts.zip" % (artifact_directory, res))
+            key = "%s/%s/artifacts.zip" % (artifact_directory, res)
+            archive_path = _get_cached_dir_archive(os.path.join(root, res))
+            if archive_path:
+                bucket.upload_file(archive_path, key)
+            else:
+                _upload_dir_archive_stream(bucket, os.path.join(root, res), key)
         elif os.path.isfile(os.path.join(root, res)):
             bucket.upload_file(os.path.join(root, res), "%s/%s" % (artifact_directory, res))
 
 
+def put_s3_object_if_changed(bucket_name, key, body, check_existing=True):
+    """
+    Upload the content to the S3 object, unless the object already exists with the same content.
+
+    The SHA-256 of the content is stored in the object metadata and compared with the one of the existing object,
+    objects uploaded without it are always replaced.
+
+    :param bucket_name: name of the S3 bucket
+    :param key: key of the object
+    :param body: content of the object, bytes or string
+    :param check_existing: False to skip the check, e.g. when the key is known to be new
+    :return the VersionId of the object, None if the bucket is not versioned
+    """
+    if not isinstance(body, bytes):
+        body = body.encode("utf-8")
+    content_hash = hashlib.sha256(body).hexdigest()
+    s3_client = get_boto3_client("s3")
+    if check_existing:
+        try:
+            existing_object = s3_client.head_object(Bucket=bucket_name, Key=key)
+            if existing_object.get("Metadata", {}).get(CONTENT_HASH_METADATA_KEY) == content_hash:
+                LOGGER.debug("Object %s in bucket %s is up to date, skipping upload", key, bucket_name)
+                return existing_object.get("VersionId")
+        except ClientError as e:
+            # 403 is returned for missing objects without the s3:ListBucket permission
+            if e.response.get("Error", {}).get("Code") not in ["404", "403", "NoSuchKey"]:
+                raise
+    result = s3_client.put_object(
+        Bucket=bucket_name, Key=key, Body=body, Metadata={CONTENT_HASH_METADATA_KEY: content_hash}
+    )
+    return result.get("VersionId")
+
+
 def get_supported_instance_types():
     """Return the list of instance types available in the given region."""
-    ec2_client = boto3.client("ec2")
+    supported_instance_types = MetadataCache.get("instance_type_offerings", "region")
+    if supported_instance_types is not None:
+        return supported_instance_types
+
+    ec2_client = get_boto3_client("ec2")
     try:
-        return [
+        supported_instance_types = [
             offering.get("InstanceType") for offering in paginate_boto3(ec2_client.describe_instance_type_offerings)
         ]
+        MetadataCache.put("instance_type_offerings", "region", supported_instance_types)
+        return supported_instance_types
     except ClientError as client_err:
         error(
             "Error when getting supported instance types via DescribeInstanceTypeOfferings: {0}".format(
@@ -342,7 +536,7 @@ def _call_create_compute_environment_with_bad_instance_type():
     For more information on why this would be done, see the docstring for
     _get_supported_instance_types_create_compute_environment_error_message.
     """
-    batch_client = boto3.client("batch")
+    batch_client = get_boto3_client("batch")
     nonexistent_instance_type = "p8.84xlarge"
     batch_client.create_compute_environment(
         computeEnvironmentName="dummy",
@@ -508,12 +702,17 @@ def get_supported_az_for_multi_instance_types(instance_types):
     missing_instance_types = []
     result = {}
     for instance_type in instance_types:
+        if instance_type not in cache:
+            # AZ names are mapped differently for every account
+            cached_azs = MetadataCache.get("instance_type_azs", instance_type, account_specific=True)
+            if cached_azs is not None:
+                cache[instance_type] = tuple(cached_azs)
         if instance_type in cache:
             result[instance_type] = cache[instance_type]
         else:
             missing_instance_types.append(instance_type)
     if missing_instance_types:
-        ec2_client = boto3.client("ec2")
+        ec2_client = get_boto3_client("ec2")
         paginator = ec2_client.get_paginator("describe_instance_type_offerings")
         page_iterator = paginator.paginate(
             LocationType="availability-zone", Filters=[{"Name": "instance-type", "Values": missing_instance_types}]
@@ -526,6 +725,7 @@ def get_supported_az_for_multi_instance_types(instance_types):
                 offering["Location"] for offering in offerings if offering["InstanceType"] == instance_type
             )
             result[instance_type] = cache[instance_type]
+            MetadataCache.put("instance_type_azs", instance_type, list(cache[instance_type]), account_specific=True)
     return result
 
 
@@ -540,10 +740,12 @@ def get_availability_zone_of_subnet(subnet_id):
         get_availability_zone_of_subnet.cache = {}
     cache = get_availability_zone_of_subnet.cache
     if subnet_id not in cache:
+        cache[subnet_id] = MetadataCache.get("subnet_azs", subnet_id, account_specific=True)
+    if cache[subnet_id] is None:
         try:
-            cache[subnet_id] = (
-                boto3.client("ec2").describe_subnets(SubnetIds=[subnet_id]).get("Subnets")[0].get("AvailabilityZone")
-            )
+            ec2 = get_boto3_client("ec2")
+            cache[subnet_id] = ec2.describe_subnets(SubnetIds=[subnet_id]).get("Subnets")[0].get("AvailabilityZone")
+            MetadataCache.put("subnet_azs", subnet_id, cache[subnet_id], account_specific=True)
         except ClientError as e:
             LOGGER.debug(
                 "Unable to detect availability zone for subnet {0}.\n{1}".format(
@@ -604,7 +806,7 @@ def get_stack(stack_name, cfn_client=None, raise_on_error=False):
     """
     try:
         if not cfn_client:
-            cfn_client = boto3.client("cloudformation")
+            cfn_client = get_boto3_client("cloudformation")
         return retry_on_boto3_throttling(cfn_client.describe_stacks, StackName=stack_name).get("Stacks")[0]
     except ClientError as e:
         if raise_on_error:
@@ -629,7 +831,7 @@ def stack_exists(stack_name):
 
 def get_stack_resources(stack_name):
     """Get the given stack's resources."""
-    cfn_client = boto3.client("cloudformation")
+    cfn_client = get_boto3_client("cloudformation")
     try:
         return retry_on_boto3_throttling(cfn_client.describe_stack_resources, StackName=stack_name).get(
             "StackResources"
@@ -643,7 +845,7 @@ def get_stack_resources(stack_name):
 
 
 def get_stack_events(stack_name, raise_on_error=False):
-    cfn_client = boto3.client("cloudformation")
+    cfn_client = get_boto3_client("cloudformation")
     try:
         return retry_on_boto3_throttling(cfn_client.describe_stack_events, StackName=stack_name).get("StackEvents")
     except ClientError as client_err:
@@ -674,20 +876,7 @@ def verify_stack_creation(stack_name, cfn_client):
     :param cfn_client: the CloudFormation client to use to verify stack status
     :return: True if the creation was successful, false otherwise.
     """
-    status = get_stack(stack_name, cfn_client).get("StackStatus")
-    resource_status = ""
-    while status == "CREATE_IN_PROGRESS":
-        status = get_stack(stack_name, cfn_client).get("StackStatus")
-        events = get_stack_events(stack_name, raise_on_error=True)[0]
-        resource_status = ("Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))).ljust(
-            80
-        )
-        sys.stdout.write("\r%s" % resource_status)
-        sys.stdout.flush()
-        time.sleep(5)
-    # print the last status update in the logs
-    if resource_status != "":
-        LOGGER.debug(resource_status)
+    status = StackWatcher(stack_name, cfn_client).wait(in_progress_statuses=["CREATE_IN_PROGRESS"]).get("StackStatus")
     if status != "CREATE_COMPLETE":
         LOGGER.critical("\nCluster creation failed.  Failed events:")
         _log_stack_failure_recursive(stack_name)
@@ -735,11 +924,6 @@ def get_templates_bucket_path():
     )
 
 
-def get_installed_version():
-    """Get the version of the installed aws-parallelcluster package."""
-    return pkg_resources.get_distribution("aws-parallelcluster").version
-
-
 def check_if_latest_version():
     """Check if the current package version is the latest one."""
     try:
@@ -787,7 +971,7 @@ def get_efs_mount_target_id(efs_fs_id, avail_zone):
     """
     mount_target_id = None
     if efs_fs_id:
-        mount_targets = boto3.client("efs").describe_mount_targets(FileSystemId=efs_fs_id)
+        mount_targets = get_boto3_client("efs").describe_mount_targets(FileSystemId=efs_fs_id)
 
         for mount_target in mount_targets.get("MountTargets"):
             # Check to see if there is an existing mt in the az of the stack
@@ -812,7 +996,7 @@ def _describe_cluster_instances_iterator(
     instance_state=("pending", "running", "stopping", "stopped"),
 ):
     try:
-        ec2 = boto3.client("ec2")
+        ec2 = get_boto3_client("ec2")
         filters = [
             {"Name": "tag:Application", "Values": [stack_name]},
             {"Name": "instance-state-name", "Values": list(instance_state)},
@@ -862,7 +1046,7 @@ def _get_head_node_ip(stack_name):
 
 
 def get_head_node_ip_and_username(cluster_name):
-    cfn = boto3.client("cloudformation")
+    cfn = get_boto3_client("cloudformation")
     try:
         stack_name = get_stack_name(cluster_name)
 
@@ -905,7 +1089,7 @@ def get_head_node_state(stack_name):
 def get_info_for_amis(ami_ids):
     """Get information returned by EC2's describe-images API for the given list of AMIs."""
     try:
-        return boto3.client("ec2").describe_images(ImageIds=ami_ids).get("Images")
+        return get_boto3_client("ec2").describe_images(ImageIds=ami_ids).get("Images")
     except ClientError as e:
         error(e.response.get("Error").get("Message"))
 
@@ -939,10 +1123,6 @@ def get_supported_architectures_for_instance_type(instance_type):
     return supported_architectures
 
 
-def get_cli_log_file():
-    return os.path.expanduser(os.path.join("~", ".parallelcluster", "pcluster-cli.log"))
-
-
 def retry(func, func_args, attempts=1, wait=0):
     """
     Call function and re-execute it if it raises an Exception.
@@ -950,19 +1130,10 @@ def retry(func, func_args, attempts=1, wait=0):
     :param func: the function to execute.
     :param func_args: the positional arguments of the function.
     :param attempts: the maximum number of attempts. Default: 1.
-    :param wait: delay between attempts. Default: 0.
+    :param wait: base delay between attempts, growing exponentially with random jitter. Default: 0.
     :returns: the result of the function.
     """
-    while attempts:
-        try:
-            return func(*func_args)
-        except Exception as e:
-            attempts -= 1
-            if not attempts:
-                raise e
-
-            LOGGER.debug("{0}, retrying in {1} seconds..".format(e, wait))
-            time.sleep(wait)
+    return retry_call(func, func_args, should_retry=lambda e: True, max_attempts=attempts, base_delay=wait)
 
 
 def get_asg_name(stack_name):
@@ -981,7 +1152,7 @@ def get_asg_name(stack_name):
 
 
 def set_asg_limits(asg_name, min, max, desired):
-    asg = boto3.client("autoscaling")
+    asg = get_boto3_client("autoscaling")
     asg.update_auto_scaling_group(
         AutoScalingGroupName=asg_name, MinSize=int(min), MaxSize=int(max), DesiredCapacity=int(desired)
     )
@@ -1000,7 +1171,7 @@ def get_batch_ce(stack_name):
 
 
 def get_batch_ce_capacity(stack_name):
-    client = boto3.client("batch")
+    client = get_boto3_client("batch")
 
     return (
         client.describe_compute_environments(computeEnvironments=[get_batch_ce(stack_name)])
@@ -1010,21 +1181,15 @@ def get_batch_ce_capacity(stack_name):
     )
 
 
-def retry_on_boto3_throttling(func, wait=5, *args, **kwargs):
-    while True:
-        try:
-            return func(*args, **kwargs)
-        except ClientError as e:
-            if e.response["Error"]["Code"] != "Throttling":
-                raise
-            LOGGER.debug("Throttling when calling %s function. Will retry in %d seconds.", func.__name__, wait)
-            time.sleep(wait)
+def retry_on_boto3_throttling(func, *args, **kwargs):
+    """Call the boto3 client method, retrying it with jittered exponential backoff if throttled. See retries."""
+    return retry_on_throttling(func, *args, **kwargs)
 
 
 def get_asg_settings(stack_name):
     try:
         asg_name = get_asg_name(stack_name)
-        asg_client = boto3.client("autoscaling")
+        asg_client = get_boto3_client("autoscaling")
         return asg_client.describe_auto_scaling_groups(AutoScalingGroupNames=[asg_name]).get("AutoScalingGroups")[0]
     except Exception as e:
         LOGGER.error("Failed when retrieving data for ASG %s with exception %s", asg_name, e)
@@ -1093,34 +1258,193 @@ def is_hit_enabled_cluster(cfn_stack):
     )
 
 
-def read_remote_file(url):
-    """Read a remote file from an HTTP or S3 url."""
+def read_remote_file(url, max_age=0):
+    """
+    Read a remote file from an HTTP or S3 url.
+
+    Files are kept in the local cache with their ETag and Last-Modified headers and they are revalidated with a
+    conditional request, so they are downloaded again only when changed.
+
+    :param url: the HTTP or S3 url of the file
+    :param max_age: files validated less than max_age seconds ago are returned without any request, it must be used
+    only for files that are not expected to change, e.g. the ones bound to the installed version
+    """
     try:
+        cacheable = urlparse(url).scheme in ["s3", "http", "https"]
+        cached_file = _get_cached_remote_file(url) if cacheable else None
+        if cached_file and time.time() - cached_file["validated_at"] < max_age:
+            LOGGER.debug("Using cached remote file %s", url)
+            return cached_file["content"]
+
         if urlparse(url).scheme == "s3":
-            match = re.match(r"s3://(.*?)/(.*)", url)
-            bucket, key = match.group(1), match.group(2)
-            file_contents = boto3.resource("s3").Object(bucket, key).get()["Body"].read().decode("utf-8")
+            remote_file = _read_s3_file(url, cached_file)
         else:
-            with urllib.request.urlopen(url) as f:
-                file_contents = f.read().decode("utf-8")
-        return file_contents
+            remote_file = _read_http_file(url, cached_file)
+        if cacheable:
+            remote_file["validated_at"] = time.time()
+            MetadataCache.put("remote_files", url, remote_file)
+        return remote_file["content"]
     except Exception as e:
         LOGGER.error("Failed when reading remote file from url %s: %s", url, e)
         raise e
 
 
+def _get_cached_remote_file(url):
+    """Return the cached remote file, None if not cached or if the content doesn't match its checksum."""
+    cached_file = MetadataCache.get("remote_files", url, ttl=REMOTE_FILES_CACHE_TTL)
+    if not cached_file:
+        return None
+    if hashlib.sha256(cached_file.get("content", "").encode("utf-8")).hexdigest() != cached_file.get("sha256"):
+        LOGGER.debug("Checksum mismatch for cached remote file %s", url)
+        return None
+    return cached_file
+
+
+def _make_remote_file(content, etag=None, last_modified=None, version_id=None):
+    return {
+        "content": content,
+        "sha256": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        "etag": etag,
+        "last_modified": last_modified,
+        "version_id": version_id,
+    }
+
+
+def _read_s3_file(url, cached_file):
+    """Download the S3 object, unless its ETag matches the one of the cached file."""
+    match = re.match(r"s3://(.*?)/(.*)", url)
+    bucket, key = match.group(1), match.group(2)
+    conditions = {"IfNoneMatch": cached_file["etag"]} if cached_file and cached_file.get("etag") else {}
+    try:
+        response = get_boto3_resource("s3").Object(bucket, key).get(**conditions)
+    except ClientError as e:
+        if conditions and e.response.get("Error", {}).get("Code") in ["304", "NotModified"]:
+            LOGGER.debug("Remote file %s not modified", url)
+            return cached_file
+        raise
+    return _make_remote_file(
+        response["Body"].read().decode("utf-8"), etag=response.get("ETag"), version_id=response.get("VersionId")
+    )
+
+
+def _read_http_file(url, cached_file):
+    """Download the file, unless the server tells it has not been modified since the cached file was downloaded."""
+    request = urllib.request.Request(url)
+    if cached_file and cached_file.get("etag"):
+        request.add_header("If-None-Match", cached_file["etag"])
+    if cached_file and cached_file.get("last_modified"):
+        request.add_header("If-Modified-Since", cached_file["last_modified"])
+    try:
+        with urllib.request.urlopen(request) as f:
+            return _make_remote_file(
+                f.read().decode("utf-8"), etag=f.headers.get("ETag"), last_modified=f.headers.get("Last-Modified")
+            )
+    except urllib.error.HTTPError as e:
+        if cached_file and e.code == 304:
+            LOGGER.debug("Remote file %s not modified", url)
+            return cached_file
+        raise
+
+
+class _TemplateSourceLoader(BaseLoader):
+    """Jinja loader serving the template strings registered by render_template, named by the hash of their content."""
+
+    def __init__(self):
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def register(self, template_str):
+        """Register the template string and return its name."""
+        name = hashlib.sha256(template_str.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._sources.setdefault(name, template_str)
+        return name
+
+    def get_source(self, environment, template):
+        with self._lock:
+            source = self._sources.get(template)
+        if source is None:
+            raise TemplateNotFound(template)
+        # The name identifies the content, so compiled templates never get stale
+        return source, None, lambda: True
+
+
+class _TemplateBytecodeCache(BytecodeCache):
+    """
+    Jinja bytecode cache stored in the directory of the persistent metadata cache.
+
+    Templates are compiled once for all the commands using them, entries are named by the hash of the template content
+    and Jinja discards those compiled by a different Python version. The cache is bypassed when the metadata cache is
+    disabled and its size is bounded by TEMPLATES_CACHE_LIMIT.
+    """
+
+    @staticmethod
+    def _get_path(bucket):
+        return os.path.join(get_cache_dir(), "templates", bucket.key + ".jinja")
+
+    def load_bytecode(self, bucket):
+        if not MetadataCache.is_enabled():
+            return
+        try:
+            with open(self._get_path(bucket), "rb") as bytecode_file:
+                bucket.load_bytecode(bytecode_file)
+        except (IOError, OSError):
+            pass
+        except Exception as e:
+            LOGGER.debug("Unable to load compiled template %s: %s", bucket.key, e)
+
+    def dump_bytecode(self, bucket):
+        if not MetadataCache.is_enabled():
+            return
+        path = self._get_path(bucket)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as bytecode_file:
+                bucket.write_bytecode(bytecode_file)
+            try:
+                os.rename(tmp_path, path)
+            except OSError:
+                # Already stored by a concurrent command, with the same content
+                os.remove(tmp_path)
+            TEMPLATES_CACHE_LIMIT.add(os.path.getsize(path))
+        except (IOError, OSError) as e:
+            LOGGER.debug("Unable to store compiled template %s: %s", bucket.key, e)
+
+
+_template_environment = None
+_template_environment_lock = threading.Lock()
+
+
+def _get_template_environment():
+    """Return the Jinja environment shared by all the renderings, created at first use."""
+    global _template_environment
+    with _template_environment_lock:
+        if _template_environment is None:
+            environment = Environment(
+                loader=_TemplateSourceLoader(),
+                cache_size=COMPILED_TEMPLATES_CACHE_SIZE,
+                bytecode_cache=_TemplateBytecodeCache(),
+            )
+            environment.filters["sha1"] = lambda value: hashlib.sha1(value.strip().encode()).hexdigest()
+            environment.filters["bool"] = lambda value: value.lower() == "true"
+            _template_environment = environment
+        return _template_environment
+
+
 def render_template(template_str, params_dict, tags, config_version=None):
     """
     Render a Jinja template and return the rendered output.
 
+    Templates are compiled once and kept by content hash, in memory and in the persistent metadata cache.
+
     :param template_str: Template file contents as a string
     :param params_dict: Template parameters dict
     """
     try:
-        environment = Environment(loader=BaseLoader)
-        environment.filters["sha1"] = lambda value: hashlib.sha1(value.strip().encode()).hexdigest()
-        environment.filters["bool"] = lambda value: value.lower() == "true"
-        template = environment.from_string(template_str)
+        environment = _get_template_environment()
+        template = environment.get_template(environment.loader.register(template_str))
         output_from_parsed_template = template.render(config=params_dict, config_version=config_version, tags=tags)
         return output_from_parsed_template
     except Exception as e:
@@ -1159,7 +1483,7 @@ def get_ebs_snapshot_info(ebs_snapshot_id, raise_exceptions=False):
     }
     """
     try:
-        return boto3.client("ec2").describe_snapshots(SnapshotIds=[ebs_snapshot_id]).get("Snapshots")[0]
+        return get_boto3_client("ec2").describe_snapshots(SnapshotIds=[ebs_snapshot_id]).get("Snapshots")[0]
     except ClientError as e:
         if raise_exceptions:
             raise
@@ -1177,9 +1501,11 @@ def get_default_instance_type():
     cache = get_default_instance_type.cache
     region = os.environ.get("AWS_DEFAULT_REGION")
     if region not in cache:
+        cache[region] = MetadataCache.get("default_instance_type", "region")
+    if cache[region] is None:
         free_tier_instance_type = []
         for page in paginate_boto3(
-            boto3.client("ec2").describe_instance_types,
+            get_boto3_client("ec2").describe_instance_types,
             Filters=[
                 {"Name": "free-tier-eligible", "Values": ["true"]},
                 {"Name": "current-generation", "Values": ["true"]},
@@ -1187,11 +1513,21 @@ def get_default_instance_type():
         ):
             free_tier_instance_type.append(page)
         cache[region] = free_tier_instance_type[0]["InstanceType"] if free_tier_instance_type else "t3.micro"
+        MetadataCache.put("default_instance_type", "region", cache[region])
     return cache[region]
 
 
 class Cache:
-    """Simple utility class providing a cache mechanism for expensive functions."""
+    """
+    Utility class providing a cache mechanism for expensive functions.
+
+    Every decorated function gets its own bounded cache, where the least recently used results are evicted when the
+    maximum size is reached and results older than the optional TTL are recomputed. Caches can be safely accessed by
+    multiple threads. Hit, miss and eviction counters are logged at the end of every command and they are printed when
+    the PCLUSTER_CACHE_STATS environment variable is set.
+    """
+
+    DEFAULT_MAXSIZE = 256
 
     _caches = []
 
@@ -1206,39 +1542,118 @@ class Cache:
         for cache in Cache._caches:
             cache.clear()
 
+    @staticmethod
+    def get_statistics():
+        """Return a dict with the hit, miss and eviction counters of every cache, by cache name."""
+        return {cache.name: cache.get_statistics() for cache in Cache._caches}
+
     @staticmethod
     def _make_key(args, kwargs):
-        key = args
-        if kwargs:
-            for item in kwargs.items():
-                key += item
-        return hash(key)
+        # Keys are compared by equality, so different arguments never share the same entry
+        return args, (tuple(sorted(kwargs.items())) if kwargs else ())
 
     @staticmethod
-    def cached(function):
+    def cached(function=None, maxsize=DEFAULT_MAXSIZE, ttl=None):
         """
         Decorate a function to make it use a results cache based on passed arguments.
 
+        It can be used either as @Cache.cached or as @Cache.cached(maxsize=..., ttl=...), with ttl in seconds.
         Note: all arguments must be hashable for this function to work properly.
         """
-        cache = {}
+        if function is None:
+            return functools.partial(Cache.cached, maxsize=maxsize, ttl=ttl)
+
+        cache = _LruCache(getattr(function, "__name__", repr(function)), maxsize, ttl)
         Cache._caches.append(cache)
 
         @functools.wraps(function)
         def wrapper(*args, **kwargs):
-            cache_key = Cache._make_key(args, kwargs)
+            if not Cache.is_enabled():
+                return function(*args, **kwargs)
 
-            if Cache.is_enabled() and cache_key in cache:
-                return cache[cache_key]
-            else:
+            cache_key = Cache._make_key(args, kwargs)
+            found, return_value = cache.get(cache_key)
+            if not found:
                 return_value = function(*args, **kwargs)
-                if Cache.is_enabled():
-                    cache[cache_key] = return_value
-                return return_value
+                cache.put(cache_key, return_value)
+            return return_value
+
+        def prime(return_value, *args, **kwargs):
+            """Store the result of a call computed elsewhere, e.g. by a batched request."""
+            if Cache.is_enabled():
+                cache.put(Cache._make_key(args, kwargs), return_value)
 
+        def is_cached(*args, **kwargs):
+            """Tell if the result of the call is available in the cache."""
+            return Cache.is_enabled() and cache.contains(Cache._make_key(args, kwargs))
+
+        wrapper.cache = cache
+        wrapper.prime = prime
+        wrapper.is_cached = is_cached
         return wrapper
 
 
+class _LruCache:
+    """Thread-safe LRU cache with optional TTL, used by Cache.cached."""
+
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key):
+        """Return a (found, value) tuple for the given key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, timestamp = entry
+                if self.ttl is None or time.time() - timestamp <= self.ttl:
+                    # Move the entry at the end of the queue to mark it as the most recently used
+                    del self._entries[key]
+                    self._entries[key] = entry
+                    self._hits += 1
+                    return True, value
+                del self._entries[key]
+            self._misses += 1
+            return False, None
+
+    def contains(self, key):
+        """Tell if a valid entry exists for the given key, without affecting LRU order and counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or time.time() - entry[1] <= self.ttl)
+
+    def put(self, key, value):
+        """Store the value for the given key, evicting the least recently used entries if needed."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.time())
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def get_statistics(self):
+        """Return the counters of the cache."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
 class InstanceTypeInfo:
     """Data object wrapping the result of a describe_instance_types call."""
 
@@ -1251,14 +1666,19 @@ class InstanceTypeInfo:
         """
         Init InstanceTypeInfo by performing a describe_instance_types call.
 
-        Multiple calls for the same instance_type are cached.
+        Multiple calls for the same instance_type are cached, also across different executions of the CLI.
         The function exits with error if exit_on_error is set to True.
         """
+        instance_type_data = MetadataCache.get("instance_types", instance_type)
+        if instance_type_data is not None:
+            return InstanceTypeInfo(instance_type_data)
+
         try:
-            ec2_client = boto3.client("ec2")
-            return InstanceTypeInfo(
-                ec2_client.describe_instance_types(InstanceTypes=[instance_type]).get("InstanceTypes")[0]
-            )
+            ec2_client = get_boto3_client("ec2")
+            response = ec2_client.describe_instance_types(InstanceTypes=[instance_type])
+            instance_type_data = response.get("InstanceTypes")[0]
+            MetadataCache.put("instance_types", instance_type, instance_type_data)
+            return InstanceTypeInfo(instance_type_data)
         except ClientError as e:
             error(
                 "Failed when retrieving instance type data for instance {0}: {1}".format(
@@ -1267,6 +1687,48 @@ class InstanceTypeInfo:
                 exit_on_error,
             )
 
+    @staticmethod
+    def prefetch(instance_types):
+        """
+        Retrieve the data of the given instance types with as few describe_instance_types calls as possible.
+
+        Results are stored in the cache of init_from_instance_type, so that following calls don't hit EC2.
+        Errors are only logged: they are reported by init_from_instance_type when the instance type is used.
+        """
+        if not Cache.is_enabled():
+            return
+
+        init_from_instance_type = InstanceTypeInfo.init_from_instance_type
+        missing_instance_types = []
+        for instance_type in sorted(set(instance_types)):
+            if init_from_instance_type.is_cached(instance_type):
+                continue
+            instance_type_data = MetadataCache.get("instance_types", instance_type)
+            if instance_type_data is not None:
+                init_from_instance_type.prime(InstanceTypeInfo(instance_type_data), instance_type)
+            else:
+                missing_instance_types.append(instance_type)
+
+        if not missing_instance_types:
+            return
+        ec2_client = get_boto3_client("ec2")
+        for index in range(0, len(missing_instance_types), DESCRIBE_INSTANCE_TYPES_MAX_ITEMS):
+            instance_types_batch = missing_instance_types[index : index + DESCRIBE_INSTANCE_TYPES_MAX_ITEMS]
+            LOGGER.debug("Retrieving data for instance types: %s", ", ".join(instance_types_batch))
+            try:
+                for instance_type_data in paginate_boto3(
+                    ec2_client.describe_instance_types, InstanceTypes=instance_types_batch
+                ):
+                    instance_type = instance_type_data.get("InstanceType")
+                    MetadataCache.put("instance_types", instance_type, instance_type_data)
+                    init_from_instance_type.prime(InstanceTypeInfo(instance_type_data), instance_type)
+            except ClientError as e:
+                LOGGER.debug(
+                    "Unable to retrieve data for instance types %s: %s",
+                    ", ".join(instance_types_batch),
+                    e.response.get("Error").get("Message"),
+                )
+
     def gpu_count(self):
         """Return the number of GPUs for the instance."""
         gpu_info = self.instance_type_data.get("GpuInfo", None)
@@ -0,0 +1,203 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import glob
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+from multiprocessing.pool import ThreadPool
+
+from pcluster.config.pcluster_config import PclusterConfig
+
+LOGGER = logging.getLogger(__name__)
+
+# Default number of configurations validated concurrently
+DEFAULT_WORKERS = 8
+
+
+class _ReportingPclusterConfig(PclusterConfig):
+    """PclusterConfig collecting errors and warnings in a ValidationResult instead of printing them."""
+
+    def __init__(self, result, *args, **kwargs):
+        # Set before the initialization, that can fail too
+        self.result = result
+        super(_ReportingPclusterConfig, self).__init__(*args, **kwargs)
+
+    def _init_aws_credentials(self):
+        """
+        Check that the credentials in the [aws] section, if any, are the ones initialized for all the validations.
+
+        The environment is shared by the concurrent validations, so it is not modified.
+        """
+        aws_section = self.get_section("aws")
+        for param_key, env_variable in [
+            ("aws_access_key_id", "AWS_ACCESS_KEY_ID"),
+            ("aws_secret_access_key", "AWS_SECRET_ACCESS_KEY"),
+        ]:
+            value = aws_section.get_param_value(param_key) if aws_section else None
+            if value and value != os.environ.get(env_variable):
+                self.error(
+                    "The {0} in the [aws] section differs from the credentials used for all the validations, "
+                    "configurations with different credentials must be validated separately".format(param_key)
+                )
+
+    def error(self, message):
+        """Collect the error message and stop the validation."""
+        self.result.errors.append(message)
+        raise _ValidationFailed()
+
+    def warn(self, message):
+        """Collect the warning message."""
+        self.result.warnings.append(message)
+
+
+class _ValidationFailed(Exception):
+    pass
+
+
+class ValidationResult(object):
+    """Outcome of the validation of a cluster section of a configuration file."""
+
+    def __init__(self, config_file, cluster_template):
+        self.config_file = config_file
+        self.cluster_template = cluster_template
+        self.errors = []
+        self.warnings = []
+        self.duration = 0.0
+
+    @property
+    def passed(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            "config_file": self.config_file,
+            "cluster_template": self.cluster_template,
+            "status": "PASSED" if self.passed else "FAILED",
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "duration": round(self.duration, 3),
+        }
+
+
+def expand_config_files(patterns):
+    """
+    Return the configuration files matching the given paths or glob patterns, sorted and without duplicates.
+
+    Patterns matching no file are returned as they are, so that the missing files are reported as failures.
+    """
+    config_files = []
+    for pattern in patterns:
+        for config_file in sorted(glob.glob(pattern)) or [pattern]:
+            if config_file not in config_files:
+                config_files.append(config_file)
+    return config_files
+
+
+def validate_config(config_file, cluster_template=None):
+    """Validate the given cluster section of the configuration file, the default one if not specified."""
+    result = ValidationResult(config_file, cluster_template)
+    start_time = time.time()
+    try:
+        pcluster_config = _ReportingPclusterConfig(
+            result,
+            config_file=config_file,
+            cluster_label=cluster_template,
+            fail_on_file_absence=True,
+            fail_on_error=True,
+        )
+        result.cluster_template = pcluster_config.get_section("cluster").label
+        pcluster_config.validate()
+    except _ValidationFailed:
+        pass
+    except SystemExit as e:
+        # Raised by the few checks not reporting errors through PclusterConfig
+        result.errors.append(
+            "Validation failed with exit code {0}".format(e.code) if isinstance(e.code, int) else str(e.code)
+        )
+    except Exception as e:
+        LOGGER.debug("Validation of %s failed with exception", config_file, exc_info=True)
+        result.errors.append("Unexpected error of type {0}: {1}".format(type(e).__name__, e))
+    result.duration = time.time() - start_time
+    return result
+
+
+def validate_configs(config_files, cluster_templates=None, workers=DEFAULT_WORKERS):
+    """
+    Validate the given cluster sections of all the configuration files on a pool of worker threads.
+
+    All the validations run in the same process, so the boto3 clients and the caches of the AWS metadata are shared.
+    Since the region and the credentials are process-wide settings, they must be initialized by the caller, the
+    configurations with other credentials in the [aws] section fail the validation.
+
+    :param config_files: the configuration files to validate
+    :param cluster_templates: the labels of the cluster sections to validate in every file, by default the one
+    selected by the cluster_template parameter of each file
+    :param workers: the number of configurations validated concurrently
+    :return: the list of the ValidationResult, in the same order as files and templates
+    """
+    jobs = [
+        (config_file, cluster_template)
+        for config_file in config_files
+        for cluster_template in (cluster_templates or [None])
+    ]
+    if workers <= 1 or len(jobs) <= 1:
+        return [validate_config(*job) for job in jobs]
+
+    pool = ThreadPool(min(workers, len(jobs)))
+    try:
+        return pool.map(lambda job: validate_config(*job), jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def write_json_report(results, report_file):
+    """Write the results in a JSON document."""
+    report = {
+        "passed": sum(1 for result in results if result.passed),
+        "failed": sum(1 for result in results if not result.passed),
+        "results": [result.to_dict() for result in results],
+    }
+    with open(report_file, "w") as report_stream:
+        json.dump(report, report_stream, indent=2)
+
+
+def write_junit_report(results, report_file):
+    """Write the results in the JUnit XML format, a test case for every validated cluster section."""
+    testsuite = ElementTree.Element(
+        "testsuite",
+        name="pcluster-config validate",
+        tests=str(len(results)),
+        failures=str(sum(1 for result in results if not result.passed)),
+        errors="0",
+        time="{0:.3f}".format(sum(result.duration for result in results)),
+    )
+    for result in results:
+        testcase = ElementTree.SubElement(
+            testsuite,
+            "testcase",
+            classname=result.config_file,
+            name=result.cluster_template or "default",
+            time="{0:.3f}".format(result.duration),
+        )
+        if result.errors:
+            failure = ElementTree.SubElement(testcase, "failure", message=result.errors[0])
+            failure.text = "\n".join(result.errors)
+        if result.warnings:
+            ElementTree.SubElement(testcase, "system-out").text = "\n".join(
+                "WARNING: {0}".format(warning) for warning in result.warnings
+            )
+    ElementTree.ElementTree(testsuite).write(report_file, encoding="utf-8", xml_declaration=True)
+
+
+REPORT_WRITERS = {"json": write_json_report, "junit": write_junit_report}
@@ -17,8 +17,10 @@ import sys
 
 import argparse
 
+from pcluster import offline_catalog
 from pcluster.config.hit_converter import HitConverter
 from pcluster.config.pcluster_config import PclusterConfig, default_config_file_path
+from pcluster_config import bulk_validation
 
 
 def _err_and_exit(message):
@@ -68,6 +70,66 @@ def _parse_args(argv=None):
     )
     convert_parser.set_defaults(func=convert)
 
+    validate_parser = subparsers.add_parser(
+        "validate",
+        help=(
+            "Validate the 'cluster' sections of one or more ParallelCluster's configuration files, "
+            "without creating the clusters."
+        ),
+        epilog=(
+            "All the configurations are validated concurrently in the same region and with the same credentials, "
+            "taken from the environment or, if not set, from the [aws] section of the first configuration file."
+        ),
+    )
+    validate_parser.add_argument(
+        "-c",
+        "--config-file",
+        nargs="+",
+        help=(
+            "Configuration files to be validated, glob patterns (e.g. 'configs/*.ini') are expanded. "
+            "Default: {0}".format(default_config_file)
+        ),
+        default=[default_config_file],
+    )
+    validate_parser.add_argument(
+        "-t",
+        "--cluster-template",
+        nargs="+",
+        help=(
+            "Indicates the 'cluster' sections to validate in every configuration file. "
+            "If not specified the script will look for the cluster_template parameter in the [global] section "
+            "or will search for '[cluster default]'."
+        ),
+    )
+    validate_parser.add_argument("-r", "--region", help="Indicates the region to validate the configurations in.")
+    validate_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=bulk_validation.DEFAULT_WORKERS,
+        help="Number of configurations validated concurrently. Default: {0}".format(bulk_validation.DEFAULT_WORKERS),
+    )
+    validate_parser.add_argument("--report-file", help="Write a report of the validation results in the given file.")
+    validate_parser.add_argument(
+        "--report-format",
+        choices=sorted(bulk_validation.REPORT_WRITERS.keys()),
+        default="json",
+        help="Format of the report file. Default: json",
+    )
+    catalog_group = validate_parser.add_mutually_exclusive_group()
+    catalog_group.add_argument(
+        "--offline-catalog",
+        help=(
+            "Validate without calling AWS, by reading the responses of the AWS calls from the given catalog file "
+            "recorded with --record-catalog. AWS credentials are not needed."
+        ),
+    )
+    catalog_group.add_argument(
+        "--record-catalog",
+        help="Record the responses of the AWS calls performed by the validation in the given catalog file.",
+    )
+    validate_parser.set_defaults(func=validate)
+
     return parser.parse_args(argv)
 
 
@@ -116,6 +178,71 @@ def convert(args=None):
         sys.exit(1)
 
 
+def _start_catalog(args):
+    """Load the offline catalog or start recording a new one, as requested by the arguments."""
+    if args.offline_catalog:
+        try:
+            offline_catalog.use_catalog(args.offline_catalog)
+        except (IOError, OSError, ValueError) as e:
+            _err_and_exit("ERROR: Unable to load offline catalog {0}: {1}".format(args.offline_catalog, e))
+    elif args.record_catalog:
+        return offline_catalog.record_catalog()
+    return None
+
+
+def _stop_catalog(args, catalog):
+    """Store the recorded catalog, if any, and stop using the catalog."""
+    if catalog:
+        catalog.save(args.record_catalog)
+        print("{0} AWS calls recorded in {1}".format(catalog.get_calls_count(), args.record_catalog))
+    offline_catalog.stop_catalog()
+
+
+def _print_validation_results(results):
+    """Print the outcome of every validation and a summary, return the number of failed validations."""
+    for result in results:
+        print(
+            "{status} {config_file} [cluster {cluster_template}]".format(
+                status="PASSED" if result.passed else "FAILED",
+                config_file=result.config_file,
+                cluster_template=result.cluster_template or "default",
+            )
+        )
+        for message in result.errors:
+            print("  ERROR: {0}".format(message))
+        for message in result.warnings:
+            print("  WARNING: {0}".format(message))
+    failed = sum(1 for result in results if not result.passed)
+    print("{0} passed, {1} failed".format(len(results) - failed, failed))
+    return failed
+
+
+def validate(args=None):
+    """Command to validate cluster sections of many files, optionally using an offline catalog as data source."""
+    catalog = _start_catalog(args)
+    try:
+        config_files = bulk_validation.expand_config_files(args.config_file)
+        # Region and credentials are shared by all the validations, they are initialized before starting them
+        if args.region:
+            os.environ["AWS_DEFAULT_REGION"] = args.region
+        PclusterConfig.init_aws(config_file=config_files[0])
+
+        results = bulk_validation.validate_configs(config_files, args.cluster_template, workers=args.workers)
+        failed = _print_validation_results(results)
+        if args.report_file:
+            bulk_validation.REPORT_WRITERS[args.report_format](results, args.report_file)
+        if failed:
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print("Exiting...")
+        sys.exit(1)
+    except Exception as e:
+        _err_and_exit("Unexpected error of type {0}: {1}".format(type(e).__name__, e))
+    finally:
+        # The catalog is stored even if the validation fails, the failed calls are part of it
+        _stop_catalog(args, catalog)
+
+
 def main(argv=None):
     """Run the cli."""
     args = _parse_args(argv)
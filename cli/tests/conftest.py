@@ -12,6 +12,10 @@ import pytest
 from botocore.stub import Stubber
 from jinja2 import Environment, FileSystemLoader
 
+from pcluster.boto3_clients import Boto3ClientRegistry
+from pcluster.metadata_cache import MetadataCache
+from pcluster.retries import reset as reset_retries
+
 
 @pytest.fixture(autouse=True)
 def clear_env():
@@ -19,6 +23,26 @@ def clear_env():
         del os.environ["AWS_DEFAULT_REGION"]
 
 
+@pytest.fixture(autouse=True)
+def clear_boto3_client_registry():
+    """Drop the boto3 clients shared by previous tests."""
+    Boto3ClientRegistry.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolate_metadata_cache(mocker, tmp_path):
+    """Store the persistent metadata cache in a temporary directory, empty for every test."""
+    mocker.patch.dict(os.environ, {"PCLUSTER_CACHE_DIR": str(tmp_path / "cache")})
+    mocker.patch.object(MetadataCache, "_accounts", {})
+    MetadataCache.enable()
+
+
+@pytest.fixture(autouse=True)
+def clear_retry_quotas():
+    """Refill the retry quotas consumed by previous tests."""
+    reset_retries()
+
+
 @pytest.fixture(autouse=True)
 def mock_default_instance(mocker, request):
     """
@@ -96,7 +120,7 @@ def boto3_stubber(mocker, boto3_stubber_path):
     The function makes use of botocore.Stubber to mock the boto3 API calls.
     Multiple boto3 services can be mocked as part of the same test.
 
-    :param boto3_stubber_path is the path of the boto3 import to mock. (e.g. pcluster.config.validators.boto3)
+    :param boto3_stubber_path is the path of the boto3 import to mock. (e.g. pcluster.boto3_clients.boto3)
     """
     __tracebackhide__ = True
     created_stubbers = []
@@ -137,6 +161,8 @@ def boto3_stubber(mocker, boto3_stubber_path):
         # Add stubber to the collection of mocked clients. This allows to mock multiple clients.
         # Mocking twice the same client will replace the previous one.
         mocked_clients[service] = client
+        # Make sure the shared client registry serves the new mocked client.
+        Boto3ClientRegistry.clear()
         return client
 
     # yield allows to return the value and then continue the execution when the test is over.
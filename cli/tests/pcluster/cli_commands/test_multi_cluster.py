@@ -0,0 +1,191 @@
+"""This module provides unit tests for the functions in the pcluster.cli_commands.multi_cluster module."""
+
+import logging
+import sys
+import threading
+import time
+
+import pytest
+from argparse import Namespace
+from assertpy import assert_that
+
+import pcluster.cli as cli
+from pcluster.cli_commands import multi_cluster
+from tests.common import MockedBoto3Request
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
+def _cluster_stack(cluster_name, tags=None, parent_id=None):
+    stack = {
+        "StackName": "parallelcluster-" + cluster_name,
+        "CreationTime": "2021-01-01T00:00:00Z",
+        "StackStatus": "CREATE_COMPLETE",
+        "Tags": [{"Key": key, "Value": value} for key, value in (tags or {}).items()],
+    }
+    if parent_id:
+        stack["ParentId"] = parent_id
+    return stack
+
+
+def _get_args(cluster_names, filter_tags=None, parallelism=None, yes=True):
+    return Namespace(
+        cluster_name=cluster_names,
+        filter_tags=filter_tags or [],
+        parallelism=parallelism,
+        yes=yes,
+        config_file=None,
+        region=None,
+    )
+
+
+@pytest.mark.parametrize(
+    "names, filter_tags, expected_clusters",
+    [
+        (["dev-1", "other"], None, ["dev-1", "other"]),
+        (["prod", "dev-*"], None, ["prod", "dev-1", "dev-2"]),
+        (["dev-2", "dev-*"], None, ["dev-2", "dev-1"]),
+        ([], [("team", "hpc")], ["dev-2", "test"]),
+        (["dev-*"], [("team", "hpc")], ["dev-2"]),
+        ([], [("team", "h*"), ("env", "nightly")], ["test"]),
+        (["test"], [("team", "other")], []),
+    ],
+)
+def test_get_target_clusters(boto3_stubber, names, filter_tags, expected_clusters):
+    if filter_tags or any(multi_cluster.is_cluster_pattern(name) for name in names):
+        stacks = [
+            _cluster_stack("dev-1"),
+            _cluster_stack("dev-2", {"team": "hpc"}),
+            _cluster_stack("dev-2-substack", {"team": "hpc"}, parent_id="parent"),
+            _cluster_stack("test", {"team": "hpc", "env": "nightly"}),
+            {"StackName": "dev-3", "CreationTime": "2021-01-01T00:00:00Z", "StackStatus": "CREATE_COMPLETE"},
+        ]
+        boto3_stubber(
+            "cloudformation",
+            [MockedBoto3Request(method="describe_stacks", response={"Stacks": stacks}, expected_params={})],
+        )
+
+    assert_that(multi_cluster.get_target_clusters(names, filter_tags)).is_equal_to(expected_clusters)
+
+
+def test_run_on_clusters(mocker, capsys, caplog):
+    caplog.set_level(logging.INFO, logger="pcluster")
+    console_handler = logging.StreamHandler(sys.stdout)
+    mocker.patch.object(logging.getLogger("pcluster"), "handlers", [console_handler])
+    lock = threading.Lock()
+    running = {"current": 0, "max": 0}
+
+    def _command(args):
+        with lock:
+            running["current"] += 1
+            running["max"] = max(running["max"], running["current"])
+        sys.stdout.write("\rStatus: IN_PROGRESS")
+        logging.getLogger("pcluster.cli_commands.delete").info("Deleting: %s", args.cluster_name)
+        time.sleep(0.05)
+        with lock:
+            running["current"] -= 1
+        if args.cluster_name == "failing":
+            sys.exit("ERROR: Failure of {0}".format(args.cluster_name))
+        if args.cluster_name == "crashing":
+            raise ValueError("Crash")
+        if args.cluster_name == "exiting":
+            sys.exit(1)
+        sys.exit(0)
+
+    cluster_names = ["cluster1", "failing", "cluster2", "crashing", "exiting"]
+    args = _get_args(cluster_names)
+    results = multi_cluster.run_on_clusters(_command, args, cluster_names, parallelism=2)
+
+    assert_that([result.cluster_name for result in results]).is_equal_to(cluster_names)
+    assert_that([result.succeeded for result in results]).is_equal_to([True, False, True, False, False])
+    assert_that([result.message for result in results]).is_equal_to(
+        [
+            "",
+            "ERROR: Failure of failing",
+            "",
+            "Unexpected error of type ValueError: Crash",
+            "Failed with exit code 1",
+        ]
+    )
+    assert_that(running["max"]).is_equal_to(2)
+    # The progress and the logs of the single clusters are not printed, the arguments of the caller are not modified
+    output = capsys.readouterr().out
+    assert_that(output).does_not_contain("Status: IN_PROGRESS", "Deleting:")
+    assert_that(output).contains("[5/5]")
+    assert_that(console_handler.filters).is_empty()
+    assert_that(args.cluster_name).is_equal_to(cluster_names)
+
+
+@pytest.mark.parametrize("failure", [False, True])
+def test_execute(mocker, caplog, failure):
+    caplog.set_level("INFO")
+    mocker.patch("pcluster.cli_commands.multi_cluster.PclusterConfig.init_aws")
+    mocker.patch("pcluster.cli_commands.multi_cluster.get_target_clusters", return_value=["cluster1", "cluster2"])
+    command = mocker.MagicMock(side_effect=[None, SystemExit("ERROR: Failure") if failure else None])
+
+    if failure:
+        with pytest.raises(SystemExit) as sysexit:
+            multi_cluster.execute(command, _get_args(["cluster*"], parallelism=1), "Stopping")
+        assert_that(sysexit.value.code).is_equal_to(1)
+    else:
+        multi_cluster.execute(command, _get_args(["cluster*"], parallelism=1), "Stopping")
+
+    assert_that([call[0][0].cluster_name for call in command.call_args_list]).is_equal_to(["cluster1", "cluster2"])
+    assert_that(caplog.text).contains("Stopping 2 clusters: cluster1, cluster2", "[2/2] cluster2")
+    if failure:
+        assert_that(caplog.text).matches(r"cluster2\s+FAILED\s+\d+s\s+ERROR: Failure")
+        assert_that(caplog.text).contains("1 succeeded, 1 failed")
+    else:
+        assert_that(caplog.text).contains("2 succeeded, 0 failed")
+
+
+def test_execute_not_confirmed(mocker):
+    mocker.patch("pcluster.cli_commands.multi_cluster.PclusterConfig.init_aws")
+    mocker.patch("pcluster.cli_commands.multi_cluster.get_target_clusters", return_value=["cluster1", "cluster2"])
+    mocker.patch("pcluster.cli_commands.multi_cluster.input", return_value="n")
+    command = mocker.MagicMock()
+
+    with pytest.raises(SystemExit) as sysexit:
+        multi_cluster.execute(command, _get_args(["cluster*"], yes=False), "Deleting", confirm=True)
+
+    assert_that(sysexit.value.code).is_equal_to(0)
+    command.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "cluster_names, filter_tags, expected_multi_cluster",
+    [
+        (["cluster1"], [], False),
+        (["cluster1", "cluster2"], [], True),
+        (["cluster*"], [], True),
+        (["cluster1"], [("team", "hpc")], True),
+        ([], [], True),
+    ],
+)
+def test_cli_execute_on_clusters(mocker, cluster_names, filter_tags, expected_multi_cluster):
+    execute_mock = mocker.patch("pcluster.cli_commands.multi_cluster.execute")
+    command = mocker.MagicMock()
+    args = _get_args(cluster_names, filter_tags)
+
+    cli._execute_on_clusters(command, args, "Stopping")
+
+    if expected_multi_cluster:
+        execute_mock.assert_called_with(command, args, "Stopping", False)
+        command.assert_not_called()
+    else:
+        command.assert_called_with(args)
+        assert_that(args.cluster_name).is_equal_to("cluster1")
+
+
+def test_parse_tag_filter(mocker):
+    mocker.patch.object(sys, "argv", ["pcluster", "stop", "--filter-tag", "team=hpc", "--filter-tag", "env=", "dev-*"])
+    args = cli._get_parser().parse_args()
+    assert_that(args.filter_tags).is_equal_to([("team", "hpc"), ("env", "")])
+    assert_that(args.cluster_name).is_equal_to(["dev-*"])
+
+    mocker.patch.object(sys, "argv", ["pcluster", "stop", "--filter-tag", "team"])
+    with pytest.raises(SystemExit):
+        cli._get_parser().parse_args()
@@ -1,5 +1,7 @@
 """This module provides unit tests for the functions in the pcluster.delete module."""
 
+import logging
+import threading
 from collections import namedtuple
 
 import pytest
@@ -8,11 +10,15 @@ from botocore.exceptions import ClientError
 
 import pcluster.utils as utils
 from pcluster.cli_commands.delete import (
+    _delete_cluster,
+    _describe_instance_ids_iterator,
     _get_unretained_cw_log_group_resource_keys,
     _persist_cloudwatch_log_groups,
     _persist_stack_resources,
+    _terminate_cluster_nodes,
     delete,
 )
+from tests.common import MockedBoto3Request
 
 FakePdeleteArgs = namedtuple("FakePdeleteArgs", "cluster_name config_file nowait keep_logs region")
 FAKE_CLUSTER_NAME = "cluster_name"
@@ -20,6 +26,11 @@ FAKE_STACK_NAME = utils.get_stack_name(FAKE_CLUSTER_NAME)
 LOG_GROUP_TYPE = "AWS::Logs::LogGroup"
 
 
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
 def get_fake_pdelete_args(cluster_name="cluster_name", config_file=None, nowait=False, keep_logs=False, region=None):
     """Get a FakePdeleteArgs instance, with None used for any parameters not specified."""
     return FakePdeleteArgs(
@@ -183,3 +194,97 @@ def test_get_unretained_cw_log_group_resource_keys(template, expected_return):
     """Verify that commands._get_unretained_cw_log_group_resource_keys behaves as expected."""
     observed_return = _get_unretained_cw_log_group_resource_keys(template)
     assert_that(observed_return).is_equal_to(expected_return)
+
+
+@pytest.mark.parametrize("nowait", [False, True])
+def test_delete_cluster_terminates_nodes_during_deletion(mocker, nowait):
+    """Verify that the compute nodes are terminated while the stack is deleted and checked again at the end."""
+    cfn_mock = mocker.patch("pcluster.cli_commands.delete.get_boto3_client").return_value
+    mocker.patch("pcluster.cli_commands.delete.utils.get_stack", return_value={"StackStatus": "DELETE_IN_PROGRESS"})
+    background_termination_started = threading.Event()
+    terminate_cluster_nodes_mock = mocker.patch(
+        "pcluster.cli_commands.delete._terminate_cluster_nodes",
+        side_effect=lambda stack_name, quiet=False: background_termination_started.set(),
+    )
+
+    def _wait(in_progress_statuses):
+        assert_that(background_termination_started.wait(5)).is_true()
+        return {"StackStatus": "DELETE_COMPLETE"}
+
+    mocker.patch("pcluster.cli_commands.delete.StackWatcher").return_value.wait.side_effect = _wait
+
+    if nowait:
+        _delete_cluster(FAKE_CLUSTER_NAME, nowait)
+        terminate_cluster_nodes_mock.assert_not_called()
+    else:
+        with pytest.raises(SystemExit) as sysexit:
+            _delete_cluster(FAKE_CLUSTER_NAME, nowait)
+        assert_that(sysexit.value.code).is_equal_to(0)
+        assert_that(terminate_cluster_nodes_mock.call_args_list).is_equal_to(
+            [mocker.call(FAKE_STACK_NAME, True), mocker.call(FAKE_STACK_NAME)]
+        )
+    cfn_mock.delete_stack.assert_called_with(StackName=FAKE_STACK_NAME)
+
+
+@pytest.mark.parametrize("error_code, expected_terminated", [("RequestLimitExceeded", 4), ("UnauthorizedOperation", 3)])
+def test_terminate_cluster_nodes(mocker, caplog, error_code, expected_terminated):
+    """Verify that all the batches are terminated, retrying the throttled calls."""
+    caplog.set_level(logging.INFO)
+    mocker.patch("pcluster.retries.time.sleep")
+    mocker.patch(
+        "pcluster.cli_commands.delete._describe_instance_ids_iterator",
+        return_value=iter([["i-1", "i-2"], ["i-3"], ["i-4"]]),
+    )
+    ec2_mock = mocker.patch("pcluster.cli_commands.delete.get_boto3_client").return_value
+    failed_batches = []
+
+    def _terminate_instances(InstanceIds):
+        if InstanceIds == ["i-3"] and not failed_batches:
+            failed_batches.append(InstanceIds)
+            raise ClientError({"Error": {"Code": error_code, "Message": "Failure"}}, "TerminateInstances")
+        return {}
+
+    ec2_mock.terminate_instances.side_effect = _terminate_instances
+
+    assert_that(_terminate_cluster_nodes(FAKE_STACK_NAME)).is_equal_to(expected_terminated)
+    ec2_mock.terminate_instances.assert_has_calls(
+        [mocker.call(InstanceIds=["i-1", "i-2"]), mocker.call(InstanceIds=["i-3"]), mocker.call(InstanceIds=["i-4"])],
+        any_order=True,
+    )
+    if expected_terminated == 4:
+        assert_that(ec2_mock.terminate_instances.call_count).is_equal_to(4)
+        assert_that(caplog.text).contains("Terminated 4 of 4 compute nodes", "Compute fleet cleaned up.")
+    else:
+        assert_that(caplog.text).contains("Failed when checking for running EC2 instances")
+
+
+def test_describe_instance_ids_iterator(boto3_stubber):
+    """Verify that the ids of the instances of all the reservations are returned in batches."""
+    filters = [
+        {"Name": "tag:Application", "Values": [FAKE_STACK_NAME]},
+        {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]},
+        {"Name": "tag:aws-parallelcluster-node-type", "Values": ["Compute"]},
+    ]
+    mocked_requests = [
+        MockedBoto3Request(
+            method="describe_instances",
+            response={
+                "Reservations": [
+                    {"Instances": [{"InstanceId": "i-1"}, {"InstanceId": "i-2"}]},
+                    {"Instances": [{"InstanceId": "i-3"}]},
+                ],
+                "NextToken": "token",
+            },
+            expected_params={"Filters": filters, "MaxResults": 1000},
+        ),
+        MockedBoto3Request(
+            method="describe_instances",
+            response={"Reservations": [{"Instances": [{"InstanceId": "i-4"}, {"InstanceId": "i-5"}]}]},
+            expected_params={"Filters": filters, "MaxResults": 1000, "NextToken": "token"},
+        ),
+    ]
+    boto3_stubber("ec2", mocked_requests)
+
+    assert_that(list(_describe_instance_ids_iterator(FAKE_STACK_NAME, batch_size=2))).is_equal_to(
+        [["i-1", "i-2"], ["i-3", "i-4"], ["i-5"]]
+    )
@@ -0,0 +1,144 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+
+import configparser
+import pytest
+from assertpy import assert_that
+from botocore.exceptions import ClientError
+
+import pcluster.config.aws_resources as aws_resources
+from pcluster.config.aws_resources import AwsResources
+from tests.common import MockedBoto3Request
+from tests.pcluster.config.utils import init_pcluster_config_from_configparser
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
+def _subnet(subnet_id):
+    return {"SubnetId": subnet_id, "VpcId": "vpc-12345678"}
+
+
+def _describe_subnets(subnet_ids, generate_error=False):
+    if generate_error:
+        response = "The subnet ID '{0}' does not exist".format(subnet_ids[0])
+    else:
+        response = {"Subnets": [_subnet(subnet_id) for subnet_id in subnet_ids]}
+    return MockedBoto3Request(
+        method="describe_subnets",
+        response=response,
+        expected_params={"SubnetIds": subnet_ids},
+        generate_error=generate_error,
+    )
+
+
+def test_prefetch_with_single_call(boto3_stubber):
+    boto3_stubber("ec2", [_describe_subnets(["subnet-1", "subnet-2"])])
+    resources = AwsResources()
+
+    resources.prefetch("subnets", ["subnet-2", "subnet-1", "subnet-2"])
+
+    # Prefetched resources are served without further calls
+    assert_that(resources.get("subnets", "subnet-1")).is_equal_to(_subnet("subnet-1"))
+    assert_that(resources.get_many("subnets", ["subnet-2", "subnet-1"])).is_equal_to(
+        [_subnet("subnet-2"), _subnet("subnet-1")]
+    )
+
+
+def test_prefetch_batches(boto3_stubber, mocker):
+    mocker.patch.object(aws_resources, "MAX_IDS_PER_CALL", 2)
+    boto3_stubber("ec2", [_describe_subnets(["subnet-1", "subnet-2"]), _describe_subnets(["subnet-3"])])
+
+    AwsResources().prefetch("subnets", ["subnet-3", "subnet-2", "subnet-1"])
+
+
+def test_failed_prefetch_falls_back_to_single_calls(boto3_stubber):
+    boto3_stubber(
+        "ec2",
+        [
+            _describe_subnets(["subnet-1", "subnet-wrong"], generate_error=True),
+            _describe_subnets(["subnet-1"]),
+            _describe_subnets(["subnet-wrong"], generate_error=True),
+        ],
+    )
+    resources = AwsResources()
+
+    resources.prefetch("subnets", ["subnet-1", "subnet-wrong"])
+
+    assert_that(resources.get("subnets", "subnet-1")).is_equal_to(_subnet("subnet-1"))
+    # The error of the describe call of the single resource is raised
+    with pytest.raises(ClientError, match="subnet-wrong"):
+        resources.get("subnets", "subnet-wrong")
+    # Described resources are stored in the snapshot
+    assert_that(resources.get("subnets", "subnet-1")).is_equal_to(_subnet("subnet-1"))
+
+
+def test_get_with_describe_function(mocker):
+    describe_func = mocker.MagicMock(return_value={"SnapshotId": "snap-1"})
+    resources = AwsResources()
+
+    assert_that(resources.get("snapshots", "snap-1", describe_func)).is_equal_to({"SnapshotId": "snap-1"})
+    assert_that(resources.get("snapshots", "snap-1", describe_func)).is_equal_to({"SnapshotId": "snap-1"})
+    describe_func.assert_called_once_with("snap-1")
+
+
+def test_get_many_describes_missing_resources(boto3_stubber):
+    boto3_stubber("ec2", [_describe_subnets(["subnet-1"]), _describe_subnets(["subnet-2", "subnet-3"])])
+    resources = AwsResources()
+    resources.prefetch("subnets", ["subnet-1"])
+
+    assert_that(resources.get_many("subnets", ["subnet-1", "subnet-2", "subnet-3"])).is_length(3)
+
+
+def test_deepcopy(mocker):
+    resources = AwsResources()
+    resources.get("subnets", "subnet-1", mocker.MagicMock(return_value=_subnet("subnet-1")))
+
+    resources_copy = copy.deepcopy(resources)
+
+    assert_that(resources_copy.get("subnets", "subnet-1")).is_equal_to(_subnet("subnet-1"))
+
+
+def test_get_resource_ids(mocker):
+    mocker.patch("pcluster.config.cfn_param_types.get_availability_zone_of_subnet", return_value="mocked_avail_zone")
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(
+        {
+            "cluster default": {
+                "key_name": "key1",
+                "placement_group": "DYNAMIC",
+                "vpc_settings": "default",
+                "ebs_settings": "ebs1,ebs2",
+            },
+            "vpc default": {
+                "master_subnet_id": "subnet-12345678",
+                "compute_subnet_id": "subnet-12345678",
+                "vpc_security_group_id": "sg-12345678",
+                "additional_sg": "sg-87654321",
+            },
+            "ebs ebs1": {"shared_dir": "/ebs1", "ebs_volume_id": "vol-12345678"},
+            "ebs ebs2": {"shared_dir": "/ebs2", "ebs_snapshot_id": "snap-12345678"},
+        }
+    )
+    pcluster_config = init_pcluster_config_from_configparser(config_parser, validate=False, auto_refresh=False)
+
+    assert_that(dict(pcluster_config.get_resource_ids())).is_equal_to(
+        {
+            "subnets": ["subnet-12345678"],
+            "security_groups": ["sg-12345678", "sg-87654321"],
+            "volumes": ["vol-12345678"],
+            "snapshots": ["snap-12345678"],
+            "key_pairs": ["key1"],
+        }
+    )
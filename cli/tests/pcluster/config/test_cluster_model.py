@@ -8,11 +8,19 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import os
+
 import configparser
 import pytest
 from assertpy import assert_that
+from botocore.exceptions import ClientError
 
 from pcluster.cluster_model import ClusterModel, infer_cluster_model
+from tests.pcluster.config.utils import (
+    init_pcluster_config_from_configparser,
+    mock_instance_type_info,
+    mock_pcluster_config,
+)
 
 
 @pytest.mark.parametrize(
@@ -75,3 +83,63 @@ def test_cluster_model(config_parser_cluster_dict, cfn_stack, expected_cluster_m
 
     cluster_model = infer_cluster_model(config_parser, "default", cfn_stack)
     assert_that(cluster_model).is_equal_to(expected_cluster_model)
+
+
+@pytest.mark.parametrize(
+    "dryrun_all_option, dryrun_all_env, expected_instance_types",
+    [
+        (False, None, ["t2.micro", "c5.xlarge", "t2.large"]),
+        (True, None, ["t2.micro", "c5.xlarge", "c5.2xlarge", "t2.large", "t2.micro"]),
+        (False, "true", ["t2.micro", "c5.xlarge", "c5.2xlarge", "t2.large", "t2.micro"]),
+        (False, "1", ["t2.micro", "c5.xlarge", "c5.2xlarge", "t2.large", "t2.micro"]),
+        (False, "false", ["t2.micro", "c5.xlarge", "t2.large"]),
+        (False, "0", ["t2.micro", "c5.xlarge", "t2.large"]),
+    ],
+)
+def test_hit_test_configuration(mocker, dryrun_all_option, dryrun_all_env, expected_instance_types):
+    mock_pcluster_config(mocker)
+    mock_instance_type_info(mocker)
+    if dryrun_all_env:
+        mocker.patch.dict(os.environ, {"PCLUSTER_DRYRUN_ALL_COMPUTE_RESOURCES": dryrun_all_env})
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(
+        {
+            "cluster default": {
+                "scheduler": "slurm",
+                "master_instance_type": "t2.micro",
+                "queue_settings": "queue1, queue2",
+                "vpc_settings": "default",
+            },
+            "vpc default": {"master_subnet_id": "subnet-12345678"},
+            "queue queue1": {"compute_resource_settings": "cr1, cr2"},
+            "queue queue2": {"compute_resource_settings": "cr3, cr4"},
+            "compute_resource cr1": {"instance_type": "c5.xlarge"},
+            "compute_resource cr2": {"instance_type": "c5.2xlarge"},
+            "compute_resource cr3": {"instance_type": "t2.large"},
+            "compute_resource cr4": {"instance_type": "t2.micro"},
+        }
+    )
+    pcluster_config = init_pcluster_config_from_configparser(config_parser, validate=False, auto_refresh=False)
+    cluster_model = pcluster_config.cluster_model
+    mocker.patch.object(cluster_model, "_get_cluster_ami_id", return_value="ami-12345678")
+    mocker.patch.object(cluster_model, "public_ips_in_compute_subnet", return_value=False)
+    mocker.patch.object(
+        cluster_model, "build_launch_network_interfaces", return_value=[{"SubnetId": "subnet-12345678"}]
+    )
+    error_response = {"Error": {"Code": "InsufficientInstanceCapacity", "Message": "No capacity"}}
+    dryrun_mock = mocker.patch.object(
+        cluster_model,
+        "_ec2_dryrun_instance",
+        side_effect=lambda **kwargs: ClientError(
+            error_response if kwargs["InstanceType"] == "t2.large" else {"Error": {"Code": "DryRunOperation"}},
+            "RunInstances",
+        ),
+    )
+    error_mock = mocker.patch.object(pcluster_config, "error")
+
+    cluster_model.test_configuration(pcluster_config, dryrun_all_compute_resources=dryrun_all_option)
+
+    assert_that(sorted(call[1]["InstanceType"] for call in dryrun_mock.call_args_list)).is_equal_to(
+        sorted(expected_instance_types)
+    )
+    error_mock.assert_called_once_with("There is not enough capacity to fulfill your request.\nNo capacity")
@@ -8,12 +8,14 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import os
 
 import pytest
 from assertpy import assert_that
 
 from pcluster.config.config_patch import Change, ConfigPatch
+from pcluster.config.param_types import Param
 from pcluster.config.pcluster_config import PclusterConfig
 from pcluster.config.update_policy import UpdatePolicy
 from pcluster.utils import InstanceTypeInfo
@@ -385,3 +387,54 @@ def test_patch_check_cluster_resource_bucket(
         line = ["{0}".format(element) if isinstance(element, str) else element for element in line]
         assert_that(expected_message_rows).contains(line)
     assert_that(patch_allowed).is_equal_to(not expected_error_row)
+
+    change_set = patch.get_change_set()
+    assert_that(change_set.get("patch_allowed")).is_equal_to(patch_allowed)
+    assert_that(change_set.get("changes")).is_length(len(rows) - 1)
+    assert_that(change_set.get("changes")).contains(
+        {
+            "section": "cluster some_cluster",
+            "parameter": "ec2_iam_role",
+            "old_value": "some_old_role",
+            "new_value": "some_new_role",
+            "update_policy": "SUPPORTED",
+            "check": "SUCCEEDED",
+            "reason": "-",
+            "action_needed": None,
+        }
+    )
+
+
+def test_section_fingerprint(mocker):
+    _do_mocking_for_tests(mocker)
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    src_conf = PclusterConfig()
+    dst_conf = PclusterConfig()
+    src_section = src_conf.get_section("cluster")
+    dst_section = dst_conf.get_section("cluster")
+    assert_that(src_section.get_fingerprint()).is_equal_to(dst_section.get_fingerprint())
+
+    # Settings labels are compared ignoring their order
+    src_section.get_param("ebs_settings").value = "ebs1,ebs2"
+    dst_section.get_param("ebs_settings").value = "ebs2, ebs1"
+    assert_that(src_section.get_fingerprint()).is_equal_to(dst_section.get_fingerprint())
+
+    dst_section.get_param("key_name").value = "other_key"
+    assert_that(src_section.get_fingerprint()).is_not_equal_to(dst_section.get_fingerprint())
+
+    # Sections with the same fingerprint are not compared param by param
+    compare_spy = mocker.spy(Param, "__eq__")
+    ConfigPatch(base_config=src_conf, target_config=src_conf)
+    compare_spy.assert_not_called()
+
+    # Fingerprints are memoized in the original configurations and computed again only for the modified sections
+    ConfigPatch(base_config=dst_conf, target_config=dst_conf)
+    digest_spy = mocker.spy(hashlib, "sha256")
+    ConfigPatch(base_config=src_conf, target_config=src_conf)
+    ConfigPatch(base_config=dst_conf, target_config=dst_conf)
+    digest_spy.assert_not_called()
+
+    dst_section.get_param("key_name").value = src_section.get_param_value("key_name")
+    ConfigPatch(base_config=dst_conf, target_config=dst_conf)
+    assert_that(digest_spy.call_count).is_equal_to(1)
+    assert_that(src_section.get_fingerprint()).is_equal_to(dst_section.get_fingerprint())
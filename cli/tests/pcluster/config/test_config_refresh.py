@@ -0,0 +1,171 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import inspect
+import time
+
+import configparser
+import pytest
+from assertpy import assert_that
+
+import pcluster.config.cfn_param_types as cfn_param_types
+import pcluster.config.json_param_types as json_param_types
+import pcluster.config.param_types as param_types
+from pcluster.config.mappings import EBS, QUEUE
+from pcluster.config.param_types import Param, refresh_required
+from tests.pcluster.config.utils import init_pcluster_config_from_configparser, mock_pcluster_config
+
+NUM_QUEUES = 5
+NUM_COMPUTE_RESOURCES = 3
+NUM_EBS = 4
+
+
+@pytest.mark.parametrize(
+    "dependencies, changes, expected_result",
+    [
+        ((), {("queue", None)}, False),
+        (None, {("queue", None)}, True),
+        (None, set(), False),
+        ((("queue", None),), {("queue", None)}, True),
+        ((("queue", None),), {("queue", "enable_efa")}, False),
+        ((("cluster", "scheduler"),), {("cluster", None)}, True),
+        ((("cluster", "scheduler"),), {("cluster", "scheduler")}, True),
+        ((("cluster", "scheduler"),), {("cluster", "queue_settings"), ("queue", None)}, False),
+    ],
+)
+def test_refresh_required(dependencies, changes, expected_result):
+    assert_that(refresh_required(dependencies, changes)).is_equal_to(expected_result)
+
+
+def test_refresh_dependencies_declared():
+    """Verify that all the params refreshed according to other params declare their dependencies."""
+    for module in [param_types, cfn_param_types, json_param_types]:
+        for _, param_type in inspect.getmembers(module, inspect.isclass):
+            if issubclass(param_type, Param) and "refresh" in vars(param_type):
+                declared = "refresh_dependencies" in vars(param_type) or "get_refresh_dependencies" in vars(param_type)
+                assert_that(declared).described_as(param_type.__name__).is_true()
+
+
+def _init_multi_queue_config(mocker, auto_refresh):
+    mock_pcluster_config(mocker, "slurm")
+    config_parser_dict = {
+        "cluster default": {
+            "scheduler": "slurm",
+            "base_os": "alinux2",
+            "queue_settings": ",".join("queue{0}".format(index) for index in range(NUM_QUEUES)),
+            "ebs_settings": ",".join("ebs{0}".format(index) for index in range(NUM_EBS)),
+        }
+    }
+    for queue_index in range(NUM_QUEUES):
+        compute_resource_labels = ["cr{0}{1}".format(queue_index, index) for index in range(NUM_COMPUTE_RESOURCES)]
+        config_parser_dict["queue queue{0}".format(queue_index)] = {
+            "compute_resource_settings": ",".join(compute_resource_labels)
+        }
+        for label in compute_resource_labels:
+            config_parser_dict["compute_resource {0}".format(label)] = {"instance_type": "c5.xlarge"}
+    for index in range(NUM_EBS):
+        config_parser_dict["ebs ebs{0}".format(index)] = {"shared_dir": "/ebs{0}".format(index)}
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(config_parser_dict)
+    return init_pcluster_config_from_configparser(config_parser, validate=False, auto_refresh=auto_refresh)
+
+
+def _count_refreshes(pcluster_config):
+    """Wrap the refresh method of all the params to count the calls."""
+    counter = {"refreshes": 0}
+
+    def _counted(refresh):
+        def _refresh():
+            counter["refreshes"] += 1
+            refresh()
+
+        return _refresh
+
+    for section in _all_sections(pcluster_config):
+        for param in section.params.values():
+            param.refresh = _counted(param.refresh)
+    return counter
+
+
+def _all_sections(pcluster_config):
+    return [
+        section
+        for section_key in pcluster_config.get_section_keys()
+        for section in pcluster_config.get_sections(section_key).values()
+    ]
+
+
+def _get_values(pcluster_config):
+    return {
+        (section.key, section.label, param_key): param.value
+        for section in _all_sections(pcluster_config)
+        for param_key, param in section.params.items()
+    }
+
+
+def _add_ebs_section(pcluster_config):
+    pcluster_config.add_section(EBS.get("type")(EBS, pcluster_config, section_label="ebs_new"))
+
+
+def _add_queue_section(pcluster_config):
+    pcluster_config.add_section(QUEUE.get("type")(QUEUE, pcluster_config, section_label="queue_new"))
+
+
+def _relabel_queue_section(pcluster_config):
+    pcluster_config.get_section("queue", "queue0").label = "queue_relabelled"
+
+
+def _remove_ebs_section(pcluster_config):
+    pcluster_config.remove_section("ebs", "ebs1")
+
+
+@pytest.mark.parametrize(
+    "change",
+    [_add_ebs_section, _add_queue_section, _relabel_queue_section, _remove_ebs_section],
+)
+def test_incremental_refresh(mocker, change):
+    """Verify that the incremental refresh leads to the same configuration of the full one, with fewer refreshes."""
+    incremental_config = _init_multi_queue_config(mocker, auto_refresh=True)
+    full_config = _init_multi_queue_config(mocker, auto_refresh=True)
+    full_config.auto_refresh = False
+    incremental_counter = _count_refreshes(incremental_config)
+    full_counter = _count_refreshes(full_config)
+
+    change(incremental_config)
+    change(full_config)
+    # Params refreshed before the ones they depend on are only updated by a second full refresh
+    full_config.refresh()
+    full_config.refresh()
+
+    assert_that(_get_values(incremental_config)).is_equal_to(_get_values(full_config))
+    assert_that(incremental_counter["refreshes"]).is_less_than(full_counter["refreshes"])
+
+
+def test_refresh_benchmark(mocker):
+    """Compare the cost of full and incremental refreshes of a large multi-queue configuration (run with -s)."""
+    pcluster_config = _init_multi_queue_config(mocker, auto_refresh=True)
+    counter = _count_refreshes(pcluster_config)
+    results = []
+    for mode, refresh in [
+        ("full", lambda: pcluster_config.refresh()),
+        ("incremental ebs", lambda: pcluster_config.refresh(["ebs"])),
+        ("incremental queue", lambda: pcluster_config.refresh(["queue"])),
+        ("incremental compute_resource", lambda: pcluster_config.refresh(["compute_resource"])),
+    ]:
+        counter["refreshes"] = 0
+        start_time = time.time()
+        refresh()
+        results.append((mode, counter["refreshes"], time.time() - start_time))
+
+    for mode, refreshes, elapsed_time in results:
+        print("{0} refresh: {1} param refreshes in {2:.4f}s".format(mode, refreshes, elapsed_time))
+    full_refreshes = results[0][1]
+    for mode, refreshes, _ in results[1:]:
+        assert_that(refreshes).described_as(mode).is_less_than(full_refreshes)
@@ -0,0 +1,94 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+
+import pytest
+from assertpy import assert_that
+
+from pcluster.config.config_snapshot import load_snapshot
+from pcluster.config.pcluster_config import PclusterConfig
+from pcluster.metadata_cache import MetadataCache
+
+CONFIG = """
+[aws]
+aws_region_name = eu-west-1
+
+[aliases]
+ssh = ssh {CFN_USER}@{MASTER_IP} -i ~/.ssh/key.pem {ARGS}
+
+[global]
+cluster_template = custom
+sanity_check = false
+
+[cluster custom]
+key_name = key
+"""
+
+
+@pytest.fixture()
+def config_file(tmp_path):
+    config_file = tmp_path / "config"
+    config_file.write_text(CONFIG)
+    return str(config_file)
+
+
+def _init_global_sections(config_file):
+    os.environ.pop("AWS_DEFAULT_REGION", None)
+    return PclusterConfig(config_file=config_file, fail_on_error=False, auto_refresh=False, global_sections_only=True)
+
+
+def _assert_global_sections(pcluster_config):
+    assert_that(pcluster_config.region).is_equal_to("eu-west-1")
+    assert_that(pcluster_config.get_section("aliases").get_param_value("ssh")).contains("key.pem")
+    assert_that(pcluster_config.get_section("global").get_param_value("cluster_template")).is_equal_to("custom")
+    assert_that(pcluster_config.get_section("global").get_param_value("sanity_check")).is_false()
+    assert_that(pcluster_config.get_section("cluster")).is_none()
+
+
+def test_global_sections_from_snapshot(config_file, mocker):
+    _assert_global_sections(_init_global_sections(config_file))
+    assert_that(load_snapshot(config_file)).contains_key("aws", "aliases", "global").does_not_contain_key(
+        "cluster custom"
+    )
+
+    read_spy = mocker.spy(PclusterConfig, "_init_config_parser")
+    pcluster_config = _init_global_sections(config_file)
+    _assert_global_sections(pcluster_config)
+    read_spy.assert_not_called()
+
+    # The file is parsed when needed
+    assert_that(pcluster_config.config_parser.has_section("cluster custom")).is_true()
+
+
+def test_snapshot_invalidation(config_file, mocker):
+    _init_global_sections(config_file)
+
+    with open(config_file, "a") as config_file_stream:
+        config_file_stream.write("\n[vpc default]\n")
+    assert_that(load_snapshot(config_file)).is_none()
+    _init_global_sections(config_file)
+    assert_that(load_snapshot(config_file)).is_not_none()
+
+    mocker.patch("pcluster.config.config_snapshot.get_installed_version", return_value="0.0.0")
+    assert_that(load_snapshot(config_file)).is_none()
+
+
+def test_snapshot_not_stored(config_file, tmp_path, mocker):
+    mocker.patch.dict(os.environ)
+    credentials_config_file = tmp_path / "credentials_config"
+    credentials_config_file.write_text(CONFIG.replace("[aws]", "[aws]\naws_access_key_id = key\n"))
+    _init_global_sections(str(credentials_config_file))
+    assert_that(load_snapshot(str(credentials_config_file))).is_none()
+
+    MetadataCache.disable()
+    _init_global_sections(config_file)
+    assert_that(load_snapshot(config_file)).is_none()
+    MetadataCache.enable()
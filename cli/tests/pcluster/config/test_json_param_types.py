@@ -123,7 +123,7 @@ def clear_cache():
 
 @pytest.fixture()
 def boto3_stubber_path():
-    return "pcluster.utils.boto3"
+    return "pcluster.boto3_clients.boto3"
 
 
 @pytest.mark.parametrize(
@@ -147,7 +147,7 @@ def test_config_to_json(capsys, boto3_stubber, test_datadir, pcluster_config_rea
     expected_json_params = _prepare_json_config(queues, test_datadir)
 
     # Mock expected boto3 calls
-    _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type="c4.xlarge")
+    _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type="c4.xlarge", batch_requests=True)
 
     # Load config from created config file
     dst_config_file = pcluster_config_reader(dst_config_file, queue_settings=queue_settings)
@@ -244,8 +244,13 @@ def _prepare_json_config(queues, test_datadir):
     return expected_json_params
 
 
-def _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type=None):
-    """Mock the boto3 client based on the expected json configuration."""
+def _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type=None, batch_requests=False):
+    """
+    Mock the boto3 client based on the expected json configuration.
+
+    If batch_requests is True, a single describe_instance_types call is expected for all the instance types,
+    as performed by PclusterConfig when loading the configuration from file.
+    """
     expected_json_queue_settings = expected_json_params["cluster"].get("queue_settings", {})
     mocked_requests = []
     instance_types = []
@@ -259,12 +264,27 @@ def _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type=Non
             if compute_resource["instance_type"] not in instance_types:
                 instance_types.append(compute_resource["instance_type"])
 
-    for instance_type in instance_types:
+    if batch_requests:
+        instance_types = sorted(instance_types)
         mocked_requests.append(
             MockedBoto3Request(
                 method="describe_instance_types",
-                response=DESCRIBE_INSTANCE_TYPES_RESPONSES[instance_type],
-                expected_params={"InstanceTypes": [instance_type]},
+                response={
+                    "InstanceTypes": [
+                        DESCRIBE_INSTANCE_TYPES_RESPONSES[instance_type]["InstanceTypes"][0]
+                        for instance_type in instance_types
+                    ]
+                },
+                expected_params={"InstanceTypes": instance_types},
             )
         )
+    else:
+        for instance_type in instance_types:
+            mocked_requests.append(
+                MockedBoto3Request(
+                    method="describe_instance_types",
+                    response=DESCRIBE_INSTANCE_TYPES_RESPONSES[instance_type],
+                    expected_params={"InstanceTypes": [instance_type]},
+                )
+            )
     boto3_stubber("ec2", mocked_requests)
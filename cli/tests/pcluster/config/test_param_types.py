@@ -61,7 +61,9 @@ def test_volume_size_refresh(mocker, section_dict, expected_value):
     mocked_pcluster_config = utils.get_mocked_pcluster_config(mocker)
     ebs_section = CfnSection(EBS, mocked_pcluster_config, "default")
     for param_key, param_value in section_dict.items():
-        param = EBS.get("params").get(param_key).get("type", CfnParam)
+        param_definition = EBS.get("params").get(param_key)
+        param_type = param_definition.get("type", CfnParam)
+        param = param_type("ebs", "default", param_key, param_definition, mocked_pcluster_config, ebs_section)
         param.value = param_value
         ebs_section.set_param(param_key, param)
     mocked_pcluster_config.add_section(ebs_section)
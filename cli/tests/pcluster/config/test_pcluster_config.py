@@ -8,11 +8,15 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import copy
+import io
+
 import configparser
 import pytest
 from assertpy import assert_that
 from pytest import fail
 
+from pcluster.config.mappings import EBS
 from pcluster.utils import get_installed_version
 from tests.common import MockedBoto3Request
 from tests.pcluster.config.utils import get_mocked_pcluster_config, init_pcluster_config_from_configparser
@@ -27,7 +31,7 @@ def clear_cache():
 
 @pytest.fixture()
 def boto3_stubber_path():
-    return "pcluster.cluster_model.boto3"
+    return "pcluster.boto3_clients.boto3"
 
 
 @pytest.mark.parametrize(
@@ -72,6 +76,33 @@ def test_load_json_config(mocker, cfn_params_dict, version, expected_json):
     assert_that(pcluster_config._PclusterConfig__load_json_config(cfn_stack)).is_equal_to(expected_json)
 
 
+@pytest.mark.parametrize("config_version", ["version1", None])
+def test_retrieve_cluster_config_cache(mocker, config_version):
+    pcluster_config = get_mocked_pcluster_config(mocker)
+    pcluster_config.cluster_name = "test-cluster"
+    mocker.patch("pcluster.metadata_cache._lookup_account_id", return_value="123456789012")
+    boto3_resources = {"dynamodb": mocker.MagicMock(), "s3": mocker.MagicMock()}
+    mocker.patch(
+        "pcluster.config.pcluster_config.get_boto3_resource", side_effect=lambda service: boto3_resources[service]
+    )
+    table = boto3_resources["dynamodb"].Table.return_value
+    table.get_item.return_value = {"Item": {"Version": config_version}} if config_version else {"Item": {}}
+    s3_object = boto3_resources["s3"].Object.return_value
+    s3_object.get.side_effect = lambda **kwargs: {"Body": io.BytesIO(b'{"b_key": "value", "a_key": "value"}')}
+
+    for _ in range(3):
+        json_config = pcluster_config._PclusterConfig__retrieve_cluster_config("bucket", "artifact_dir")
+        assert_that(list(json_config.keys())).is_equal_to(["b_key", "a_key"])
+
+    # The version is always checked, the object is downloaded only once when the version is known
+    assert_that(table.get_item.call_count).is_equal_to(3)
+    boto3_resources["s3"].Object.assert_called_with("bucket", "artifact_dir/configs/cluster-config.json")
+    if config_version:
+        s3_object.get.assert_called_once_with(VersionId=config_version)
+    else:
+        assert_that(s3_object.get.call_count).is_equal_to(3)
+
+
 @pytest.mark.parametrize(
     "config_parser_dict, expected_message",
     [
@@ -231,3 +262,86 @@ def test_get_cluster_ami_id(
         expected_ami_id = expected_public_ami_id if expected_public_ami_id else expected_self_ami_id
         cluster_ami_id = pcluster_config.cluster_model._get_cluster_ami_id(pcluster_config)
         assert_that(cluster_ami_id).is_equal_to(expected_ami_id)
+
+
+@pytest.mark.parametrize(
+    "config_parser_dict, expected_instance_types",
+    [
+        (
+            {
+                "cluster default": {
+                    "scheduler": "slurm",
+                    "master_instance_type": "c5.xlarge",
+                    "queue_settings": "queue1,queue2",
+                },
+                "queue queue1": {"compute_resource_settings": "cr1,cr2"},
+                "queue queue2": {"compute_resource_settings": "cr3"},
+                "compute_resource cr1": {"instance_type": "c5.xlarge"},
+                "compute_resource cr2": {"instance_type": "c5.2xlarge"},
+                "compute_resource cr3": {"instance_type": "c5.xlarge"},
+            },
+            ["c5.xlarge", "c5.2xlarge"],
+        ),
+        (
+            {
+                "cluster default": {
+                    "scheduler": "sge",
+                    "master_instance_type": "c5.xlarge",
+                    "compute_instance_type": "t3.large",
+                }
+            },
+            ["c5.xlarge", "t3.large"],
+        ),
+        (
+            {
+                "cluster default": {
+                    "scheduler": "awsbatch",
+                    "master_instance_type": "c5.xlarge",
+                    "compute_instance_type": "optimal,m5,c5.2xlarge",
+                }
+            },
+            ["c5.xlarge", "c5.2xlarge"],
+        ),
+    ],
+)
+def test_get_instance_types(config_parser_dict, expected_instance_types):
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(config_parser_dict)
+
+    pcluster_config = init_pcluster_config_from_configparser(config_parser, False, auto_refresh=False)
+
+    assert_that(pcluster_config.get_instance_types()).is_equal_to(expected_instance_types)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda config: setattr(config.get_section("cluster").get_param("key_name"), "value", "other_key"),
+        lambda config: setattr(config.get_section("ebs", "ebs1"), "label", "ebs2"),
+        lambda config: config.add_section(EBS.get("type")(EBS, config, section_label="ebs2")),
+        lambda config: config.get_section("cluster").set_param(
+            "key_name", copy.copy(config.get_section("cluster").get_param("key_name"))
+        ),
+    ],
+)
+def test_to_storage_memoization(mocker, change):
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(
+        {
+            "cluster default": {"scheduler": "slurm", "key_name": "key", "ebs_settings": "ebs1"},
+            "ebs ebs1": {"shared_dir": "/ebs1"},
+        }
+    )
+    pcluster_config = init_pcluster_config_from_configparser(config_parser, False, auto_refresh=False)
+    to_storage_spy = mocker.spy(pcluster_config.get_section("cluster"), "to_storage")
+
+    storage_data = pcluster_config.to_storage()
+    storage_data.cfn_params["KeyName"] = "modified_by_caller"
+    # Memoized data is not recomputed and cannot be modified by the callers
+    assert_that(pcluster_config.to_cfn()["KeyName"]).is_equal_to("key")
+    assert_that(pcluster_config.to_storage().json_params).is_equal_to(storage_data.json_params)
+    assert_that(to_storage_spy.call_count).is_equal_to(1)
+
+    change(pcluster_config)
+    pcluster_config.to_storage()
+    assert_that(to_storage_spy.call_count).is_equal_to(2)
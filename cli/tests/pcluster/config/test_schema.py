@@ -0,0 +1,82 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import copy
+
+import pytest
+from assertpy import assert_that
+
+from pcluster.config.cfn_param_types import CfnSection
+from pcluster.config.mappings import CLUSTER_SIT, EBS, VPC
+from pcluster.config.schema import ParamSchema, Visibility, get_param_schema, get_section_schema
+from pcluster.config.validators import settings_validator
+from tests.pcluster.config.utils import get_mocked_pcluster_config
+
+
+def test_schemas_are_compiled_once():
+    section_schema = get_section_schema(EBS)
+
+    assert_that(get_section_schema(EBS)).is_same_as(section_schema)
+    assert_that(section_schema.params.get("shared_dir")).is_same_as(get_param_schema(EBS["params"]["shared_dir"]))
+    assert_that(section_schema.key).is_equal_to("ebs")
+    assert_that(section_schema.max_resources).is_equal_to(5)
+
+
+def test_schemas_are_immutable():
+    schema = get_param_schema(EBS["params"]["shared_dir"])
+
+    with pytest.raises(AttributeError):
+        schema.default = "/other"
+    with pytest.raises(AttributeError):
+        schema.other_attribute = "value"
+    assert_that(copy.deepcopy(schema)).is_same_as(schema)
+
+
+def test_param_schema():
+    schema = ParamSchema(
+        {"allowed_values": "^vol-[0-9a-z]{8}$", "validators": [settings_validator], "visibility": Visibility.PRIVATE}
+    )
+
+    assert_that(schema.allowed_values_regex.match("vol-12345678")).is_not_none()
+    assert_that(schema.validators).is_equal_to((settings_validator,))
+    assert_that(schema.is_public).is_false()
+    assert_that(schema.default).is_none()
+    assert_that(schema.get_default("NONE")).is_equal_to("NONE")
+    assert_that(schema.cfn_param_mapping).is_none()
+    assert_that(ParamSchema({"allowed_values": ["a", "b"]}).allowed_values_regex).is_none()
+
+    # The fallback applies only when the definition has no default
+    assert_that(ParamSchema({"default": None}).get_default("NONE")).is_none()
+    assert_that(ParamSchema({"default": "/shared"}).get_default("NONE")).is_equal_to("/shared")
+    assert_that(get_param_schema(EBS["params"]["shared_dir"]).cfn_param_mapping).is_equal_to("SharedDir")
+
+
+def test_params_initialized_lazily(mocker):
+    pcluster_config = get_mocked_pcluster_config(mocker)
+
+    section = CfnSection(VPC, pcluster_config, section_label="lazy")
+    assert_that(section._params).is_none()
+    assert_that(section.get_param_value("vpc_id")).is_none()
+    assert_that(list(section.params.keys())).is_equal_to(list(VPC["params"].keys()))
+
+
+def test_settings_params_initialized_immediately(mocker):
+    pcluster_config = get_mocked_pcluster_config(mocker)
+    ebs_settings_validators = list(CLUSTER_SIT["params"]["ebs_settings"]["validators"])
+
+    for _ in range(2):
+        section = CLUSTER_SIT.get("type")(CLUSTER_SIT, pcluster_config, section_label="eager")
+        assert_that(section._params).is_not_none()
+
+    # Definitions are not modified when adding the validation of the section labels
+    assert_that(CLUSTER_SIT["params"]["ebs_settings"]["validators"]).is_equal_to(ebs_settings_validators)
+    validators = section.get_param("ebs_settings").get_validators()
+    assert_that(validators).contains(settings_validator)
+    assert_that(validators).is_length(len(ebs_settings_validators) + 1)
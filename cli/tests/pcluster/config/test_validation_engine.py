@@ -0,0 +1,112 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import threading
+import time
+
+import pytest
+from assertpy import assert_that
+
+from pcluster.config.validation_engine import ValidationEngine, ValidationTask
+
+
+class _Recorder(object):
+    """Keep track of the reported results and of the number of checks running at the same time."""
+
+    def __init__(self):
+        self.reported = []
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def task(self, name, delay=0, result=None, exception=None, fail_on_report=False):
+        def _check():
+            with self._lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(delay)
+            with self._lock:
+                self.running -= 1
+            if exception:
+                raise exception
+            return result or name
+
+        def _report(value):
+            self.reported.append(value)
+            if fail_on_report:
+                raise SystemExit("ERROR: {0}".format(value))
+
+        return ValidationTask(check=_check, report=_report)
+
+
+@pytest.mark.parametrize("serial", [True, False])
+def test_results_reported_in_order(serial):
+    recorder = _Recorder()
+    # Tasks complete in reverse order when executed concurrently
+    tasks = [recorder.task("task{0}".format(index), delay=0.05 * (5 - index)) for index in range(5)]
+
+    ValidationEngine(serial=serial).run(tasks)
+
+    assert_that(recorder.reported).is_equal_to(["task{0}".format(index) for index in range(5)])
+    assert_that(recorder.max_running).is_equal_to(1 if serial else 5)
+
+
+def test_bounded_workers():
+    recorder = _Recorder()
+    tasks = [recorder.task("task{0}".format(index), delay=0.02) for index in range(10)]
+
+    ValidationEngine(max_workers=3).run(tasks)
+
+    assert_that(recorder.reported).is_length(10)
+    assert_that(recorder.max_running).is_less_than_or_equal_to(3)
+
+
+def test_first_error_stops_reporting():
+    recorder = _Recorder()
+    tasks = [
+        recorder.task("task0"),
+        recorder.task("task1", delay=0.05, fail_on_report=True),
+        recorder.task("task2", fail_on_report=True),
+    ]
+
+    with pytest.raises(SystemExit, match="ERROR: task1"):
+        ValidationEngine().run(tasks)
+    assert_that(recorder.reported).is_equal_to(["task0", "task1"])
+
+
+@pytest.mark.parametrize("exception", [RuntimeError("failure"), SystemExit("failure")])
+def test_check_exceptions_raised_in_order(exception):
+    recorder = _Recorder()
+    tasks = [recorder.task("task0", delay=0.05), recorder.task("task1", exception=exception), recorder.task("task2")]
+
+    with pytest.raises(type(exception), match="failure"):
+        ValidationEngine().run(tasks)
+    assert_that(recorder.reported).is_equal_to(["task0"])
+
+
+def test_report_only_tasks():
+    reported = []
+    tasks = [ValidationTask(report=reported.append), ValidationTask(report=reported.append, check=lambda: "value")]
+
+    ValidationEngine().run(tasks)
+
+    assert_that(reported).is_equal_to([None, "value"])
+
+
+def test_serial_mode_from_environment(mocker):
+    mocker.patch.dict(os.environ, {"PCLUSTER_SERIAL_VALIDATION": "true"})
+    pool_mock = mocker.patch("pcluster.config.validation_engine.ThreadPool")
+    recorder = _Recorder()
+
+    ValidationEngine().run([recorder.task("task0"), recorder.task("task1")])
+
+    pool_mock.assert_not_called()
+    assert_that(recorder.reported).is_equal_to(["task0", "task1"])
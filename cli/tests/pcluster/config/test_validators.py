@@ -43,7 +43,7 @@ from tests.pcluster.config.defaults import DefaultDict
 
 @pytest.fixture()
 def boto3_stubber_path():
-    return "pcluster.config.validators.boto3"
+    return "pcluster.boto3_clients.boto3"
 
 
 @pytest.mark.parametrize(
@@ -1225,7 +1225,7 @@ def test_fsx_id_validator(mocker, boto3_stubber, fsx_vpc, ip_permissions, networ
             response=describe_subnets_response,
             expected_params={"SubnetIds": ["subnet-12345678"]},
         )
-    ] * 2
+    ]  # prefetched once, for master_subnet_id validation and to validate fsx
 
     if network_interfaces:
         network_interfaces_in_response = []
@@ -1542,17 +1542,12 @@ def test_efa_validator_with_vpc_security_group(
             method="describe_security_groups",
             response=describe_security_groups_response,
             expected_params={"GroupIds": ["sg-12345678"]},
-        ),
+        ),  # prefetched once, for vpc_security_group_id validation and to validate efa
         MockedBoto3Request(
             method="describe_instance_types",
             response={"InstanceTypes": [{"InstanceType": "t2.large"}]},
             expected_params={"Filters": [{"Name": "network-info.efa-supported", "Values": ["true"]}]},
         ),
-        MockedBoto3Request(
-            method="describe_security_groups",
-            response=describe_security_groups_response,
-            expected_params={"GroupIds": ["sg-12345678"]},
-        ),  # it is called two times, for vpc_security_group_id validation and to validate efa
     ]
 
     boto3_stubber("ec2", mocked_requests)
@@ -2435,7 +2430,9 @@ def test_fsx_ignored_parameters_validator(mocker, section_dict, expected_error):
     mocked_pcluster_config = utils.get_mocked_pcluster_config(mocker)
     fsx_section = CfnSection(FSX, mocked_pcluster_config, "default")
     for param_key, param_value in section_dict.items():
-        param = FSX.get("params").get(param_key).get("type", CfnParam)
+        param_definition = FSX.get("params").get(param_key)
+        param_type = param_definition.get("type", CfnParam)
+        param = param_type("fsx", "default", param_key, param_definition, mocked_pcluster_config, fsx_section)
         param.value = param_value
         fsx_section.set_param(param_key, param)
     mocked_pcluster_config.add_section(fsx_section)
@@ -0,0 +1,107 @@
+"""This module provides unit tests for the pcluster.boto3_clients module."""
+
+import os
+import threading
+
+import pytest
+from assertpy import assert_that
+from botocore.config import Config
+
+from pcluster.boto3_clients import MAX_POOL_CONNECTIONS, Boto3ClientRegistry, get_boto3_client, get_boto3_resource
+
+
+@pytest.fixture()
+def boto3_mock(mocker):
+    mocked_boto3 = mocker.patch("pcluster.boto3_clients.boto3", autospec=True)
+    mocked_boto3.client.side_effect = lambda service, **kwargs: mocker.MagicMock(name=service)
+    mocked_boto3.resource.side_effect = lambda service, **kwargs: mocker.MagicMock(name=service)
+    return mocked_boto3
+
+
+def test_clients_are_shared(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1"})
+
+    ec2 = get_boto3_client("ec2")
+    for _ in range(5):
+        assert_that(get_boto3_client("ec2")).is_same_as(ec2)
+    cfn = get_boto3_client("cloudformation")
+    assert_that(cfn).is_not_same_as(ec2)
+    s3 = get_boto3_resource("s3")
+    assert_that(get_boto3_resource("s3")).is_same_as(s3)
+
+    assert_that(Boto3ClientRegistry.get_created_count()).is_equal_to({"ec2": 1, "cloudformation": 1, "s3": 1})
+    config = boto3_mock.client.call_args_list[0][1]["config"]
+    assert_that(config.max_pool_connections).is_equal_to(MAX_POOL_CONNECTIONS)
+    assert_that(boto3_mock.client.call_args_list[0][1]["region_name"]).is_equal_to("us-east-1")
+
+
+def test_clients_are_keyed_by_region_credentials_and_config(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1", "AWS_ACCESS_KEY_ID": "key1"})
+    client = get_boto3_client("ec2")
+
+    assert_that(get_boto3_client("ec2", region_name="eu-west-1")).is_not_same_as(client)
+    assert_that(get_boto3_client("ec2", config=Config(retries={"max_attempts": 10}))).is_not_same_as(client)
+    os.environ["AWS_ACCESS_KEY_ID"] = "key2"
+    assert_that(get_boto3_client("ec2")).is_not_same_as(client)
+    os.environ["AWS_ACCESS_KEY_ID"] = "key1"
+    assert_that(get_boto3_client("ec2")).is_same_as(client)
+
+    assert_that(Boto3ClientRegistry.get_created_count()).is_equal_to({"ec2": 4})
+
+
+def test_registry_disabled(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1", "PCLUSTER_CACHE_DISABLED": "true"})
+
+    assert_that(get_boto3_client("ec2")).is_not_same_as(get_boto3_client("ec2"))
+    assert_that(Boto3ClientRegistry.get_created_count()).is_equal_to({"ec2": 2})
+
+
+def test_concurrent_requests_create_one_client(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1"})
+    clients = []
+
+    def _get_client():
+        clients.append(get_boto3_client("ec2"))
+
+    threads = [threading.Thread(target=_get_client) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert_that(set(id(client) for client in clients)).is_length(1)
+    assert_that(Boto3ClientRegistry.get_created_count()).is_equal_to({"ec2": 1})
+
+
+def test_resources_are_registered_per_thread(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1"})
+    resources = {}
+    done = threading.Event()
+
+    def _get_resource(index):
+        resources[index] = [get_boto3_resource("dynamodb"), get_boto3_resource("dynamodb")]
+        # Keep the thread alive so that thread identifiers are not reused
+        done.wait()
+
+    threads = [threading.Thread(target=_get_resource, args=(index,)) for index in range(3)]
+    for thread in threads:
+        thread.start()
+    while len(resources) < 3:
+        done.wait(0.01)
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    for first, second in resources.values():
+        assert_that(first).is_same_as(second)
+    assert_that(set(id(first) for first, _ in resources.values())).is_length(3)
+
+
+def test_clear(boto3_mock, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1"})
+    client = get_boto3_client("ec2")
+
+    Boto3ClientRegistry.clear()
+
+    assert_that(Boto3ClientRegistry.get_created_count()).is_empty()
+    assert_that(get_boto3_client("ec2")).is_not_same_as(client)
@@ -0,0 +1,104 @@
+"""This module provides unit tests for the pcluster CLI entry point."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from assertpy import assert_that
+
+from pcluster.cli import _get_parser
+from pcluster.installation import get_installed_version
+
+# Modules that must be imported only by the commands using them
+HEAVY_MODULES = [
+    "boto3",
+    "botocore.session",
+    "jinja2",
+    "pkg_resources",
+    "tabulate",
+    "pcluster.utils",
+    "pcluster.commands",
+    "pcluster.config.mappings",
+    "pcluster.config.validators",
+]
+
+# Modules implementing the commands other than list
+OTHER_COMMAND_MODULES = [
+    "pcluster.createami",
+    "pcluster.configure.easyconfig",
+    "pcluster.dcv.connect",
+    "pcluster.cli_commands.delete",
+    "pcluster.cli_commands.multi_cluster",
+    "pcluster.cli_commands.start",
+    "pcluster.cli_commands.stop",
+    "pcluster.cli_commands.update",
+]
+
+
+def _run_with_importtime(code, home_dir):
+    """Run the given code in a new interpreter, return the imported modules with their cumulative import time in us."""
+    env = dict(os.environ, HOME=str(home_dir))
+    output = subprocess.check_output(
+        [sys.executable, "-X", "importtime", "-c", code], env=env, stderr=subprocess.STDOUT
+    ).decode("utf-8")
+    imported_modules = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line[len("import time:") :].split("|")  # noqa: E203
+            if cumulative.strip().isdigit():
+                imported_modules[module.strip()] = int(cumulative)
+    return output, imported_modules
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7")
+def test_version_startup(tmp_path):
+    """Verify that `pcluster version` doesn't load the modules needed by the other commands (run with -s)."""
+    code = "import sys; sys.argv = ['pcluster', 'version']; from pcluster.cli import main; main()"
+    output, imported_modules = _run_with_importtime(code, tmp_path)
+
+    assert_that(output).contains(get_installed_version())
+    print("pcluster.cli imported in {0:.1f} ms".format(imported_modules["pcluster.cli"] / 1000.0))
+    for module in HEAVY_MODULES + OTHER_COMMAND_MODULES:
+        assert_that(imported_modules).described_as(module).does_not_contain_key(module)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime requires Python 3.7")
+def test_list_startup(tmp_path):
+    """Verify that dispatching `pcluster list` only loads the modules needed by the command."""
+    code = (
+        "import sys; import pcluster.cli as cli; import pcluster.commands as commands; "
+        "commands.list_stacks = lambda args: None; "
+        "sys.argv = ['pcluster', 'list']; cli.main()"
+    )
+    _, imported_modules = _run_with_importtime(code, tmp_path)
+
+    assert_that(imported_modules).contains_key("pcluster.commands")
+    for module in OTHER_COMMAND_MODULES:
+        assert_that(imported_modules).described_as(module).does_not_contain_key(module)
+
+
+@pytest.mark.parametrize(
+    "command, expected_error",
+    [
+        (["status", "mycluster"], None),
+        (["status", "--all"], None),
+        (["status", "mycluster", "--all"], "The --all option cannot be used with the name of a cluster."),
+        (["status"], "Either the name of the cluster or the --all option must be provided."),
+    ],
+)
+def test_status_arguments(mocker, command, expected_error):
+    status_mock = mocker.patch("pcluster.commands.status")
+    status_all_mock = mocker.patch("pcluster.commands.status_all")
+    args = _get_parser().parse_args(command)
+
+    if expected_error:
+        with pytest.raises(SystemExit) as error:
+            args.func(args)
+        assert_that(error.value.code).is_equal_to("ERROR: {0}".format(expected_error))
+        status_mock.assert_not_called()
+        status_all_mock.assert_not_called()
+    else:
+        args.func(args)
+        assert_that(status_all_mock.called).is_equal_to(args.all_clusters)
+        assert_that(status_mock.called).is_equal_to(not args.all_clusters)
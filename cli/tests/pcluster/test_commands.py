@@ -12,13 +12,15 @@
 """This module provides unit tests for the functions in the pcluster.commands module."""
 import pkg_resources
 import pytest
+from argparse import Namespace
 from assertpy import assert_that
 from botocore.exceptions import ClientError
 
 import pcluster.utils as utils
 from pcluster.cli_commands import update
+from pcluster.cli_commands.compute_fleet_status_manager import ComputeFleetStatus
 from pcluster.cluster_model import ClusterModel
-from pcluster.commands import _setup_bucket_with_resources, _validate_cluster_name
+from pcluster.commands import _refresh_table, _setup_bucket_with_resources, _validate_cluster_name, status_all
 from pcluster.constants import PCLUSTER_NAME_MAX_LENGTH
 
 
@@ -99,7 +101,8 @@ def test_setup_bucket_with_resources_success(
         [
             mocker.call(bucket_name, mock_artifact_dir, root=pkg_resources.resource_filename(utils.__name__, dir))
             for dir in expected_dirs
-        ]
+        ],
+        any_order=True,
     )
     if expect_upload_hit_resources:
         upload_hit_resources_mock.assert_called_with(
@@ -251,3 +254,135 @@ def test_validate_cluster_name(cluster_name, should_trigger_error, caplog):
         _validate_cluster_name(cluster_name)
         for record in caplog.records:
             assert record.levelname != "CRITICAL"
+
+
+def _cluster_stack(name, status, last_updated_time=0, hit=True):
+    return {
+        "StackName": "parallelcluster-" + name,
+        "StackStatus": status,
+        "LastUpdatedTime": last_updated_time,
+        "Outputs": [{"OutputKey": "IsHITCluster", "OutputValue": "true" if hit else "false"}],
+        "Tags": [{"Key": "Version", "Value": "2.10.2"}],
+    }
+
+
+@pytest.fixture()
+def status_all_mocks(mocker):
+    mocker.patch("pcluster.commands.PclusterConfig.init_aws")
+    mocker.patch("pcluster.commands.get_boto3_client")
+    sleep_mock = mocker.patch("pcluster.commands.time.sleep")
+    head_node_mock = mocker.patch(
+        "pcluster.commands.utils.describe_cluster_instances", return_value=[{"State": {"Name": "running"}}]
+    )
+    fleet_status_mock = mocker.patch(
+        "pcluster.commands.ComputeFleetStatusManager.get_status", return_value=ComputeFleetStatus.RUNNING
+    )
+    mocker.patch("pcluster.commands.ComputeFleetStatusManager.__init__", return_value=None)
+    return sleep_mock, head_node_mock, fleet_status_mock
+
+
+def test_status_all(mocker, status_all_mocks, capsys):
+    sleep_mock, head_node_mock, fleet_status_mock = status_all_mocks
+    stacks_mock = mocker.patch(
+        "pcluster.commands._get_cluster_stacks",
+        side_effect=[
+            [_cluster_stack("cluster1", "CREATE_COMPLETE"), _cluster_stack("cluster2", "CREATE_IN_PROGRESS")],
+            [_cluster_stack("cluster1", "CREATE_COMPLETE"), _cluster_stack("cluster2", "CREATE_IN_PROGRESS")],
+            [_cluster_stack("cluster1", "CREATE_COMPLETE"), _cluster_stack("cluster2", "CREATE_COMPLETE", 1)],
+        ],
+    )
+
+    status_all(Namespace(config_file=None, nowait=False))
+
+    # describe_stacks is called once for every refresh, until no cluster is in a transient state
+    assert_that(stacks_mock.call_count).is_equal_to(3)
+    assert_that(sleep_mock.call_count).is_equal_to(2)
+    # The details of a cluster are retrieved again only when its stack changes
+    assert_that(head_node_mock.call_count).is_equal_to(2)
+    assert_that(fleet_status_mock.call_count).is_equal_to(2)
+    output = capsys.readouterr().out
+    assert_that(output).matches(r"cluster1\s+CREATE_COMPLETE\s+2.10.2\s+RUNNING\s+RUNNING")
+    assert_that(output).matches(r"cluster2\s+CREATE_IN_PROGRESS\s+2.10.2\s+-\s+-")
+    assert_that(output).matches(r"cluster2\s+CREATE_COMPLETE\s+2.10.2\s+RUNNING\s+RUNNING")
+
+
+def test_status_all_transient_details(mocker, status_all_mocks):
+    sleep_mock, head_node_mock, fleet_status_mock = status_all_mocks
+    mocker.patch("pcluster.commands._get_cluster_stacks", return_value=[_cluster_stack("cluster1", "UPDATE_COMPLETE")])
+    fleet_status_mock.side_effect = [ComputeFleetStatus.STOP_REQUESTED, ComputeFleetStatus.STOPPED]
+
+    status_all(Namespace(config_file=None, nowait=False))
+
+    assert_that(fleet_status_mock.call_count).is_equal_to(2)
+    assert_that(sleep_mock.call_count).is_equal_to(1)
+
+
+def test_status_all_nowait(mocker, status_all_mocks):
+    sleep_mock, _, _ = status_all_mocks
+    mocker.patch(
+        "pcluster.commands._get_cluster_stacks", return_value=[_cluster_stack("cluster1", "CREATE_IN_PROGRESS")]
+    )
+
+    status_all(Namespace(config_file=None, nowait=True))
+
+    sleep_mock.assert_not_called()
+
+
+def test_status_all_lookup_failure(mocker, status_all_mocks, capsys):
+    _, head_node_mock, _ = status_all_mocks
+    mocker.patch(
+        "pcluster.commands._get_cluster_stacks",
+        return_value=[_cluster_stack("cluster1", "CREATE_COMPLETE", hit=False)],
+    )
+    # utils.error exits when the instances cannot be described
+    head_node_mock.side_effect = SystemExit(1)
+
+    status_all(Namespace(config_file=None, nowait=False))
+
+    assert_that(capsys.readouterr().out).matches(r"cluster1\s+CREATE_COMPLETE\s+2.10.2\s+UNKNOWN\s+-")
+
+
+def test_status_all_lookup_failure_retried(mocker, status_all_mocks, capsys):
+    sleep_mock, head_node_mock, _ = status_all_mocks
+    mocker.patch(
+        "pcluster.commands._get_cluster_stacks",
+        side_effect=[
+            [
+                _cluster_stack("cluster1", "CREATE_COMPLETE", hit=False),
+                _cluster_stack("cluster2", "CREATE_IN_PROGRESS"),
+            ],
+            [
+                _cluster_stack("cluster1", "CREATE_COMPLETE", hit=False),
+                _cluster_stack("cluster2", "CREATE_COMPLETE", 1),
+            ],
+        ],
+    )
+    running_head_node = [{"State": {"Name": "running"}}]
+    # The lookup of cluster1 is throttled at the first refresh
+    head_node_mock.side_effect = [
+        ClientError({"Error": {"Code": "Throttling"}}, "DescribeInstances"),
+        running_head_node,
+        running_head_node,
+    ]
+
+    status_all(Namespace(config_file=None, nowait=False))
+
+    # The failed lookup is performed again at the next refresh, with the one of the changed cluster2
+    assert_that(head_node_mock.call_count).is_equal_to(3)
+    assert_that(sleep_mock.call_count).is_equal_to(1)
+    output = capsys.readouterr().out
+    assert_that(output).matches(r"cluster1\s+CREATE_COMPLETE\s+2.10.2\s+UNKNOWN\s+-")
+    assert_that(output).matches(r"cluster1\s+CREATE_COMPLETE\s+2.10.2\s+RUNNING\s+-")
+
+
+def test_refresh_table(mocker, capsys):
+    mocker.patch("pcluster.commands.sys.stdout.isatty", return_value=True)
+
+    printed_lines = _refresh_table(["header", "row1", "row2"], [])
+    assert_that(_refresh_table(["header", "row1", "row2"], printed_lines)).is_equal_to(printed_lines)
+    _refresh_table(["header", "row1", "new row2"], printed_lines)
+
+    output = capsys.readouterr().out
+    assert_that(output).starts_with("header\nrow1\nrow2\n")
+    # Only the changed row is rewritten
+    assert_that(output).ends_with("\033[3F\033[1E\033[1E\033[Knew row2\n\033[J")
@@ -0,0 +1,183 @@
+"""This module provides unit tests for the pcluster.metadata_cache module."""
+
+import json
+import os
+
+import pytest
+from assertpy import assert_that
+
+import pcluster.metadata_cache as metadata_cache
+from pcluster.metadata_cache import CacheSizeLimit, MetadataCache
+from pcluster.utils import Cache, InstanceTypeInfo
+from tests.common import MockedBoto3Request
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
+@pytest.fixture()
+def region(mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-1"})
+
+
+def _list_entries():
+    entries = []
+    for root, _, files in os.walk(metadata_cache.get_cache_dir()):
+        entries.extend(os.path.join(root, file_name) for file_name in files)
+    return entries
+
+
+def test_put_and_get(region):
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_none()
+
+    MetadataCache.put("instance_types", "c5.xlarge", {"VCpuInfo": {"DefaultVCpus": 4}})
+
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_equal_to({"VCpuInfo": {"DefaultVCpus": 4}})
+    assert_that(MetadataCache.get("instance_types", "c5.2xlarge")).is_none()
+    assert_that(MetadataCache.get("other_namespace", "c5.xlarge")).is_none()
+    entries = _list_entries()
+    assert_that(entries).is_length(1)
+    assert_that(entries[0]).contains(os.path.join("aws", "us-east-1", "instance_types"))
+
+
+@pytest.mark.parametrize(
+    "region_name, partition", [("us-east-1", "aws"), ("cn-north-1", "aws-cn"), ("us-gov-west-1", "aws-us-gov")]
+)
+def test_entries_are_stored_by_partition_and_region(mocker, region_name, partition):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": region_name})
+    MetadataCache.put("instance_types", "c5.xlarge", {})
+
+    assert_that(_list_entries()[0]).contains(os.path.join(partition, region_name, "instance_types"))
+    os.environ["AWS_DEFAULT_REGION"] = "eu-west-1"
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_none()
+
+
+def test_ttl(region, mocker):
+    time_mock = mocker.patch("pcluster.metadata_cache.time.time", return_value=1000)
+    MetadataCache.put("instance_types", "c5.xlarge", "value")
+
+    time_mock.return_value = 1100
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge", ttl=200)).is_equal_to("value")
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge", ttl=50)).is_none()
+
+
+def test_account_specific_entries(region, mocker, boto3_stubber):
+    boto3_stubber(
+        "sts",
+        [
+            MockedBoto3Request(method="get_caller_identity", response={"Account": "111111111111"}, expected_params={}),
+            MockedBoto3Request(method="get_caller_identity", response={"Account": "222222222222"}, expected_params={}),
+        ],
+    )
+    mocker.patch.dict(os.environ, {"AWS_ACCESS_KEY_ID": "key1"})
+    MetadataCache.put("instance_type_azs", "c5.xlarge", ["us-east-1a"], account_specific=True)
+    assert_that(MetadataCache.get("instance_type_azs", "c5.xlarge", account_specific=True)).is_equal_to(["us-east-1a"])
+
+    os.environ["AWS_ACCESS_KEY_ID"] = "key2"
+    assert_that(MetadataCache.get("instance_type_azs", "c5.xlarge", account_specific=True)).is_none()
+    # The account of the credentials is retrieved only once
+    os.environ["AWS_ACCESS_KEY_ID"] = "key1"
+    assert_that(MetadataCache.get("instance_type_azs", "c5.xlarge", account_specific=True)).is_equal_to(["us-east-1a"])
+
+
+def test_account_specific_entries_without_account(region, mocker):
+    lookup_mock = mocker.patch("pcluster.metadata_cache._lookup_account_id", return_value=None)
+    MetadataCache.put("instance_type_azs", "c5.xlarge", ["us-east-1a"], account_specific=True)
+
+    assert_that(MetadataCache.get("instance_type_azs", "c5.xlarge", account_specific=True)).is_none()
+    assert_that(_list_entries()).is_empty()
+    lookup_mock.assert_called_once()
+
+
+def test_corrupted_entry(region):
+    MetadataCache.put("instance_types", "c5.xlarge", "value")
+    with open(_list_entries()[0], "w") as entry_file:
+        entry_file.write("{not json")
+
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_none()
+    MetadataCache.put("instance_types", "c5.xlarge", "value")
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_equal_to("value")
+
+
+def test_no_temporary_files_left(region):
+    MetadataCache.put("instance_types", "c5.xlarge", "value")
+    MetadataCache.put("instance_types", "c5.xlarge", "new_value")
+    # Values which cannot be serialized are not stored
+    MetadataCache.put("instance_types", "c5.2xlarge", object())
+
+    entries = _list_entries()
+    assert_that(entries).is_length(1)
+    with open(entries[0]) as entry_file:
+        assert_that(json.load(entry_file)["value"]).is_equal_to("new_value")
+
+
+def test_size_eviction(region, mocker):
+    mocker.patch.object(MetadataCache._size_limit, "max_size", 1000)
+    # Files of the cache directory not storing metadata entries are not evicted
+    artifact_path = os.path.join(metadata_cache.get_cache_dir(), "artifacts", "archive.zip")
+    os.makedirs(os.path.dirname(artifact_path))
+    with open(artifact_path, "wb") as artifact_file:
+        artifact_file.write(b"x" * 2000)
+    os.utime(artifact_path, (0, 0))
+
+    for index in range(10):
+        key = "type{0}".format(index)
+        MetadataCache.put("instance_types", key, "x" * 200)
+        # Make the modification times reflect the insertion order
+        entry_path, _ = MetadataCache._get_entry_path("instance_types", key, account_specific=False)
+        os.utime(entry_path, (index + 1, index + 1))
+
+    entries = [path for path in _list_entries() if path != artifact_path]
+    assert_that(sum(os.path.getsize(path) for path in entries)).is_less_than_or_equal_to(1000)
+    assert_that(os.path.isfile(artifact_path)).is_true()
+    assert_that(MetadataCache.get("instance_types", "type9")).is_not_none()
+    assert_that(MetadataCache.get("instance_types", "type0")).is_none()
+
+
+def test_cache_size_limit(mocker):
+    size_limit = CacheSizeLimit(["artifacts"], 100)
+    artifacts_dir = os.path.join(metadata_cache.get_cache_dir(), "artifacts")
+    os.makedirs(artifacts_dir)
+    walk_spy = mocker.spy(metadata_cache.os, "walk")
+
+    for index in range(5):
+        with open(os.path.join(artifacts_dir, "archive{0}.zip".format(index)), "wb") as artifact_file:
+            artifact_file.write(b"x" * 30)
+        os.utime(os.path.join(artifacts_dir, "archive{0}.zip".format(index)), (index, index))
+        size_limit.add(30)
+
+    assert_that(sorted(os.listdir(artifacts_dir))).is_equal_to(["archive2.zip", "archive3.zip", "archive4.zip"])
+    # Scanned at the first write, then only when the fourth archive exceeds the limit
+    assert_that(walk_spy.call_count).is_equal_to(2)
+
+
+@pytest.mark.parametrize("disable_env, disable_option", [(True, False), (False, True)])
+def test_disabled(region, mocker, disable_env, disable_option):
+    if disable_env:
+        mocker.patch.dict(os.environ, {"PCLUSTER_CACHE_DISABLED": "true"})
+    if disable_option:
+        MetadataCache.disable()
+
+    MetadataCache.put("instance_types", "c5.xlarge", "value")
+
+    assert_that(MetadataCache.get("instance_types", "c5.xlarge")).is_none()
+    assert_that(_list_entries()).is_empty()
+
+
+def test_instance_type_info_read_through(region, boto3_stubber):
+    instance_type_data = {"InstanceType": "c5.xlarge", "VCpuInfo": {"DefaultVCpus": 4, "DefaultThreadsPerCore": 2}}
+    boto3_stubber(
+        "ec2",
+        MockedBoto3Request(
+            method="describe_instance_types",
+            response={"InstanceTypes": [instance_type_data]},
+            expected_params={"InstanceTypes": ["c5.xlarge"]},
+        ),
+    )
+    assert_that(InstanceTypeInfo.init_from_instance_type("c5.xlarge").vcpus_count()).is_equal_to(4)
+
+    # A new execution of the CLI is served by the persistent cache, without calling describe_instance_types
+    Cache.clear_all()
+    assert_that(InstanceTypeInfo.init_from_instance_type("c5.xlarge").vcpus_count()).is_equal_to(4)
@@ -0,0 +1,81 @@
+"""This module provides unit tests for the pcluster.offline_catalog module."""
+
+import json
+import os
+
+import pytest
+from assertpy import assert_that
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+from pcluster import offline_catalog
+from pcluster.boto3_clients import get_boto3_client
+from pcluster.metadata_cache import MetadataCache
+from pcluster.offline_catalog import MISSING_CALL_ERROR_CODE, OfflineCatalog
+
+INSTANCE_TYPES_RESPONSE = {"InstanceTypes": [{"InstanceType": "c5.xlarge", "VCpuInfo": {"DefaultVCpus": 4}}]}
+
+
+@pytest.fixture(autouse=True)
+def stop_catalog():
+    yield
+    offline_catalog.stop_catalog()
+
+
+def _record_calls(catalog_file):
+    catalog = offline_catalog.record_catalog()
+    ec2 = get_boto3_client("ec2", region_name="eu-west-1")
+    with Stubber(ec2) as stubber:
+        stubber.add_response(
+            "describe_instance_types", INSTANCE_TYPES_RESPONSE, expected_params={"InstanceTypes": ["c5.xlarge"]}
+        )
+        stubber.add_client_error(
+            "describe_subnets", service_error_code="InvalidSubnetID.NotFound", service_message="Subnet not found"
+        )
+        ec2.describe_instance_types(InstanceTypes=["c5.xlarge"])
+        with pytest.raises(ClientError):
+            ec2.describe_subnets(SubnetIds=["subnet-12345678"])
+    catalog.save(catalog_file)
+    offline_catalog.stop_catalog()
+    return catalog
+
+
+def test_record_and_serve_catalog(tmp_path, mocker):
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": "eu-west-1"})
+    catalog_file = str(tmp_path / "catalog.json")
+    assert_that(_record_calls(catalog_file).get_calls_count()).is_equal_to(2)
+    assert_that(MetadataCache.is_enabled()).is_false()
+    with open(catalog_file) as catalog_stream:
+        catalog_content = catalog_stream.read()
+    assert_that(json.loads(catalog_content)).has_region("eu-west-1")
+
+    # Calls are served without credentials and without reaching AWS
+    for variable in ["AWS_DEFAULT_REGION", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_PROFILE"]:
+        os.environ.pop(variable, None)
+    offline_catalog.use_catalog(catalog_file)
+    assert_that(os.environ["AWS_DEFAULT_REGION"]).is_equal_to("eu-west-1")
+    ec2 = get_boto3_client("ec2")
+    assert_that(ec2.describe_instance_types(InstanceTypes=["c5.xlarge"])).contains_entry(INSTANCE_TYPES_RESPONSE)
+    with pytest.raises(ClientError) as excinfo:
+        ec2.describe_subnets(SubnetIds=["subnet-12345678"])
+    assert_that(excinfo.value.response["Error"]).contains_entry({"Code": "InvalidSubnetID.NotFound"})
+    with pytest.raises(ClientError) as excinfo:
+        ec2.describe_subnets(SubnetIds=["subnet-87654321"])
+    assert_that(excinfo.value.response["Error"]["Code"]).is_equal_to(MISSING_CALL_ERROR_CODE)
+    assert_that(excinfo.value.response["Error"]["Message"]).contains("DescribeSubnets", "subnet-87654321")
+
+    # Recording the same calls produces the same catalog
+    offline_catalog.stop_catalog()
+    os.environ["AWS_DEFAULT_REGION"] = "eu-west-1"
+    other_catalog_file = str(tmp_path / "other_catalog.json")
+    _record_calls(other_catalog_file)
+    with open(other_catalog_file) as catalog_stream:
+        assert_that(catalog_stream.read()).is_equal_to(catalog_content)
+
+
+def test_load_unsupported_catalog(tmp_path):
+    catalog_file = tmp_path / "catalog.json"
+    catalog_file.write_text('{"version": 0, "calls": []}')
+
+    with pytest.raises(ValueError, match="Unsupported offline catalog version"):
+        OfflineCatalog.load(str(catalog_file))
@@ -0,0 +1,134 @@
+"""This module provides unit tests for the pcluster.retries module."""
+
+import pytest
+from assertpy import assert_that
+from botocore.exceptions import ClientError
+
+import pcluster.retries as retries
+from pcluster.retries import get_backoff_delay, get_retry_quota, get_retry_statistics, is_throttling_error, retry_call
+from tests.common import MockedBoto3Request
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
+def _client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": "message"}}, "operation")
+
+
+@pytest.fixture()
+def sleep_mock(mocker):
+    return mocker.patch("pcluster.retries.time.sleep")
+
+
+@pytest.mark.parametrize(
+    "code, service, expected_result",
+    [
+        ("Throttling", None, True),
+        ("ThrottlingException", "ec2", True),
+        ("RequestLimitExceeded", "ec2", True),
+        ("RequestLimitExceeded", "cloudformation", False),
+        ("TooManyRequestsException", "batch", True),
+        ("TooManyRequestsException", None, False),
+        ("SlowDown", "s3", True),
+        ("ValidationError", "cloudformation", False),
+    ],
+)
+def test_is_throttling_error(code, service, expected_result):
+    assert_that(is_throttling_error(_client_error(code), service)).is_equal_to(expected_result)
+    assert_that(is_throttling_error(Exception(code), service)).is_false()
+
+
+@pytest.mark.parametrize(
+    "attempt, base_delay, max_delay, expected_upper_bound",
+    [(1, 1, 20, 1), (2, 1, 20, 2), (4, 1, 20, 8), (6, 1, 20, 20), (3, 5, 100, 20)],
+)
+def test_get_backoff_delay(mocker, attempt, base_delay, max_delay, expected_upper_bound):
+    uniform_mock = mocker.patch("pcluster.retries.random.uniform", return_value=0.5)
+    assert_that(get_backoff_delay(attempt, base_delay, max_delay)).is_equal_to(0.5)
+    uniform_mock.assert_called_with(0, expected_upper_bound)
+
+
+def test_retry_call_throttled(mocker, sleep_mock):
+    func = mocker.MagicMock(side_effect=[_client_error("RequestLimitExceeded"), _client_error("Throttling"), "result"])
+
+    assert_that(retry_call(func, ("arg",), {"key": "value"}, service="ec2")).is_equal_to("result")
+    assert_that(func.call_count).is_equal_to(3)
+    func.assert_called_with("arg", key="value")
+    assert_that(sleep_mock.call_count).is_equal_to(2)
+    assert_that(get_retry_statistics()).is_equal_to({"ec2": {"retries": 2, "throttled": 2}})
+
+
+def test_retry_call_not_retried(mocker, sleep_mock):
+    func = mocker.MagicMock(side_effect=_client_error("ValidationError"))
+
+    with pytest.raises(ClientError):
+        retry_call(func, service="cloudformation")
+    assert_that(func.call_count).is_equal_to(1)
+    sleep_mock.assert_not_called()
+
+
+def test_retry_call_max_attempts(mocker, sleep_mock):
+    func = mocker.MagicMock(side_effect=_client_error("Throttling"))
+
+    with pytest.raises(ClientError):
+        retry_call(func, service="cloudformation", max_attempts=3)
+    assert_that(func.call_count).is_equal_to(3)
+    assert_that(get_retry_statistics()["cloudformation"]).is_equal_to({"retries": 2, "throttled": 2, "exhausted": 1})
+
+
+def test_retry_call_max_elapsed_time(mocker, sleep_mock):
+    mocker.patch("pcluster.retries.random.uniform", return_value=10)
+    mocker.patch("pcluster.retries.time.time", side_effect=[0, 5, 25])
+    func = mocker.MagicMock(side_effect=_client_error("Throttling"))
+
+    with pytest.raises(ClientError):
+        retry_call(func, service="cloudformation", max_elapsed_time=30)
+    assert_that(func.call_count).is_equal_to(2)
+
+
+def test_retry_quota_is_shared(mocker, sleep_mock):
+    get_retry_quota("ec2").available = 2 * retries.THROTTLING_RETRY_COST
+    func = mocker.MagicMock(side_effect=_client_error("RequestLimitExceeded"))
+
+    with pytest.raises(ClientError):
+        retry_call(func, service="ec2")
+    # The quota was emptied after two retries, other callers of the same service are not retried anymore
+    assert_that(func.call_count).is_equal_to(3)
+    with pytest.raises(ClientError):
+        retry_call(func, service="ec2")
+    assert_that(func.call_count).is_equal_to(4)
+    # Other services have their own quota
+    func.side_effect = _client_error("Throttling")
+    with pytest.raises(ClientError):
+        retry_call(func, service="cloudformation", max_attempts=2)
+    assert_that(func.call_count).is_equal_to(6)
+
+
+def test_retry_quota_refilled_on_success():
+    quota = retries.RetryQuota(capacity=10)
+    assert_that(quota.acquire(cost=8)).is_true()
+    assert_that(quota.acquire(cost=8)).is_false()
+    quota.release(amount=100)
+    assert_that(quota.available).is_equal_to(10)
+
+
+def test_service_inferred_from_client(boto3_stubber, sleep_mock, mocker):
+    mocker.patch.dict("os.environ", {"AWS_DEFAULT_REGION": "us-east-1"})
+    ec2 = boto3_stubber(
+        "ec2",
+        [
+            MockedBoto3Request(
+                method="describe_regions",
+                response="Error",
+                generate_error=True,
+                error_code="RequestLimitExceeded",
+                expected_params={},
+            ),
+            MockedBoto3Request(method="describe_regions", response={"Regions": []}, expected_params={}),
+        ],
+    )
+    assert_that(retries.retry_on_throttling(ec2.describe_regions)).contains_entry({"Regions": []})
+    assert_that(get_retry_statistics()).contains_key("ec2")
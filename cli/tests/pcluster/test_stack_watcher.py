@@ -0,0 +1,181 @@
+"""This module provides unit tests for the pcluster.stack_watcher module."""
+
+import pytest
+from assertpy import assert_that
+
+import pcluster.stack_watcher as stack_watcher
+from pcluster.stack_watcher import StackWatcher
+from tests.common import MockedBoto3Request
+
+STACK_NAME = "parallelcluster-cluster"
+STACK_ID = "arn:aws:cloudformation:us-east-1:111111111111:stack/parallelcluster-cluster/1"
+NESTED_STACK_NAME = "parallelcluster-cluster-EBSCfnStack-1"
+NESTED_STACK_ID = "arn:aws:cloudformation:us-east-1:111111111111:stack/parallelcluster-cluster-EBSCfnStack-1/2"
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.boto3_clients.boto3"
+
+
+@pytest.fixture()
+def sleep_mock(mocker):
+    return mocker.patch("pcluster.stack_watcher.time.sleep")
+
+
+def _event(event_id, logical_id, status, timestamp, stack_name=STACK_NAME, stack_id=STACK_ID, physical_id=None):
+    event = {
+        "EventId": event_id,
+        "StackId": stack_id,
+        "StackName": stack_name,
+        "LogicalResourceId": logical_id,
+        "ResourceStatus": status,
+        "Timestamp": timestamp,
+        "ResourceType": "AWS::CloudFormation::Stack" if physical_id else "AWS::EC2::Instance",
+    }
+    if physical_id:
+        event["PhysicalResourceId"] = physical_id
+    return event
+
+
+def _stack_event(event_id, status, timestamp, stack_name=STACK_NAME, stack_id=STACK_ID):
+    return _event(event_id, stack_name, status, timestamp, stack_name, stack_id, physical_id=stack_id)
+
+
+def _describe_stacks(status, stack_name=STACK_ID):
+    return MockedBoto3Request(
+        method="describe_stacks",
+        response={"Stacks": [{"StackName": STACK_NAME, "StackId": STACK_ID, "CreationTime": 0, "StackStatus": status}]},
+        expected_params={"StackName": stack_name},
+    )
+
+
+def _describe_stack_events(events, stack_name=STACK_ID, next_token=None, request_token=None):
+    response = {"StackEvents": events}
+    if next_token:
+        response["NextToken"] = next_token
+    expected_params = {"StackName": stack_name}
+    if request_token:
+        expected_params["NextToken"] = request_token
+    return MockedBoto3Request(method="describe_stack_events", response=response, expected_params=expected_params)
+
+
+def test_only_new_events_are_retrieved(boto3_stubber):
+    old_events = [_event("old{0}".format(index), "Resource", "CREATE_COMPLETE", 10 - index) for index in range(3)]
+    new_events = [_event("new{0}".format(index), "Resource", "UPDATE_COMPLETE", 30 - index) for index in range(3)]
+    cfn = boto3_stubber(
+        "cloudformation",
+        [
+            _describe_stacks("UPDATE_IN_PROGRESS", stack_name=STACK_NAME),
+            # The baseline only needs the latest page
+            _describe_stack_events(old_events, next_token="page2"),
+            # Pagination stops at the last seen event
+            _describe_stack_events(new_events[:2], next_token="page2"),
+            _describe_stack_events(new_events[2:] + old_events, request_token="page2"),
+            _describe_stack_events([]),
+        ],
+    )
+    watcher = StackWatcher(STACK_NAME, cfn)
+    watcher.get_stack()
+
+    assert_that(watcher.poll_events()).is_empty()
+    assert_that(watcher.last_event).is_equal_to(old_events[0])
+    assert_that(watcher.poll_events()).is_equal_to(list(reversed(new_events)))
+    assert_that(watcher.last_event).is_equal_to(new_events[0])
+    assert_that(watcher.poll_events()).is_empty()
+
+
+def test_status_tracked_through_events(boto3_stubber, sleep_mock):
+    cfn = boto3_stubber(
+        "cloudformation",
+        [
+            _describe_stacks("CREATE_IN_PROGRESS", stack_name=STACK_NAME),
+            _describe_stack_events([_stack_event("e1", "CREATE_IN_PROGRESS", 1)]),
+            _describe_stack_events([_event("e2", "MasterServer", "CREATE_IN_PROGRESS", 2)]),
+            _describe_stack_events([]),
+            _describe_stack_events([_stack_event("e3", "CREATE_COMPLETE", 3)]),
+            _describe_stacks("CREATE_COMPLETE"),
+        ],
+    )
+
+    stack = StackWatcher(STACK_NAME, cfn).wait(in_progress_statuses=["CREATE_IN_PROGRESS"])
+
+    assert_that(stack.get("StackStatus")).is_equal_to("CREATE_COMPLETE")
+    # The poll interval grows while no events are generated
+    assert_that([call[0][0] for call in sleep_mock.call_args_list]).is_equal_to(
+        [
+            stack_watcher.MIN_POLL_INTERVAL,
+            stack_watcher.MIN_POLL_INTERVAL,
+            stack_watcher.MIN_POLL_INTERVAL * stack_watcher.POLL_INTERVAL_GROWTH,
+        ]
+    )
+
+
+def test_completed_stack_is_not_polled(boto3_stubber, sleep_mock):
+    cfn = boto3_stubber("cloudformation", [_describe_stacks("CREATE_COMPLETE", stack_name=STACK_NAME)])
+
+    assert_that(StackWatcher(STACK_NAME, cfn).wait().get("StackStatus")).is_equal_to("CREATE_COMPLETE")
+    sleep_mock.assert_not_called()
+
+
+def test_max_poll_interval(mocker, sleep_mock):
+    cfn = mocker.MagicMock()
+    cfn.describe_stacks.return_value = {"Stacks": [{"StackId": STACK_ID, "StackStatus": "DELETE_IN_PROGRESS"}]}
+    cfn.describe_stack_events.side_effect = [{"StackEvents": []}] * 10 + [
+        {"StackEvents": [_stack_event("e1", "DELETE_COMPLETE", 1)]}
+    ]
+
+    StackWatcher(STACK_NAME, cfn).wait(show_progress=False)
+
+    assert_that(sleep_mock.call_args_list[-1][0][0]).is_equal_to(stack_watcher.MAX_POLL_INTERVAL)
+
+
+def test_nested_stacks_are_followed(boto3_stubber, sleep_mock, capsys):
+    nested_stack_event = _event("e2", "EBSCfnStack", "CREATE_IN_PROGRESS", 2, physical_id=NESTED_STACK_ID)
+    nested_events = [
+        _event("n2", "Volume", "CREATE_IN_PROGRESS", 3, NESTED_STACK_NAME, NESTED_STACK_ID),
+        _stack_event("n1", "CREATE_IN_PROGRESS", 2, NESTED_STACK_NAME, NESTED_STACK_ID),
+    ]
+    cfn = boto3_stubber(
+        "cloudformation",
+        [
+            _describe_stacks("CREATE_IN_PROGRESS", stack_name=STACK_NAME),
+            _describe_stack_events([_stack_event("e1", "CREATE_IN_PROGRESS", 1)]),
+            # The nested stack is discovered and all its events are retrieved
+            _describe_stack_events([nested_stack_event]),
+            _describe_stack_events(nested_events, stack_name=NESTED_STACK_ID),
+            # The nested stack is polled while in progress
+            _describe_stack_events([]),
+            _describe_stack_events(
+                [
+                    _stack_event("n4", "CREATE_COMPLETE", 5, NESTED_STACK_NAME, NESTED_STACK_ID),
+                    _event("n3", "Volume", "CREATE_COMPLETE", 4, NESTED_STACK_NAME, NESTED_STACK_ID),
+                ]
+                + nested_events,
+                stack_name=NESTED_STACK_ID,
+            ),
+            # The nested stack is completed and it's not polled anymore
+            _describe_stack_events([_stack_event("e3", "CREATE_COMPLETE", 6), nested_stack_event]),
+            _describe_stacks("CREATE_COMPLETE"),
+        ],
+    )
+
+    StackWatcher(STACK_NAME, cfn).wait()
+
+    output = capsys.readouterr().out
+    assert_that(output).contains("Status: Volume - CREATE_IN_PROGRESS")
+    assert_that(output).contains("Status: {0} - CREATE_COMPLETE".format(NESTED_STACK_NAME))
+    assert_that(output).ends_with("Status: {0} - CREATE_COMPLETE".format(STACK_NAME).ljust(80))
+
+
+def test_nested_stacks_disabled(mocker):
+    cfn = mocker.MagicMock()
+    cfn.describe_stack_events.side_effect = [
+        {"StackEvents": []},
+        {"StackEvents": [_event("e1", "EBSCfnStack", "CREATE_IN_PROGRESS", 1, physical_id=NESTED_STACK_ID)]},
+    ]
+    watcher = StackWatcher(STACK_ID, cfn, follow_nested_stacks=False)
+
+    watcher.poll_events()
+    assert_that(watcher.poll_events()).is_length(1)
+    assert_that(cfn.describe_stack_events.call_count).is_equal_to(2)
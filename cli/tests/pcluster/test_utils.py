@@ -1,16 +1,23 @@
 """This module provides unit tests for the functions in the pcluster.utils module."""
 
+import hashlib
+import io
 import json
 import logging
 import os
+import threading
+import time
+import zipfile
 from itertools import product
 from re import escape
 
 import pytest
 from assertpy import assert_that
 from botocore.exceptions import ClientError, EndpointConnectionError
+from jinja2 import BaseLoader, Environment
 
 import pcluster.utils as utils
+from pcluster.metadata_cache import MetadataCache
 from pcluster.utils import Cache, get_bucket_url
 from tests.common import MockedBoto3Request
 
@@ -22,7 +29,7 @@ STACK_TYPE = "AWS::CloudFormation::Stack"
 @pytest.fixture()
 def boto3_stubber_path():
     """Specify that boto3_mocker should stub calls to boto3 for the pcluster.utils module."""
-    return "pcluster.utils.boto3"
+    return "pcluster.boto3_clients.boto3"
 
 
 def test_get_stack_name():
@@ -226,7 +233,7 @@ def test_get_stack_resources(boto3_stubber, resources, error_message):
 
 
 def test_retry_on_boto3_throttling(boto3_stubber, mocker):
-    sleep_mock = mocker.patch("pcluster.utils.time.sleep")
+    sleep_mock = mocker.patch("pcluster.retries.time.sleep")
     mocked_requests = [
         MockedBoto3Request(
             method="describe_stack_resources",
@@ -248,11 +255,11 @@ def test_retry_on_boto3_throttling(boto3_stubber, mocker):
     ]
     client = boto3_stubber("cloudformation", mocked_requests)
     utils.retry_on_boto3_throttling(client.describe_stack_resources, StackName=FAKE_STACK_NAME)
-    sleep_mock.assert_called_with(5)
+    assert_that(sleep_mock.call_count).is_equal_to(2)
 
 
 def test_get_stack_resources_retry(boto3_stubber, mocker):
-    sleep_mock = mocker.patch("pcluster.utils.time.sleep")
+    sleep_mock = mocker.patch("pcluster.retries.time.sleep")
     mocked_requests = [
         MockedBoto3Request(
             method="describe_stack_resources",
@@ -267,11 +274,11 @@ def test_get_stack_resources_retry(boto3_stubber, mocker):
     ]
     boto3_stubber("cloudformation", mocked_requests)
     utils.get_stack_resources(FAKE_STACK_NAME)
-    sleep_mock.assert_called_with(5)
+    sleep_mock.assert_called_once()
 
 
 def test_get_stack_retry(boto3_stubber, mocker):
-    sleep_mock = mocker.patch("pcluster.utils.time.sleep")
+    sleep_mock = mocker.patch("pcluster.retries.time.sleep")
     expected_stack = {"StackName": FAKE_STACK_NAME, "CreationTime": 0, "StackStatus": "CREATED"}
     mocked_requests = [
         MockedBoto3Request(
@@ -290,36 +297,63 @@ def test_get_stack_retry(boto3_stubber, mocker):
     boto3_stubber("cloudformation", mocked_requests)
     stack = utils.get_stack(FAKE_STACK_NAME)
     assert_that(stack).is_equal_to(expected_stack)
-    sleep_mock.assert_called_with(5)
+    sleep_mock.assert_called_once()
 
 
 def test_verify_stack_creation_retry(boto3_stubber, mocker):
-    sleep_mock = mocker.patch("pcluster.utils.time.sleep")
-    mocker.patch(
-        "pcluster.utils.get_stack",
-        side_effect=[{"StackStatus": "CREATE_IN_PROGRESS"}, {"StackStatus": "CREATE_FAILED"}],
+    sleep_mock = mocker.patch("pcluster.retries.time.sleep")
+    stack_id = "arn:aws:cloudformation:us-east-1:111111111111:stack/{0}/1".format(FAKE_STACK_NAME)
+    stack = {"StackName": FAKE_STACK_NAME, "StackId": stack_id, "CreationTime": 0}
+    stack_event = dict(_generate_stack_event(), StackId=stack_id, ResourceType="AWS::CloudFormation::Stack")
+    failed_event = dict(
+        stack_event,
+        EventId="id2",
+        LogicalResourceId=FAKE_STACK_NAME,
+        ResourceStatus="CREATE_FAILED",
+        ResourceStatusReason="The following resource(s) failed to create: [MasterServer].",
     )
     mocked_requests = [
+        MockedBoto3Request(
+            method="describe_stacks",
+            response={"Stacks": [dict(stack, StackStatus="CREATE_IN_PROGRESS")]},
+            expected_params={"StackName": FAKE_STACK_NAME},
+        ),
         MockedBoto3Request(
             method="describe_stack_events",
             response="Error",
-            expected_params={"StackName": FAKE_STACK_NAME},
+            expected_params={"StackName": stack_id},
             generate_error=True,
             error_code="Throttling",
         ),
         MockedBoto3Request(
             method="describe_stack_events",
-            response={"StackEvents": [_generate_stack_event()]},
+            response={"StackEvents": [stack_event]},
+            expected_params={"StackName": stack_id},
+        ),
+        MockedBoto3Request(
+            method="describe_stack_events",
+            response={"StackEvents": [failed_event, stack_event]},
+            expected_params={"StackName": stack_id},
+        ),
+        MockedBoto3Request(
+            method="describe_stacks",
+            response={"Stacks": [dict(stack, StackStatus="CREATE_FAILED")]},
+            expected_params={"StackName": stack_id},
+        ),
+        MockedBoto3Request(
+            method="describe_stack_events",
+            response={"StackEvents": [failed_event, stack_event]},
             expected_params={"StackName": FAKE_STACK_NAME},
         ),
     ]
-    client = boto3_stubber("cloudformation", mocked_requests * 2)
+    client = boto3_stubber("cloudformation", mocked_requests)
     assert_that(utils.verify_stack_creation(FAKE_STACK_NAME, client)).is_false()
-    sleep_mock.assert_called_with(5)
+    # One sleep for the throttled call and one between the polls
+    assert_that(sleep_mock.call_count).is_equal_to(2)
 
 
 def test_get_stack_events_retry(boto3_stubber, mocker):
-    sleep_mock = mocker.patch("pcluster.utils.time.sleep")
+    sleep_mock = mocker.patch("pcluster.retries.time.sleep")
     expected_events = [_generate_stack_event()]
     mocked_requests = [
         MockedBoto3Request(
@@ -337,7 +371,7 @@ def test_get_stack_events_retry(boto3_stubber, mocker):
     ]
     boto3_stubber("cloudformation", mocked_requests)
     assert_that(utils.get_stack_events(FAKE_STACK_NAME)).is_equal_to(expected_events)
-    sleep_mock.assert_called_with(5)
+    sleep_mock.assert_called_once()
 
 
 def _generate_stack_event():
@@ -367,6 +401,94 @@ def test_generate_random_name_with_prefix(bucket_prefix):
     assert_that(len(bucket_name)).is_between(3, max_bucket_name_length)
 
 
+def test_read_remote_file_http_cache(mocker):
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    url = "https://bucket.s3.amazonaws.com/templates/template.cfn.yaml"
+    response = mocker.MagicMock()
+    response.__enter__.return_value = response
+    response.read.return_value = b"template content"
+    response.headers = {"ETag": '"etag1"', "Last-Modified": "Wed, 21 Oct 2020 07:28:00 GMT"}
+    not_modified = utils.urllib.error.HTTPError(url, 304, "Not Modified", {}, None)
+    urlopen_mock = mocker.patch("pcluster.utils.urllib.request.urlopen", side_effect=[response, not_modified])
+
+    for _ in range(2):
+        assert_that(utils.read_remote_file(url)).is_equal_to("template content")
+    conditional_request = urlopen_mock.call_args[0][0]
+    assert_that(conditional_request.get_header("If-none-match")).is_equal_to('"etag1"')
+    assert_that(conditional_request.get_header("If-modified-since")).is_equal_to("Wed, 21 Oct 2020 07:28:00 GMT")
+
+    # Recently validated files are returned without any request
+    assert_that(utils.read_remote_file(url, max_age=60)).is_equal_to("template content")
+    assert_that(urlopen_mock.call_count).is_equal_to(2)
+
+    # Entries not matching their checksum are downloaded again
+    cached_file = MetadataCache.get("remote_files", url)
+    cached_file["content"] = "corrupted content"
+    MetadataCache.put("remote_files", url, cached_file)
+    urlopen_mock.side_effect = [response]
+    assert_that(utils.read_remote_file(url, max_age=60)).is_equal_to("template content")
+    assert_that(urlopen_mock.call_args[0][0].get_header("If-none-match")).is_none()
+
+
+def test_read_remote_file_s3_cache(mocker):
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    s3_object = mocker.MagicMock()
+    s3_object.get.side_effect = [
+        {"Body": io.BytesIO(b"template content"), "ETag": '"etag1"', "VersionId": "version1"},
+        ClientError({"Error": {"Code": "304", "Message": "Not Modified"}}, "GetObject"),
+    ]
+    s3_resource = mocker.patch("pcluster.utils.get_boto3_resource").return_value
+    s3_resource.Object.return_value = s3_object
+
+    for _ in range(2):
+        assert_that(utils.read_remote_file("s3://bucket/templates/template.cfn.yaml")).is_equal_to("template content")
+    s3_resource.Object.assert_called_with("bucket", "templates/template.cfn.yaml")
+    s3_object.get.assert_called_with(IfNoneMatch='"etag1"')
+
+
+@pytest.mark.parametrize(
+    "check_existing, existing_metadata, head_error_code, expect_upload",
+    [
+        (False, None, None, True),
+        (True, None, "404", True),
+        (True, {}, None, True),
+        (True, {"content-sha256": "other-hash"}, None, True),
+        (True, {"content-sha256": hashlib.sha256(b"content").hexdigest()}, None, False),
+    ],
+)
+def test_put_s3_object_if_changed(boto3_stubber, check_existing, existing_metadata, head_error_code, expect_upload):
+    bucket_name = "test-bucket"
+    key = "artifact_dir/templates/template.yaml"
+    mocked_requests = []
+    if check_existing:
+        mocked_requests.append(
+            MockedBoto3Request(
+                method="head_object",
+                expected_params={"Bucket": bucket_name, "Key": key},
+                response={"Metadata": existing_metadata, "VersionId": "existing"} if not head_error_code else "",
+                generate_error=head_error_code is not None,
+                error_code=head_error_code,
+            )
+        )
+    if expect_upload:
+        mocked_requests.append(
+            MockedBoto3Request(
+                method="put_object",
+                expected_params={
+                    "Bucket": bucket_name,
+                    "Key": key,
+                    "Body": b"content",
+                    "Metadata": {"content-sha256": hashlib.sha256(b"content").hexdigest()},
+                },
+                response={"VersionId": "new"},
+            )
+        )
+    boto3_stubber("s3", mocked_requests)
+
+    version_id = utils.put_s3_object_if_changed(bucket_name, key, "content", check_existing=check_existing)
+    assert_that(version_id).is_equal_to("new" if expect_upload else "existing")
+
+
 @pytest.mark.parametrize(
     "region,create_error_message,configure_error_message",
     [
@@ -1028,6 +1150,79 @@ class TestCache:
 
         assert_that(self.invocations).is_length(4)
 
+    def test_keys_with_same_hash(self):
+        # hash(-1) == hash(-2) in CPython
+        assert_that(self._cached_method_1(-1, 0)).is_equal_to((-1, 0))
+        assert_that(self._cached_method_1(-2, 0)).is_equal_to((-2, 0))
+
+        assert_that(self.invocations).is_length(2)
+
+    def test_lru_eviction(self):
+        @Cache.cached(maxsize=2)
+        def _cached_function(arg):
+            TestCache.invocations.append(arg)
+            return arg
+
+        _cached_function(1)
+        _cached_function(2)
+        _cached_function(1)  # 1 is now the most recently used entry
+        _cached_function(3)  # evicts 2
+        _cached_function(1)
+        _cached_function(2)
+
+        assert_that(self.invocations).is_equal_to([1, 2, 3, 2])
+        assert_that(_cached_function.cache.get_statistics()).is_equal_to(
+            {"size": 2, "hits": 2, "misses": 4, "evictions": 2}
+        )
+
+    def test_ttl(self, mocker):
+        time_mock = mocker.patch("pcluster.utils.time.time", return_value=1000)
+
+        @Cache.cached(ttl=60)
+        def _cached_function(arg):
+            TestCache.invocations.append(arg)
+            return arg
+
+        _cached_function(1)
+        time_mock.return_value = 1050
+        _cached_function(1)
+        time_mock.return_value = 1100
+        _cached_function(1)
+
+        assert_that(self.invocations).is_equal_to([1, 1])
+
+    def test_statistics(self):
+        self._cached_method_1(1, 2)
+        self._cached_method_1(1, 2)
+        self._cached_method_1(1, 2)
+
+        assert_that(Cache.get_statistics()).contains_entry(
+            {"_cached_method_1": {"size": 1, "hits": 2, "misses": 1, "evictions": 0}}
+        )
+        Cache.clear_all()
+        assert_that(Cache.get_statistics()["_cached_method_1"]).is_equal_to(
+            {"size": 0, "hits": 0, "misses": 0, "evictions": 0}
+        )
+
+    def test_concurrent_access(self):
+        @Cache.cached(maxsize=10)
+        def _cached_function(arg):
+            return arg * 2
+
+        def _worker(offset):
+            for index in range(200):
+                assert_that(_cached_function((index + offset) % 15)).is_equal_to(((index + offset) % 15) * 2)
+
+        threads = [threading.Thread(target=_worker, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statistics = _cached_function.cache.get_statistics()
+        assert_that(statistics["hits"] + statistics["misses"]).is_equal_to(8 * 200)
+        assert_that(statistics["size"]).is_less_than_or_equal_to(10)
+
 
 class TestInstanceTypeInfo:
     @pytest.fixture(autouse=True)
@@ -1130,3 +1325,275 @@ class TestInstanceTypeInfo:
             utils.InstanceTypeInfo.init_from_instance_type("g4dn.metal")
 
         utils.InstanceTypeInfo.init_from_instance_type("g4dn.metal", exit_on_error=False)
+
+    def test_prefetch(self, boto3_stubber):
+        instance_types = ["c5.{0}xlarge".format(index) for index in range(150)]
+        batches = [sorted(instance_types)[:100], sorted(instance_types)[100:]]
+        mocked_requests = [
+            MockedBoto3Request(
+                method="describe_instance_types",
+                response={
+                    "InstanceTypes": [
+                        {"InstanceType": instance_type, "VCpuInfo": {"DefaultVCpus": 4}} for instance_type in batch
+                    ]
+                },
+                expected_params={"InstanceTypes": batch},
+            )
+            for batch in batches
+        ]
+        boto3_stubber("ec2", mocked_requests)
+
+        # Duplicates and already cached instance types are not requested again
+        utils.InstanceTypeInfo.prefetch(instance_types + instance_types[:10])
+        utils.InstanceTypeInfo.prefetch(instance_types)
+
+        for instance_type in instance_types:
+            assert_that(utils.InstanceTypeInfo.init_from_instance_type(instance_type).vcpus_count()).is_equal_to(4)
+
+    def test_prefetch_failure(self, boto3_stubber):
+        boto3_stubber(
+            "ec2",
+            [
+                MockedBoto3Request(
+                    method="describe_instance_types",
+                    expected_params={"InstanceTypes": ["c5.xlarge", "invalid.type"]},
+                    generate_error=True,
+                    response="Invalid instance type",
+                ),
+                MockedBoto3Request(
+                    method="describe_instance_types",
+                    response={"InstanceTypes": [{"InstanceType": "c5.xlarge", "VCpuInfo": {"DefaultVCpus": 4}}]},
+                    expected_params={"InstanceTypes": ["c5.xlarge"]},
+                ),
+            ],
+        )
+
+        # Errors are ignored by prefetch and reported when the single instance type is retrieved
+        utils.InstanceTypeInfo.prefetch(["invalid.type", "c5.xlarge"])
+        assert_that(utils.InstanceTypeInfo.init_from_instance_type("c5.xlarge").vcpus_count()).is_equal_to(4)
+
+
+HIT_SUBSTACK_TEMPLATE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "cloudformation", "compute-fleet-hit-substack.cfn.yaml"
+)
+
+
+def _get_multi_queue_template_params(queues_count, compute_resources_count):
+    """Return the params of the HIT substack template for a synthetic cluster with many queues and compute resources."""
+    queue_settings = {}
+    for queue_index in range(queues_count):
+        queue = "queue{0}".format(queue_index)
+        queue_settings[queue] = {
+            "compute_type": "spot" if queue_index % 2 else "ondemand",
+            "enable_efa": False,
+            "enable_efa_gdr": False,
+            "disable_hyperthreading": True,
+            "placement_group": "DYNAMIC" if queue_index % 3 == 0 else None,
+            "compute_resource_settings": {
+                "{0}_c5.{1}xlarge".format(queue, index + 1): {
+                    "instance_type": "c5.{0}xlarge".format(index + 1),
+                    "min_count": index,
+                    "max_count": 10,
+                    "spot_price": None,
+                    "vcpus": 4,
+                    "gpus": 0,
+                    "enable_efa": False,
+                    "enable_efa_gdr": False,
+                    "disable_hyperthreading": True,
+                    "disable_hyperthreading_via_cpu_options": True,
+                    "network_interfaces": 1,
+                }
+                for index in range(compute_resources_count)
+            },
+        }
+    return {
+        "cluster": {
+            "label": "default",
+            "default_queue": "queue0",
+            "queue_settings": queue_settings,
+            "scaling": {"scaledown_idletime": 10},
+            "disable_cluster_dns": False,
+            "dashboard": {"enable": True},
+        }
+    }
+
+
+@pytest.fixture()
+def template_environment(mocker):
+    """Make render_template create a new environment, with no compiled template in memory."""
+    mocker.patch.object(utils, "_template_environment", None)
+
+
+def _spy_template_compilation(mocker):
+    return mocker.spy(utils._get_template_environment(), "compile")
+
+
+@pytest.mark.usefixtures("template_environment")
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_render_template_cache(mocker, cache_enabled):
+    if not cache_enabled:
+        mocker.patch.dict(os.environ, {"PCLUSTER_CACHE_DISABLED": "true"})
+    template_str = "{% for tag in tags %}{{ tag.Key }}={{ config.value | sha1 }},{{ config.flag | bool }};{% endfor %}"
+    tags = [{"Key": "key1"}, {"Key": "key2"}]
+    expected_output = "key1={0},True;key2={0},True;".format(hashlib.sha1(b"value").hexdigest())
+
+    compile_spy = _spy_template_compilation(mocker)
+    for _ in range(3):
+        output = utils.render_template(template_str, {"value": "value ", "flag": "True"}, tags)
+        assert_that(output).is_equal_to(expected_output)
+    assert_that(compile_spy.call_count).is_equal_to(1)
+    # A different template is compiled too
+    assert_that(utils.render_template("{{ config_version }}", {}, [], "version")).is_equal_to("version")
+    assert_that(compile_spy.call_count).is_equal_to(2)
+
+    # A new process loads the compiled templates from the persistent cache
+    mocker.patch.object(utils, "_template_environment", None)
+    compile_spy = _spy_template_compilation(mocker)
+    assert_that(utils.render_template(template_str, {"value": "value ", "flag": "True"}, tags)).is_equal_to(
+        expected_output
+    )
+    assert_that(compile_spy.call_count).is_equal_to(0 if cache_enabled else 1)
+
+
+@pytest.mark.usefixtures("template_environment")
+def test_render_template_benchmark(mocker):
+    """Compare the rendering of the HIT substack with and without the compiled templates cache (run with -s)."""
+    with open(HIT_SUBSTACK_TEMPLATE) as template_file:
+        template_str = template_file.read()
+    tags = [{"Key": "TagKey", "Value": "TagValue"}]
+    renderings = 5
+    results = []
+    for queues_count, compute_resources_count in [(1, 1), (5, 3), (10, 5)]:
+        params = _get_multi_queue_template_params(queues_count, compute_resources_count)
+
+        start_time = time.time()
+        for _ in range(renderings):
+            environment = Environment(loader=BaseLoader)
+            environment.filters["sha1"] = lambda value: hashlib.sha1(value.strip().encode()).hexdigest()
+            environment.filters["bool"] = lambda value: value.lower() == "true"
+            expected_output = environment.from_string(template_str).render(
+                config=params, config_version="version", tags=tags
+            )
+        uncached_time = time.time() - start_time
+
+        start_time = time.time()
+        for _ in range(renderings):
+            output = utils.render_template(template_str, params, tags, "version")
+        cached_time = time.time() - start_time
+
+        assert_that(output).is_equal_to(expected_output)
+        assert_that(output).contains("queue{0}".format(queues_count - 1))
+        results.append((queues_count, compute_resources_count, uncached_time, cached_time))
+
+    for queues_count, compute_resources_count, uncached_time, cached_time in results:
+        print(
+            "{0} queues with {1} compute resources: {2} renderings in {3:.4f}s, {4:.4f}s with cache".format(
+                queues_count, compute_resources_count, renderings, uncached_time, cached_time
+            )
+        )
+
+
+def _write_resources_dir(path, mtime):
+    for relative_path, content in [
+        ("b.py", "print('b')"),
+        ("a/z.sh", "#!/bin/bash"),
+        ("a/c.txt", "c" * 100000),
+        ("__pycache__/b.cpython-38.pyc", "bytecode"),
+        ("a/c.pyc", "bytecode"),
+    ]:
+        file_path = path / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+        os.utime(str(file_path), (mtime, mtime))
+
+
+def test_zip_dir(tmp_path):
+    first_dir, second_dir = tmp_path / "first", tmp_path / "second"
+    _write_resources_dir(first_dir, 1000000000)
+    _write_resources_dir(second_dir, 1600000000)
+
+    archive = utils.zip_dir(str(first_dir))
+    with utils.zipfile.ZipFile(archive) as zip_file:
+        assert_that(zip_file.namelist()).is_equal_to(["a/c.txt", "a/z.sh", "b.py"])
+        assert_that(zip_file.read("a/c.txt")).is_equal_to(b"c" * 100000)
+        assert_that(zip_file.getinfo("a/c.txt").compress_size).is_less_than(1000)
+    # Same files give the same archive, whatever their timestamp
+    archive_file = tmp_path / "archive.zip"
+    with open(str(archive_file), "wb") as file_out:
+        utils.zip_dir(str(second_dir), file_out)
+    assert_that(archive_file.read_bytes()).is_equal_to(archive.getvalue())
+
+
+def test_upload_resources_artifacts(mocker, tmp_path):
+    root = tmp_path / "resources"
+    _write_resources_dir(root / "custom_resources", 1000000000)
+    (root / "template.yaml").write_text("template")
+    bucket_mock = mocker.patch("pcluster.utils.get_boto3_resource").return_value.Bucket.return_value
+    zip_dir_spy = mocker.spy(utils, "zip_dir")
+    uploaded_archives = []
+
+    def _upload_file(path, key):
+        if key.endswith(".zip"):
+            with open(path, "rb") as uploaded_file:
+                uploaded_archives.append(uploaded_file.read())
+
+    bucket_mock.upload_file.side_effect = _upload_file
+
+    utils.upload_resources_artifacts("bucket", "artifacts", str(root))
+    utils.upload_resources_artifacts("bucket", "artifacts", str(root))
+
+    # The archive is built once and uploaded from the cache
+    assert_that(zip_dir_spy.call_count).is_equal_to(1)
+    bucket_mock.upload_file.assert_has_calls(
+        [
+            mocker.call(mocker.ANY, "artifacts/custom_resources/artifacts.zip"),
+            mocker.call(str(root / "template.yaml"), "artifacts/template.yaml"),
+        ]
+        * 2
+    )
+    assert_that(uploaded_archives[1]).is_equal_to(uploaded_archives[0])
+
+    # A change of the content builds a new archive
+    (root / "custom_resources" / "b.py").write_text("print('changed')")
+    utils.upload_resources_artifacts("bucket", "artifacts", str(root))
+    assert_that(zip_dir_spy.call_count).is_equal_to(2)
+    assert_that(uploaded_archives[-1]).is_equal_to(utils.zip_dir(str(root / "custom_resources")).getvalue())
+    assert_that(uploaded_archives[-1]).is_not_equal_to(uploaded_archives[0])
+
+    # Archives are uploaded while being built when the cache is disabled
+    MetadataCache.disable()
+    streamed_archives = []
+
+    def _upload_fileobj(fileobj, key):
+        assert_that(hasattr(fileobj, "seek")).is_false()
+        streamed_archives.append(b"".join(iter(lambda: fileobj.read(1024), b"")))
+
+    bucket_mock.upload_fileobj.side_effect = _upload_fileobj
+    utils.upload_resources_artifacts("bucket", "artifacts", str(root))
+    bucket_mock.upload_fileobj.assert_called_once_with(mocker.ANY, "artifacts/custom_resources/artifacts.zip")
+    streamed_archive = zipfile.ZipFile(io.BytesIO(streamed_archives[0]))
+    cached_archive = zipfile.ZipFile(io.BytesIO(uploaded_archives[-1]))
+    assert_that(streamed_archive.namelist()).is_equal_to(cached_archive.namelist())
+    for name in cached_archive.namelist():
+        assert_that(streamed_archive.read(name)).is_equal_to(cached_archive.read(name))
+
+
+def test_upload_resources_artifacts_stream_errors(mocker, tmp_path):
+    root = tmp_path / "resources"
+    _write_resources_dir(root / "custom_resources", 1000000000)
+    MetadataCache.disable()
+    bucket_mock = mocker.patch("pcluster.utils.get_boto3_resource").return_value.Bucket.return_value
+    bucket_mock.upload_fileobj.side_effect = lambda fileobj, key: b"".join(iter(lambda: fileobj.read(1024), b""))
+
+    # A failure while building the archive fails the upload, no truncated archive is stored
+    mocker.patch("pcluster.utils._add_file_to_zip", side_effect=IOError("Unreadable file"))
+    with pytest.raises(IOError, match="Unreadable file"):
+        utils.upload_resources_artifacts("bucket", "artifacts", str(root))
+
+    # A failure of the upload stops the writer thread, blocked on the full pipe
+    mocker.stopall()
+    (root / "custom_resources" / "random.bin").write_bytes(os.urandom(1024 * 1024))
+    bucket_mock = mocker.patch("pcluster.utils.get_boto3_resource").return_value.Bucket.return_value
+    bucket_mock.upload_fileobj.side_effect = ValueError("Upload failed")
+    with pytest.raises(ValueError, match="Upload failed"):
+        utils.upload_resources_artifacts("bucket", "artifacts", str(root))
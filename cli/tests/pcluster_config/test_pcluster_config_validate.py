@@ -0,0 +1,147 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+from assertpy import assert_that
+
+from pcluster.config.pcluster_config import PclusterConfig
+from pcluster_config import cli
+from tests.pcluster.config.utils import mock_pcluster_config
+
+CONFIG = """
+[aws]
+aws_region_name = us-east-2
+
+[global]
+cluster_template = {cluster_template}
+
+[cluster default]
+key_name = test
+scheduler = slurm
+vpc_settings = public
+
+[cluster other]
+key_name = test
+scheduler = slurm
+vpc_settings = public
+
+[vpc public]
+vpc_id = vpc-12345678
+master_subnet_id = subnet-12345678
+"""
+
+
+@pytest.fixture()
+def config_files(tmp_path):
+    config_dir = tmp_path / "configs"
+    config_dir.mkdir()
+    for name, cluster_template in [("a.ini", "default"), ("b.ini", "other"), ("c.ini", "missing")]:
+        (config_dir / name).write_text(CONFIG.format(cluster_template=cluster_template))
+    return config_dir
+
+
+def _mock_validate(mocker):
+    def validate(pcluster_config):
+        if pcluster_config.get_section("cluster").label == "other":
+            pcluster_config.warn("Mocked warning")
+
+    mock_pcluster_config(mocker)
+    mocker.patch.object(PclusterConfig, "validate", autospec=True, side_effect=validate)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_validate_many_files(mocker, config_files, tmp_path, capsys, workers):
+    _mock_validate(mocker)
+    report_file = str(tmp_path / "report.json")
+
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main(["validate", "-c", str(config_files / "*.ini"), "-w", str(workers), "--report-file", report_file])
+
+    assert_that(excinfo.value.code).is_equal_to(1)
+    output = capsys.readouterr().out
+    assert_that(output).contains("PASSED {0} [cluster default]".format(config_files / "a.ini"))
+    assert_that(output).contains("PASSED {0} [cluster other]".format(config_files / "b.ini"))
+    assert_that(output).contains("  WARNING: Mocked warning", "FAILED {0}".format(config_files / "c.ini"))
+    assert_that(output).contains("2 passed, 1 failed")
+
+    with open(report_file) as report_stream:
+        report = json.load(report_stream)
+    assert_that(report).contains_entry({"passed": 2}, {"failed": 1})
+    assert_that([result["config_file"] for result in report["results"]]).is_equal_to(
+        [str(config_files / name) for name in ["a.ini", "b.ini", "c.ini"]]
+    )
+    assert_that(report["results"][1]).contains_entry({"status": "PASSED"}, {"warnings": ["Mocked warning"]})
+    assert_that(report["results"][2]["status"]).is_equal_to("FAILED")
+    assert_that(report["results"][2]["errors"]).is_length(1)
+
+
+def test_validate_templates_junit_report(mocker, config_files, tmp_path, capsys):
+    _mock_validate(mocker)
+    report_file = str(tmp_path / "report.xml")
+
+    cli.main(
+        [
+            "validate",
+            "-c",
+            str(config_files / "a.ini"),
+            str(config_files / "b.ini"),
+            "-t",
+            "default",
+            "other",
+            "--report-file",
+            report_file,
+            "--report-format",
+            "junit",
+        ]
+    )
+
+    assert_that(capsys.readouterr().out).contains("4 passed, 0 failed")
+    testsuite = ElementTree.parse(report_file).getroot()
+    assert_that(testsuite.attrib).contains_entry({"tests": "4"}, {"failures": "0"})
+    assert_that([testcase.attrib["name"] for testcase in testsuite]).is_equal_to(
+        ["default", "other", "default", "other"]
+    )
+    assert_that(testsuite.find("testcase[@name='other']/system-out").text).is_equal_to("WARNING: Mocked warning")
+
+
+def test_validate_files_with_other_credentials(mocker, config_files, capsys):
+    _mock_validate(mocker)
+    credentials = "[aws]\naws_access_key_id = {0}\naws_secret_access_key = secret\n"
+    for name, access_key_id in [("a.ini", "first_key"), ("b.ini", "other_key")]:
+        config_file = config_files / name
+        config_file.write_text(config_file.read_text().replace("[aws]\n", credentials.format(access_key_id)))
+
+    with pytest.raises(SystemExit):
+        cli.main(["validate", "-c", str(config_files / "a.ini"), str(config_files / "b.ini"), "-w", "2"])
+
+    # The credentials are initialized once from the first file and never overwritten by the other ones
+    assert_that(os.environ).contains_entry({"AWS_ACCESS_KEY_ID": "first_key"}, {"AWS_SECRET_ACCESS_KEY": "secret"})
+    output = capsys.readouterr().out
+    assert_that(output).contains(
+        "PASSED {0}".format(config_files / "a.ini"), "FAILED {0}".format(config_files / "b.ini")
+    )
+    assert_that(output).contains("ERROR: The aws_access_key_id in the [aws] section differs")
+    assert_that(output).contains("1 passed, 1 failed")
+
+
+def test_validate_unexpected_error(mocker, config_files, capsys):
+    mocker.patch("pcluster_config.cli.PclusterConfig.init_aws", side_effect=ValueError("Broken"))
+    stop_catalog_mock = mocker.patch("pcluster_config.cli.offline_catalog.stop_catalog")
+
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main(["validate", "-c", str(config_files / "a.ini")])
+
+    assert_that(excinfo.value.code).is_equal_to(1)
+    assert_that(capsys.readouterr().out).contains("Unexpected error of type ValueError: Broken")
+    stop_catalog_mock.assert_called_once()
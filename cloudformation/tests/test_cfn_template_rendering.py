@@ -12,12 +12,14 @@ spec = importlib.util.spec_from_file_location("cfn_formatter", "../utils/cfn_for
 cfn_formatter = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(cfn_formatter)
 
+# Shared by all the test cases, so that every template is compiled once
+env = Environment(loader=FileSystemLoader(".."))
+env.filters["sha1"] = lambda value: hashlib.sha1(value.strip().encode()).hexdigest()
+env.filters["bool"] = lambda value: value.lower() == "true"
+
 
 def substack_rendering(tmp_path, template_name, test_config):
 
-    env = Environment(loader=FileSystemLoader(".."))
-    env.filters["sha1"] = lambda value: hashlib.sha1(value.strip().encode()).hexdigest()
-    env.filters["bool"] = lambda value: value.lower() == "true"
     template = env.get_template(template_name)
     output_from_parsed_template = template.render(
         config=test_config, config_version="version", tags=[{"Key": "TagKey", "Value": "TagValue"}]